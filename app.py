@@ -6,12 +6,53 @@ from flask import Flask
 from blueprints.admin import admin_bp
 from blueprints.course import course_bp
 from blueprints.index import index_bp
+from caches.course_enrollment_cache import CourseEnrollmentCache
+from caches.invalidation_bus import InvalidationBus, subscribe_caches_to_invalidation_bus
+from caches.mysql_invalidation_bus import MySqlInvalidationBus
+from caches.nav_tree_cache import NavTreeCache
+from caches.page_cache import PageCache
+from caches.redis_invalidation_bus import RedisInvalidationBus
+from caches.rendered_html_cache import RenderedHtmlCache
+from caches.user_session_cache import UserSessionCache
+from cli import rerender_pages_command
 from config import FLASK_APP_SECRET_KEY, DATABASE_HOST, DATABASE_SCHEMA_NAME, DATABASE_USER, DATABASE_PASSWORD, \
-    DATABASE_PORT
+    DATABASE_PORT, DATABASE_POOL_SIZE, DATABASE_POOL_MAX_OVERFLOW, DATABASE_POOL_CHECKOUT_TIMEOUT_SECONDS, \
+    DATABASE_POOL_PRE_PING, DATABASE_POOL_RECYCLE_SECONDS, DATABASE_PREPARED_STATEMENT_CACHE_SIZE, \
+    DATABASE_REPLICA_HOSTS, DATABASE_READ_YOUR_WRITES_SECONDS, CACHING_ENABLED, NAV_TREE_CACHE_MAX_ENTRIES, \
+    RENDERED_HTML_CACHE_MAX_BYTES, USER_SESSION_CACHE_TTL_SECONDS, COURSE_ENROLLMENT_CACHE_TTL_SECONDS, \
+    INVALIDATION_BUS_BACKEND, INVALIDATION_BUS_REDIS_URL, INVALIDATION_BUS_POLL_SECONDS, PAGE_CACHE_MAX_ENTRIES, \
+    CACHE_SINGLEFLIGHT_TIMEOUT_SECONDS
 from db_connection_details import DBConnectionDetails
+from db_connection_pool import DBConnectionPool
+from export_jobs import ExportJobRunner
+from flask_repository_getters import commit_unit_of_work, release_unit_of_work
 
 
-def create_app(is_admin_app = False, custom_db_config: Optional[DBConnectionDetails] = None):
+def create_db_connection_pool(db_config: DBConnectionDetails):
+    return DBConnectionPool(
+        db_config,
+        pool_size=DATABASE_POOL_SIZE,
+        max_overflow=DATABASE_POOL_MAX_OVERFLOW,
+        checkout_timeout=DATABASE_POOL_CHECKOUT_TIMEOUT_SECONDS,
+        pre_ping=DATABASE_POOL_PRE_PING,
+        recycle_seconds=DATABASE_POOL_RECYCLE_SECONDS,
+        prepared_statement_cache_size=DATABASE_PREPARED_STATEMENT_CACHE_SIZE,
+    )
+
+def create_invalidation_bus(db_config: DBConnectionDetails) -> InvalidationBus:
+    if INVALIDATION_BUS_BACKEND == "local":
+        return InvalidationBus()
+    elif INVALIDATION_BUS_BACKEND == "redis":
+        return RedisInvalidationBus(INVALIDATION_BUS_REDIS_URL)
+    elif INVALIDATION_BUS_BACKEND == "mysql":
+        return MySqlInvalidationBus(db_config, poll_seconds=INVALIDATION_BUS_POLL_SECONDS)
+    raise ValueError(f"Unknown INVALIDATION_BUS_BACKEND {INVALIDATION_BUS_BACKEND!r}")
+
+def create_app(
+    is_admin_app = False,
+    custom_db_config: Optional[DBConnectionDetails] = None,
+    enable_caching: Optional[bool] = None
+):
     app = Flask(__name__)
     app.secret_key = FLASK_APP_SECRET_KEY
 
@@ -21,17 +62,73 @@ def create_app(is_admin_app = False, custom_db_config: Optional[DBConnectionDeta
             database=DATABASE_SCHEMA_NAME,
             user=DATABASE_USER,
             password=DATABASE_PASSWORD,
-            port=DATABASE_PORT
+            port=DATABASE_PORT,
+            replicas=[
+                DBConnectionDetails(
+                    host=replica_host.split(":")[0],
+                    port=replica_host.split(":")[1] if ":" in replica_host else DATABASE_PORT,
+                    database=DATABASE_SCHEMA_NAME,
+                    user=DATABASE_USER,
+                    password=DATABASE_PASSWORD,
+                )
+                for replica_host in DATABASE_REPLICA_HOSTS
+            ]
         )
 
     if is_admin_app:
         app.register_blueprint(admin_bp)
+        app.config["EXPORT_JOB_RUNNER"] = ExportJobRunner(custom_db_config)
 
     else:
         app.register_blueprint(index_bp)
         app.register_blueprint(course_bp)
 
     app.config["DB_CONFIG_OBJECT"] = custom_db_config
+    app.config["DB_CONNECTION_POOL"] = create_db_connection_pool(custom_db_config)
+    app.config["DB_REPLICA_CONNECTION_POOLS"] = [
+        create_db_connection_pool(replica_config)
+        for replica_config in custom_db_config.replicas
+    ]
+    app.config["DB_READ_YOUR_WRITES_SECONDS"] = DATABASE_READ_YOUR_WRITES_SECONDS
+
+    if enable_caching is None:
+        enable_caching = CACHING_ENABLED
+    app.config["NAV_TREE_CACHE"] = NavTreeCache(
+        NAV_TREE_CACHE_MAX_ENTRIES,
+        singleflight_timeout_seconds=CACHE_SINGLEFLIGHT_TIMEOUT_SECONDS,
+    ) if enable_caching else None
+    app.config["PAGE_CACHE"] = PageCache(
+        PAGE_CACHE_MAX_ENTRIES,
+        singleflight_timeout_seconds=CACHE_SINGLEFLIGHT_TIMEOUT_SECONDS,
+    ) if enable_caching else None
+    app.config["RENDERED_HTML_CACHE"] = RenderedHtmlCache(
+        RENDERED_HTML_CACHE_MAX_BYTES,
+        singleflight_timeout_seconds=CACHE_SINGLEFLIGHT_TIMEOUT_SECONDS,
+    ) if enable_caching else None
+    app.config["USER_SESSION_CACHE"] = UserSessionCache(ttl_seconds=USER_SESSION_CACHE_TTL_SECONDS) \
+        if enable_caching else None
+    app.config["COURSE_ENROLLMENT_CACHE"] = CourseEnrollmentCache(ttl_seconds=COURSE_ENROLLMENT_CACHE_TTL_SECONDS) \
+        if enable_caching else None
+
+    if enable_caching:
+        invalidation_bus = create_invalidation_bus(custom_db_config)
+        subscribe_caches_to_invalidation_bus(
+            invalidation_bus,
+            nav_tree_cache=app.config["NAV_TREE_CACHE"],
+            page_cache=app.config["PAGE_CACHE"],
+            rendered_html_cache=app.config["RENDERED_HTML_CACHE"],
+            user_session_cache=app.config["USER_SESSION_CACHE"],
+            course_enrollment_cache=app.config["COURSE_ENROLLMENT_CACHE"],
+        )
+        invalidation_bus.start()
+        app.config["INVALIDATION_BUS"] = invalidation_bus
+    else:
+        app.config["INVALIDATION_BUS"] = None
+
+    app.cli.add_command(rerender_pages_command)
+
+    app.after_request(commit_unit_of_work)
+    app.teardown_appcontext(release_unit_of_work)
 
     return app
 
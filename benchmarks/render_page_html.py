@@ -0,0 +1,76 @@
+"""
+Compares the single-pass link rewriting in page_renderer against the
+BeautifulSoup rewriting it replaced, on generated pages of 100 KB and up.
+
+    $ python -m benchmarks.render_page_html
+"""
+import re
+import timeit
+import urllib.parse
+
+import markdown2
+from bs4 import BeautifulSoup
+
+from page_renderer import rewrite_relative_links
+
+STARTING_URL_PATH = "/cpsc-408-f24"
+
+SECTION_TEMPLATE = '''
+## Week {week}
+
+Read [chapter {week}](/reading/chapter-{week}) before lecture, then work through the
+[lab](/labs/{week} "Lab {week}") and the [practice problems](https://example.com/problems/{week}).
+Questions go to [office hours](/office-hours) or the [discussion board](/discussion#week-{week}).
+
+- **Topic:** queries, joins and indexes, with *plenty* of examples
+- **Due:** [assignment {week}](/assignments/{week}) by Friday
+
+    SELECT page.page_title FROM page WHERE page.course_id = {week};
+
+'''
+
+
+def rewrite_relative_links_with_beautifulsoup(page_html_content: str, starting_url_path: str) -> str:
+    soup = BeautifulSoup(page_html_content, "html.parser")
+    all_relative_links = soup.find_all("a", href=re.compile("^/"))
+    for relative_link in all_relative_links:
+        replacement = soup.new_tag("a", **relative_link.attrs)
+        replacement.string = relative_link.string
+        url_without_beginning_slash = relative_link.attrs["href"][1:]
+        replacement.attrs["href"] = urllib.parse.urljoin(starting_url_path + "/", url_without_beginning_slash)
+        relative_link.replace_with(replacement)
+
+    return soup.prettify()
+
+def generate_page_content(minimum_size_in_bytes: int) -> str:
+    sections = []
+    size = 0
+    while size < minimum_size_in_bytes:
+        section = SECTION_TEMPLATE.format(week=len(sections) + 1)
+        sections.append(section)
+        size += len(section.encode())
+    return "# Syllabus\n" + "".join(sections)
+
+def time_per_call(function, argument: str, repeat: int = 3, number: int = 1) -> float:
+    timings = timeit.repeat(lambda: function(argument, STARTING_URL_PATH), repeat=repeat, number=number)
+    return min(timings) / number
+
+def main():
+    # markdown2 takes the same time either way, so it's timed on its own
+    print(f"{'page size':>10} {'markdown2':>11} {'beautifulsoup':>14} {'single pass':>12} {'rewrite speedup':>16} "
+          f"{'render speedup':>15}")
+    for size_in_kb in (100, 200):
+        page_content = generate_page_content(size_in_kb * 1024)
+        page_html_content = markdown2.markdown(page_content)
+
+        markdown_only = time_per_call(lambda content, _: markdown2.markdown(content), page_content)
+        with_beautifulsoup = time_per_call(rewrite_relative_links_with_beautifulsoup, page_html_content)
+        single_pass = time_per_call(rewrite_relative_links, page_html_content)
+
+        print(f"{size_in_kb:>7} KB {markdown_only * 1000:>9.1f}ms {with_beautifulsoup * 1000:>12.1f}ms "
+              f"{single_pass * 1000:>10.1f}ms {with_beautifulsoup / single_pass:>15.1f}x "
+              f"{(markdown_only + with_beautifulsoup) / (markdown_only + single_pass):>14.2f}x")
+
+
+if __name__ == "__main__":
+    main()
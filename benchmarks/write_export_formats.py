@@ -0,0 +1,77 @@
+"""
+Compares the size and write throughput of each export format, on generated
+rows shaped like the attendance records and students export.
+
+    $ python -m benchmarks.write_export_formats
+"""
+import os
+import random
+import tempfile
+import time
+
+from export_formats import get_available_export_formats, write_export_file
+from models.export_column import ExportColumn, ExportColumnType
+
+ROW_COUNT = 200_000
+STUDENT_COUNT = 2000
+COURSE_COUNT = 40
+SESSIONS_PER_COURSE = 30
+
+# As ExportRepo.get_attendance_records_and_students_columns() types them
+ATTENDANCE_COLUMNS = [
+    ExportColumn('full_name'),
+    ExportColumn('email'),
+    ExportColumn('user_id', ExportColumnType.INT),
+    ExportColumn('attendance_session_id', ExportColumnType.INT),
+    ExportColumn('attendance_status', ExportColumnType.SMALL_INT),
+    ExportColumn('title'),
+    ExportColumn('user_friendly_class_code'),
+]
+
+
+def generate_attendance_rows(row_count: int) -> list[tuple]:
+    rng = random.Random(408)
+    students = [
+        (f"Student Number{user_id}", f"student{user_id}@example.edu", user_id)
+        for user_id in range(1, STUDENT_COUNT + 1)
+    ]
+    courses = [
+        (f"Database Management Section {course_number}", f"CPSC-408-{course_number:02}")
+        for course_number in range(1, COURSE_COUNT + 1)
+    ]
+
+    rows = []
+    while len(rows) < row_count:
+        course_index = rng.randrange(COURSE_COUNT)
+        attendance_session_id = course_index * SESSIONS_PER_COURSE + rng.randrange(SESSIONS_PER_COURSE) + 1
+        full_name, email, user_id = rng.choice(students)
+        title, user_friendly_class_code = courses[course_index]
+        # Mostly present, as real attendance is
+        attendance_status = rng.choices((0, 1, 2, 3, 4), weights=(5, 80, 7, 6, 2))[0]
+        rows.append((full_name, email, user_id, attendance_session_id, attendance_status, title, user_friendly_class_code))
+    return rows
+
+def time_write(path: str, rows: list[tuple], export_format) -> float:
+    started_at = time.perf_counter()
+    write_export_file(path, rows, ATTENDANCE_COLUMNS, export_format)
+    return time.perf_counter() - started_at
+
+def main():
+    rows = generate_attendance_rows(ROW_COUNT)
+
+    print(f"{ROW_COUNT:,} attendance rows")
+    print(f"{'format':>10} {'size':>10} {'vs csv':>8} {'write time':>11} {'rows/s':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        csv_size = None
+        for export_format in get_available_export_formats():
+            path = os.path.join(directory, export_format.file_name('attendance.csv'))
+            seconds = min(time_write(path, rows, export_format) for _ in range(3))
+            size = os.path.getsize(path)
+            csv_size = csv_size or size
+
+            print(f"{export_format.name:>10} {size / 1024 / 1024:>7.2f} MB {size / csv_size:>7.1%} "
+                  f"{seconds * 1000:>9.0f}ms {ROW_COUNT / seconds:>11,.0f}")
+
+
+if __name__ == "__main__":
+    main()
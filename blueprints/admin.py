@@ -1,112 +1,169 @@
-import csv
 import os
+from typing import Callable, Iterator
 
-from flask import Blueprint, render_template, redirect, flash
+from flask import Blueprint, render_template, redirect, flash, abort, Response, current_app, jsonify, \
+    send_from_directory, request
 
-from flask_repository_getters import get_content_repository, get_user_repository, get_course_repository, \
-    get_attendance_repository
+from csv_export import generate_csv_chunks
+from custom_exceptions import NotFoundException
+from datarepos.export_repo import ExportRepo, EXPORTABLE_TABLES
+from export_formats import CSV, get_available_export_formats
+from export_jobs import ExportJobRunner, TABLE_EXPORT_FILE_NAMES, STUDENT_COUNT_PER_CLASS_FILE_NAME, \
+    STUDENT_COUNT_PER_CLASS_HEADER, ATTENDANCE_RECORDS_AND_STUDENTS_FILE_NAME, ATTENDANCE_RECORDS_AND_STUDENTS_HEADER
+from flask_repository_getters import open_export_repository, get_export_job_repository
+from models.export_job import ExportJob
 
 admin_bp = Blueprint('admin', __name__, url_prefix='')
 
-def generate_one_set_of_exports(
-    cursor,
-    database_table_name: str,
-    file_name: str,
-    header = None
-):
-    get_all_courses_query = f'''SELECT * FROM {database_table_name};'''
+# Jobs listed on the admin page
+RECENT_EXPORT_JOB_COUNT = 10
+
+def get_export_job_runner() -> ExportJobRunner:
+    return current_app.config["EXPORT_JOB_RUNNER"]
 
-    cursor.execute(get_all_courses_query)
-    result = cursor.fetchall()
+def get_export_job_or_404(export_job_id: int) -> ExportJob:
+    try:
+        return get_export_job_repository().get_export_job_by_id(export_job_id)
+    except NotFoundException:
+        abort(404)
+
+def start_export_job(export_type: str):
+    try:
+        export_job, is_new = get_export_job_runner().submit(
+            export_type,
+            request.form.get('export_format', CSV.name),
+        )
+    except ValueError as e:
+        flash(str(e))
+        return redirect('/')
 
-    writer = csv.writer(open(f'exports/{file_name}', 'w'))
-    if header:
-        writer.writerow(header)
-    for line in result:
-        writer.writerow(line)
+    if not is_new:
+        flash('This export is already in progress.')
+    return redirect(f'/jobs/{export_job.export_job_id}')
+
+def stream_csv_download(
+    file_name: str,
+    stream_rows: Callable[[ExportRepo], Iterator[tuple]],
+    header = None
+) -> Response:
+    # Rows are still being sent after the request's unit of work ends,
+    # so the download reads them on its own connection
+    export_repo = open_export_repository()
+
+    def generate_csv():
+        try:
+            yield from generate_csv_chunks(stream_rows(export_repo), header)
+        finally:
+            export_repo.close_connection()
+
+    return Response(
+        generate_csv(),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{file_name}"'},
+    )
 
 @admin_bp.route('/')
 def admin_options():
-    return render_template("admin_options.html")
+    export_jobs = get_export_job_repository().get_recent_export_jobs(RECENT_EXPORT_JOB_COUNT)
+    return render_template(
+        "admin_options.html",
+        table_export_file_names=TABLE_EXPORT_FILE_NAMES,
+        export_formats=get_available_export_formats(),
+        export_jobs=export_jobs,
+    )
 
 @admin_bp.route('/export-tables', methods=['POST'])
 def export_tables():
-    content_repo = get_content_repository()
-
-    os.makedirs('exports', exist_ok=True)
-
-    exports_to_generate = {
-        'course': 'courses.csv',
-        'user': 'users.csv',
-        'page': 'pages.csv',
-        'file': 'files.csv',
-        'page_file_bridge': 'page_file_bridge.csv',
-        'attendance_session': 'attendance_sessions.csv',
-        'attendance_record': 'attendance_record.csv',
-    }
-
-    for key in exports_to_generate:
-        value = exports_to_generate[key]
-
-        # Using the underlying connection is an antipattern,
-        # but I was pretty crunched for time when I wrote this
-        generate_one_set_of_exports(
-            cursor=content_repo.connection.cursor(),
-            database_table_name=key,
-            file_name=value
-        )
+    return start_export_job('tables')
 
-    flash('Exports generated under exports directory in project root.')
-    return redirect('/')
+@admin_bp.route('/export-table-changes', methods=['POST'])
+def export_table_changes():
+    return start_export_job('table_changes')
 
-@admin_bp.route('/export-student-count-per-class', methods=['POST'])
-def export_student_count_per_class():
-    course_repo = get_course_repository()
-
-    query = '''
-    SELECT course.course_id, course.title, course.user_friendly_class_code, COUNT(filtered_enrollments.user_id)
-    FROM course
-    INNER JOIN (
-        SELECT enrollment.course_id, enrollment.user_id
-        FROM enrollment
-        WHERE enrollment.role = 1
-    ) as filtered_enrollments
-        ON course.course_id = filtered_enrollments.course_id
-    GROUP BY course.course_id
-    '''
-
-    os.makedirs('exports', exist_ok=True)
-
-    cursor = course_repo.connection.cursor()
-    cursor.execute(query)
-    result = cursor.fetchall()
-
-    writer = csv.writer(open(f'exports/student_count_per_class.csv', 'w'))
-    writer.writerow(['course_id', 'title', 'user_friendly_class_code', 'student_count'])
-    for line in result:
-        writer.writerow(line)
-
-    flash('Export generated under exports directory in project root.')
-    return redirect('/')
-
-@admin_bp.route('/export-attendance-records-and-students', methods=['POST'])
-def export_all_attendance_records_and_students():
-    attendance_repo = get_attendance_repository()
+@admin_bp.route('/export-table-changes-full-refresh', methods=['POST'])
+def export_table_changes_full_refresh():
+    return start_export_job('table_changes_full_refresh')
 
-    query = '''
-    SELECT * FROM attendance_records_students_classes;
-    '''
+@admin_bp.route('/download/tables/<string:table_name>.csv', methods=['GET'])
+def download_table(table_name: str):
+    if table_name not in EXPORTABLE_TABLES:
+        abort(404)
 
-    cursor = attendance_repo.connection.cursor()
-    cursor.execute(query)
-    result = cursor.fetchall()
+    return stream_csv_download(
+        TABLE_EXPORT_FILE_NAMES[table_name],
+        lambda export_repo: export_repo.stream_table_rows(table_name),
+    )
 
-    os.makedirs('exports', exist_ok=True)
+@admin_bp.route('/export-student-count-per-class', methods=['POST'])
+def export_student_count_per_class():
+    return start_export_job('student_count_per_class')
 
-    writer = csv.writer(open(f'exports/attendance_records_and_students.csv', 'w'))
-    writer.writerow(['full_name', 'email', 'user_id', 'attendance_session_id', 'attendance_status', 'title', 'user_friendly_class_code'])
-    for line in result:
-        writer.writerow(line)
+@admin_bp.route('/download/student-count-per-class.csv', methods=['GET'])
+def download_student_count_per_class():
+    return stream_csv_download(
+        STUDENT_COUNT_PER_CLASS_FILE_NAME,
+        ExportRepo.stream_student_count_per_class_rows,
+        STUDENT_COUNT_PER_CLASS_HEADER,
+    )
 
-    flash('Export generated under exports directory in project root.')
-    return redirect('/')
+@admin_bp.route('/export-attendance-records-and-students', methods=['POST'])
+def export_all_attendance_records_and_students():
+    return start_export_job('attendance_records_and_students')
+
+@admin_bp.route('/download/attendance-records-and-students.csv', methods=['GET'])
+def download_attendance_records_and_students():
+    return stream_csv_download(
+        ATTENDANCE_RECORDS_AND_STUDENTS_FILE_NAME,
+        ExportRepo.stream_attendance_records_and_students_rows,
+        ATTENDANCE_RECORDS_AND_STUDENTS_HEADER,
+    )
+
+@admin_bp.route('/jobs/<int:export_job_id>', methods=['GET'])
+def export_job_status(export_job_id: int):
+    export_job = get_export_job_or_404(export_job_id)
+    return render_template(
+        "admin_export_job.html",
+        export_job=export_job,
+        file_names=get_export_job_runner().job_file_names(export_job),
+    )
+
+@admin_bp.route('/jobs/<int:export_job_id>.json', methods=['GET'])
+def export_job_status_json(export_job_id: int):
+    export_job = get_export_job_or_404(export_job_id)
+    return jsonify({
+        'export_job_id': export_job.export_job_id,
+        'export_type': export_job.export_type,
+        'export_format': export_job.export_format,
+        'status': export_job.status.name.lower(),
+        'progress': export_job.progress,
+        'error_message': export_job.error_message,
+        'created_at': export_job.created_at.isoformat() if export_job.created_at else None,
+        'started_at': export_job.started_at.isoformat() if export_job.started_at else None,
+        'finished_at': export_job.finished_at.isoformat() if export_job.finished_at else None,
+        'files': [
+            f'/jobs/{export_job_id}/files/{file_name}'
+            for file_name in get_export_job_runner().job_file_names(export_job)
+        ],
+    })
+
+@admin_bp.route('/jobs/<int:export_job_id>/cancel', methods=['POST'])
+def cancel_export_job(export_job_id: int):
+    try:
+        get_export_job_repository().request_export_job_cancel(export_job_id)
+    except NotFoundException:
+        flash('This export has already finished.')
+
+    return redirect(f'/jobs/{export_job_id}')
+
+@admin_bp.route('/jobs/<int:export_job_id>/files/<string:file_name>', methods=['GET'])
+def download_export_job_file(export_job_id: int, file_name: str):
+    export_job = get_export_job_or_404(export_job_id)
+    runner = get_export_job_runner()
+    if file_name not in runner.job_file_names(export_job):
+        abort(404)
+
+    return send_from_directory(
+        os.path.abspath(runner.job_directory(export_job_id)),
+        file_name,
+        as_attachment=True,
+    )
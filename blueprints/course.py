@@ -1,37 +1,79 @@
-import re
-import urllib.parse
+import hashlib
+from contextlib import nullcontext
 from dataclasses import asdict
 from typing import Optional
 
-import markdown2
-from bs4 import BeautifulSoup
-from flask import Blueprint, render_template, session, abort, request, redirect, current_app, flash, g
+from flask import Blueprint, render_template, session, abort, request, redirect, current_app, flash, g, make_response
 
+from caches.rendered_html_cache import RenderedHtmlCache
 from custom_exceptions import AlreadyExistsException, NotFoundException, InvalidPathException
 from flask_decorators import requires_login, requires_course_enrollment, requires_course_page
-from flask_repository_getters import get_content_repository, get_attendance_repository
+from flask_repository_getters import get_content_repository, get_attendance_repository, store_rendered_page_html
 from models import course
 from models.attendance_record import AttendanceRecord
 from models.course import Course
 from models.course_enrollment import Role
 from models.page import Page
+from models.page_navigation_link import PageNavigationLink
+from models.user import User
+from page_renderer import RENDERER_VERSION, render_page_html, get_stored_page_html_if_current, \
+    get_stored_page_html_from_older_renderer
 
 course_bp = Blueprint("course", __name__)
 
-def generate_html_from_markdown(page: Page, course: Course):
-    page_html_content = markdown2.markdown(page.page_content)
-
-    soup = BeautifulSoup(page_html_content, "html.parser")
-    all_relative_links = soup.find_all("a", href=re.compile("^/"))
-    for relative_link in all_relative_links:
-        replacement = soup.new_tag("a", **relative_link.attrs)
-        replacement.string = relative_link.string
-        url_without_beginning_slash = relative_link.attrs["href"][1:]
-        replacement.attrs["href"] = urllib.parse.urljoin(course.starting_url_path + "/", url_without_beginning_slash)
-        relative_link.replace_with(replacement)
+def get_page_html(page: Page, course: Course) -> str:
+    page_html_content = get_stored_page_html_if_current(page, course.starting_url_path)
+    if page_html_content is not None:
+        return page_html_content
+
+    # Rendered by an older renderer, for an old course path, or never
+    def render_and_store():
+        rendered_html = render_page_html(page.page_content, course.starting_url_path)
+        if page.page_id:
+            store_rendered_page_html(page, course.starting_url_path, rendered_html)
+        return rendered_html
+
+    rendered_html_cache: Optional[RenderedHtmlCache] = current_app.config.get("RENDERED_HTML_CACHE")
+    if not rendered_html_cache or not page.page_id:
+        return render_and_store()
+
+    # Concurrent requests for the page share one render, and get
+    # the older renderer's HTML, if there is any, in the meantime
+    return rendered_html_cache.get_or_render(
+        page,
+        course.starting_url_path,
+        render_and_store,
+        stale_html=get_stored_page_html_from_older_renderer(page, course.starting_url_path),
+    )
 
-    page_html_content = soup.prettify()
-    return page_html_content
+def generate_page_etag(
+    page: Page,
+    course: Course,
+    user: User,
+    role: Role,
+    nav_links: list[PageNavigationLink],
+) -> Optional[str]:
+    """
+    Strong ETag covering everything course_static_page.html shows: the page
+    version, the nav tree, and the course, user and role around them.
+    """
+    if not page.page_id or not page.updated_at:
+        return None
+
+    # The nav tree is hashed rather than versioned, since its in-process
+    # version isn't shared between app processes
+    etag_parts = (
+        RENDERER_VERSION,
+        page.page_id,
+        page.updated_at.isoformat(),
+        repr(course),
+        user.user_id,
+        user.full_name,
+        user.email,
+        role.value,
+        repr(nav_links),
+    )
+    return hashlib.sha256(repr(etag_parts).encode()).hexdigest()
 
 @course_bp.route("/<string:course_url>/new/", methods=["GET", "POST"])
 @requires_login(should_redirect=False)
@@ -101,17 +143,27 @@ def course_custom_static_url_page(course_url: str, custom_static_path: Optional[
     page = g.page
     page_navigation_links = g.nav_links
 
-    page_html_content = generate_html_from_markdown(page, course)
+    # Checked after the decorators, so only users who may see the page get a 304
+    etag = generate_page_etag(page, course, user, role, page_navigation_links)
+    if etag and request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        page_html_content = get_page_html(page, course)
+        response = make_response(render_template(
+            "course_static_page.html",
+            role=role,
+            course=course,
+            page=page,
+            user=user,
+            page_navigation_links=page_navigation_links,
+            page_html_content=page_html_content
+        ))
 
-    return render_template(
-        "course_static_page.html",
-        role=role,
-        course=course,
-        page=page,
-        user=user,
-        page_navigation_links=page_navigation_links,
-        page_html_content=page_html_content
-    )
+    if etag:
+        response.set_etag(etag)
+        # Browsers must revalidate every time, and shared caches mustn't store pages
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 @course_bp.route("/<string:course_url>/delete/", methods=["POST"])
 @course_bp.route("/<string:course_url>/<path:custom_static_path>/delete/", methods=["POST"])
@@ -136,7 +188,7 @@ def course_delete_page(course_url: str, custom_static_path: Optional[str] = None
     except NotFoundException:
         flash(f"Page was not found. Someone else may have deleted it already.")
 
-        page_html_content = generate_html_from_markdown(page, course)
+        page_html_content = get_page_html(page, course)
         return render_template(
             "course_static_page.html",
             course=course,
@@ -281,7 +333,11 @@ def course_attendance_student_list_edit(course_url: str, attendance_session_id:
 
     attendance_repo = get_attendance_repository()
     attendance_session = attendance_repo.get_attendance_session_from_id(attendance_session_id)
-    attendance_records = attendance_repo.get_student_attendance_records_with_names_from_session_id(attendance_session_id)
+    # Submitted statuses are diffed against these, so on POST they can't come from a lagging replica
+    with attendance_repo.unit_of_work.reading_from_primary() if request.method == "POST" else nullcontext():
+        attendance_records = attendance_repo.get_student_attendance_records_with_names_from_session_id(
+            attendance_session_id
+        )
 
     def render_attendance_student_list():
         return render_template(
@@ -299,17 +355,21 @@ def course_attendance_student_list_edit(course_url: str, attendance_session_id:
     elif request.method == "POST":
         attendance_record_dictionary = dict(request.form)
         try:
-            for key in attendance_record_dictionary:
-                # noinspection PyTypeChecker
-                constructed_attendance_record = AttendanceRecord(
+            # noinspection PyTypeChecker
+            submitted_records = [
+                AttendanceRecord(
                     user_id=key,
                     attendance_session_id=attendance_session_id,
                     attendance_status=attendance_record_dictionary[key],
                 )
-
-                attendance_repo.update_status_by_attendance_session_and_user_id(
-                    constructed_attendance_record,
-                )
+                for key in attendance_record_dictionary
+            ]
+
+            attendance_repo.update_changed_statuses_by_attendance_session_id(
+                attendance_session_id,
+                submitted_records,
+                attendance_records,
+            )
 
             flash("Changes have been saved.")
             return redirect(f"{course.starting_url_path}/attendance/{attendance_session_id}")
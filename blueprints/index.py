@@ -1,7 +1,7 @@
-from flask import Blueprint, render_template, request, session, redirect, flash, g
+from flask import Blueprint, render_template, request, redirect, flash, g
 
 from flask_decorators import requires_login
-from flask_helpers import get_user_from_session
+from flask_helpers import get_user_from_session, sign_in_to_session, sign_out_of_session
 from flask_repository_getters import get_user_repository, get_course_repository
 
 index_bp = Blueprint("index", __name__)
@@ -47,12 +47,16 @@ def sign_in_page():
 
         user = user_repository.get_user_from_id_if_exists(user_id)
 
-        session["user_uuid"] = user.user_uuid
+        sign_in_to_session(user)
         return redirect("/")
 
 @index_bp.route("/sign-out", methods=["GET"])
 def sign_out_page():
-    if "user_uuid" in session:
-        session.pop("user_uuid")
+    user = get_user_from_session()
+    if user:
+        # Signs out every other session of the user's as well
+        get_user_repository().bump_session_version_by_id(user.user_id)
+
+    sign_out_of_session()
 
     return redirect("/")
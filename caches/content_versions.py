@@ -0,0 +1,34 @@
+import threading
+
+
+class ContentVersions:
+    """
+    A version number per course that changes whenever one of its pages
+    does. Caches store entries along with the version read before building
+    them, so an entry built while a write was committing is never mistaken
+    for one built after it.
+    """
+
+    def __init__(self):
+        self._versions: dict[int, int] = {}
+        # Versions come from one counter, so a version is never reused,
+        # even for another course or after clearing
+        self._latest_version = 0
+        self._minimum_version = 0
+        self._lock = threading.Lock()
+
+    def get(self, course_id: int) -> int:
+        with self._lock:
+            return max(self._versions.get(course_id, 0), self._minimum_version)
+
+    def bump(self, course_id: int):
+        with self._lock:
+            self._latest_version += 1
+            self._versions[course_id] = self._latest_version
+
+    def bump_all(self):
+        # Including courses whose entries are being built right now
+        with self._lock:
+            self._latest_version += 1
+            self._minimum_version = self._latest_version
+            self._versions.clear()
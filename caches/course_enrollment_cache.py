@@ -0,0 +1,71 @@
+import threading
+from typing import Optional
+
+from caches.lru_cache import LRUCache
+from models.course import Course
+from models.course_enrollment import Role
+
+
+class CourseEnrollmentCache:
+    """
+    Courses keyed by starting URL path, and roles keyed by (user_id, course_id),
+    for the lookups every course request makes.
+
+    Every invalidation bumps `generation`. Callers read it before querying
+    and pass it to `put`, which drops values loaded before an invalidation,
+    so a lookup racing a write can't cache what the write replaced.
+    Entries also expire after `ttl_seconds`, which bounds how long other
+    app processes can serve them after a write.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 60):
+        self._courses = LRUCache(max_entries, ttl_seconds=ttl_seconds)
+        self._roles = LRUCache(max_entries, ttl_seconds=ttl_seconds)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def course_stats(self):
+        return self._courses.stats
+
+    @property
+    def role_stats(self):
+        return self._roles.stats
+
+    @property
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def get_course(self, starting_url_path: str) -> Optional[Course]:
+        return self._courses.get(starting_url_path)
+
+    def put_course(self, course: Course, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                self._courses.put(course.starting_url_path, course)
+
+    def get_role(self, user_id: int, course_id: int) -> Optional[Role]:
+        return self._roles.get((user_id, course_id))
+
+    def put_role(self, user_id: int, course_id: int, role: Role, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                self._roles.put((user_id, course_id), role)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._courses.clear()
+            self._roles.clear()
+
+    def invalidate_course(self, course_id: int):
+        with self._lock:
+            self._generation += 1
+            self._courses.invalidate_matching(lambda _, course: course.course_id == course_id)
+            self._roles.invalidate_matching(lambda key, _: key[1] == course_id)
+
+    def invalidate_role(self, user_id: int, course_id: int):
+        with self._lock:
+            self._generation += 1
+            self._roles.invalidate((user_id, course_id))
@@ -0,0 +1,134 @@
+import json
+import logging
+import threading
+import uuid
+from collections import defaultdict
+from typing import Callable, Hashable, Optional
+
+from caches.course_enrollment_cache import CourseEnrollmentCache
+from caches.nav_tree_cache import NavTreeCache
+from caches.page_cache import PageCache
+from caches.rendered_html_cache import RenderedHtmlCache
+from caches.user_session_cache import UserSessionCache
+
+# Topics, and the keys published on them
+COURSE_CONTENT_TOPIC = "course_content"  # course_id, when any of its pages change
+RENDERED_HTML_TOPIC = "rendered_html"  # page_id
+USER_TOPIC = "user"  # user_id
+COURSE_TOPIC = "course"  # course_id
+ROLE_TOPIC = "role"  # (user_id, course_id)
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidationBus:
+    """
+    Tells every app process's caches about writes. Repos publish a topic and
+    key after their transaction commits, and each process evicts whatever
+    it has cached under that key.
+
+    This base class only reaches the publishing process. Subclasses also
+    send invalidations to other processes and dispatch the ones they receive.
+    If they might have missed some (e.g. after losing their connection),
+    they clear every cache instead.
+    """
+
+    def __init__(self):
+        # Identifies this process's own messages when they come back
+        self.sender_id = str(uuid.uuid4())
+
+        self._subscribers: dict[str, list[Callable[[Hashable], None]]] = defaultdict(list)
+        self._clear_callbacks: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str, callback: Callable[[Hashable], None]):
+        with self._lock:
+            self._subscribers[topic].append(callback)
+
+    def subscribe_to_clear(self, callback: Callable[[], None]):
+        with self._lock:
+            self._clear_callbacks.append(callback)
+
+    def publish(self, topic: str, key: Hashable):
+        self.dispatch(topic, key)
+        try:
+            self.send(topic, key)
+        except Exception:
+            # The write has already committed, so don't fail the request over it.
+            # Other processes keep the stale entry until it expires or is evicted.
+            logger.exception("Failed to send invalidation for %s %r", topic, key)
+
+    def dispatch(self, topic: str, key: Hashable):
+        with self._lock:
+            callbacks = list(self._subscribers[topic])
+        for callback in callbacks:
+            callback(key)
+
+    def dispatch_clear(self):
+        with self._lock:
+            callbacks = list(self._clear_callbacks)
+        for callback in callbacks:
+            callback()
+
+    def send(self, topic: str, key: Hashable):
+        """
+        Send an invalidation to other processes.
+        """
+        pass
+
+    def start(self):
+        """
+        Start receiving invalidations from other processes.
+        """
+        pass
+
+    def close(self):
+        pass
+
+    def encode_message(self, topic: str, key: Hashable) -> str:
+        return json.dumps({"sender_id": self.sender_id, "topic": topic, "key": self.encode_key(key)})
+
+    def decode_message(self, message: str | bytes) -> Optional[tuple[str, Hashable]]:
+        """
+        :return: the message's topic and key, or None if this process sent it
+        """
+        message = json.loads(message)
+        if message["sender_id"] == self.sender_id:
+            return None
+        return message["topic"], self.decode_key(message["key"])
+
+    @staticmethod
+    def encode_key(key: Hashable) -> str:
+        return json.dumps(key)
+
+    @staticmethod
+    def decode_key(encoded_key: str) -> Hashable:
+        # Tuples come back from JSON as lists
+        key = json.loads(encoded_key)
+        return tuple(key) if isinstance(key, list) else key
+
+
+def subscribe_caches_to_invalidation_bus(
+    invalidation_bus: InvalidationBus,
+    nav_tree_cache: Optional[NavTreeCache] = None,
+    page_cache: Optional[PageCache] = None,
+    rendered_html_cache: Optional[RenderedHtmlCache] = None,
+    user_session_cache: Optional[UserSessionCache] = None,
+    course_enrollment_cache: Optional[CourseEnrollmentCache] = None,
+):
+    if nav_tree_cache:
+        invalidation_bus.subscribe(COURSE_CONTENT_TOPIC, nav_tree_cache.bump_content_version)
+        invalidation_bus.subscribe_to_clear(nav_tree_cache.clear)
+    if page_cache:
+        invalidation_bus.subscribe(COURSE_CONTENT_TOPIC, page_cache.bump_content_version)
+        invalidation_bus.subscribe_to_clear(page_cache.clear)
+    if rendered_html_cache:
+        invalidation_bus.subscribe(RENDERED_HTML_TOPIC, rendered_html_cache.invalidate_page)
+        invalidation_bus.subscribe_to_clear(rendered_html_cache.clear)
+    if user_session_cache:
+        invalidation_bus.subscribe(USER_TOPIC, user_session_cache.invalidate_user_id)
+        invalidation_bus.subscribe_to_clear(user_session_cache.clear)
+    if course_enrollment_cache:
+        invalidation_bus.subscribe(COURSE_TOPIC, course_enrollment_cache.invalidate_course)
+        invalidation_bus.subscribe(ROLE_TOPIC, lambda key: course_enrollment_cache.invalidate_role(*key))
+        invalidation_bus.subscribe_to_clear(course_enrollment_cache.clear)
@@ -0,0 +1,122 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    evicted_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache:
+    """
+    Thread-safe in-process cache that evicts the least recently used
+    entry once it holds more than `max_entries` entries, or, if `max_bytes`
+    is set, once the sizes of its values add up to more than `max_bytes`.
+    Sizes are measured with `size_of`, which defaults to `sys.getsizeof`.
+    If `ttl_seconds` is set, entries also expire that long after they're put.
+
+    `None` can't be cached, since `get` uses it to signal a miss.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        size_of: Callable[[any], int] = sys.getsizeof,
+        ttl_seconds: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+
+        # key -> (value, size in bytes, monotonic expiry time or None)
+        self._entries: OrderedDict[Hashable, tuple[any, int, Optional[float]]] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get(self, key: Hashable) -> Optional[any]:
+        with self._lock:
+            if key not in self._entries:
+                self.stats.misses += 1
+                return None
+
+            value, _, expires_at = self._entries[key]
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove_entry(key)
+                self.stats.misses += 1
+                return None
+
+            self.stats.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: any):
+        if value is None:
+            raise ValueError("None can't be cached")
+
+        size = self.size_of(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Would evict everything else and still not fit
+            self.invalidate(key)
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+
+        with self._lock:
+            self._remove_entry(key)
+            self._entries[key] = (value, size, expires_at)
+            self._total_bytes += size
+
+            while len(self._entries) > self.max_entries \
+                    or (self.max_bytes is not None and self._total_bytes > self.max_bytes):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.stats.evictions += 1
+                self.stats.evicted_bytes += evicted_size
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._remove_entry(key)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable, any], bool]):
+        """
+        Remove every entry for which `predicate(key, value)` is true. Scans
+        the whole cache, so it's meant for infrequent invalidations like writes.
+        """
+        with self._lock:
+            matching_keys = [key for key, (value, _, _) in self._entries.items() if predicate(key, value)]
+            for key in matching_keys:
+                self._remove_entry(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def _remove_entry(self, key: Hashable):
+        # Caller must hold the lock
+        entry = self._entries.pop(key, None)
+        if entry:
+            _, size, _ = entry
+            self._total_bytes -= size
@@ -0,0 +1,154 @@
+import datetime
+import threading
+from typing import Hashable, Optional
+
+from caches.invalidation_bus import InvalidationBus
+from db_connection_details import DBConnectionDetails
+
+
+class MySqlInvalidationBus(InvalidationBus):
+    """
+    Sends invalidations through the `cache_version` table, for deployments
+    without Redis. Publishing bumps the row for the topic and key, and every
+    process polls for rows updated since its last poll.
+
+    Rows are stamped when their statement runs, which can be a little before
+    they're visible to other connections, so each poll looks back
+    `lookback_seconds` further and skips versions it has already seen.
+    If polling fails, every cache is cleared once it works again.
+    """
+
+    def __init__(
+        self,
+        db_config: DBConnectionDetails,
+        poll_seconds: float = 1,
+        lookback_seconds: float = 5,
+    ):
+        super().__init__()
+        self.db_config = db_config
+        self.poll_seconds = poll_seconds
+        self.lookback = datetime.timedelta(seconds=lookback_seconds)
+
+        self._publish_connection = None
+        self._publish_lock = threading.Lock()
+        self._poll_connection = None
+        self._poller_thread: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+
+        self._watermark: Optional[datetime.datetime] = None
+        # (topic, cache_key) -> (version, updated_at) for rows seen within the lookback window
+        self._seen_versions: dict[tuple[str, str], tuple[int, datetime.datetime]] = {}
+
+    def connect(self):
+        connection = self.db_config.connect()
+        connection.autocommit = True
+        return connection
+
+    def send(self, topic: str, key: Hashable):
+        upsert_query = '''
+        INSERT INTO cache_version (topic, cache_key, sent_by)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE version = version + 1, sent_by = VALUES(sent_by)
+        '''
+        params = (topic, self.encode_key(key), self.sender_id)
+
+        with self._publish_lock:
+            # Retry once in case the server closed an idle connection
+            for attempt in range(2):
+                try:
+                    if not self._publish_connection or not self._publish_connection.is_connected():
+                        self._publish_connection = self.connect()
+                    cursor = self._publish_connection.cursor()
+                    cursor.execute(upsert_query, params)
+                    cursor.close()
+                    return
+                except Exception:
+                    self._close_quietly(self._publish_connection)
+                    self._publish_connection = None
+                    if attempt == 1:
+                        raise
+
+    def start(self):
+        if self._poller_thread:
+            return
+        self._poller_thread = threading.Thread(
+            target=self._poll_until_closed,
+            name="mysql-invalidation-bus",
+            daemon=True,
+        )
+        self._poller_thread.start()
+
+    def close(self):
+        self._closed.set()
+        if self._poller_thread:
+            self._poller_thread.join(timeout=5)
+        with self._publish_lock:
+            self._close_quietly(self._publish_connection)
+            self._publish_connection = None
+
+    def poll(self):
+        """
+        Dispatch every invalidation other processes published since the last poll.
+        """
+        if not self._poll_connection or not self._poll_connection.is_connected():
+            self._poll_connection = self.connect()
+        cursor = self._poll_connection.cursor()
+
+        cursor.execute("SELECT NOW(6)")
+        now, = cursor.fetchone()
+        if self._watermark is None:
+            # Nothing older than the bus can be cached yet
+            self._watermark = now
+
+        window_start = self._watermark - self.lookback
+        select_query = '''
+        SELECT cache_version.topic,
+            cache_version.cache_key,
+            cache_version.version,
+            cache_version.sent_by,
+            cache_version.updated_at
+        FROM cache_version
+        WHERE cache_version.updated_at >= %s
+        '''
+        cursor.execute(select_query, (window_start,))
+        rows = cursor.fetchall()
+        cursor.close()
+
+        for topic, cache_key, version, sent_by, updated_at in rows:
+            seen_version = self._seen_versions.get((topic, cache_key))
+            if seen_version and seen_version[0] == version:
+                continue
+            self._seen_versions[(topic, cache_key)] = (version, updated_at)
+
+            if sent_by != self.sender_id:
+                self.dispatch(topic, self.decode_key(cache_key))
+
+        self._watermark = now
+        self._seen_versions = {
+            row_key: seen_version
+            for row_key, seen_version in self._seen_versions.items()
+            if seen_version[1] >= now - self.lookback
+        }
+
+    def _poll_until_closed(self):
+        missed_invalidations = False
+        while not self._closed.wait(self.poll_seconds):
+            try:
+                self.poll()
+                if missed_invalidations:
+                    self.dispatch_clear()
+                    missed_invalidations = False
+            except Exception:
+                missed_invalidations = True
+                self._close_quietly(self._poll_connection)
+                self._poll_connection = None
+        self._close_quietly(self._poll_connection)
+
+    @staticmethod
+    def _close_quietly(connection):
+        if not connection:
+            return
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -0,0 +1,67 @@
+from typing import Callable, Optional
+
+from caches.content_versions import ContentVersions
+from caches.lru_cache import LRUCache
+from caches.singleflight import SingleFlight
+from models.page_navigation_link import PageNavigationLink
+
+
+class NavTreeCache:
+    """
+    Navigation link trees, one per course, stored with the course's
+    content version at the time they were built.
+
+    Bumping a course's content version makes its cached tree stale. A tree
+    built while a write was committing is stored under the version read
+    before building it, so it can never be served as current for the newer
+    version. Stale trees are still served while another request rebuilds them.
+    """
+
+    def __init__(self, max_entries: int = 256, singleflight_timeout_seconds: float = 5):
+        # course_id -> (content version, nav links)
+        self._trees = LRUCache(max_entries)
+        self._content_versions = ContentVersions()
+        self.singleflight = SingleFlight(singleflight_timeout_seconds)
+
+    @property
+    def stats(self):
+        return self._trees.stats
+
+    def content_version(self, course_id: int) -> int:
+        return self._content_versions.get(course_id)
+
+    def bump_content_version(self, course_id: int):
+        self._content_versions.bump(course_id)
+
+    def clear(self):
+        self._content_versions.bump_all()
+        self._trees.clear()
+
+    def get(self, course_id: int, content_version: int) -> Optional[list[PageNavigationLink]]:
+        entry = self._trees.get(course_id)
+        if entry is None or entry[0] != content_version:
+            return None
+        return entry[1]
+
+    def put(self, course_id: int, content_version: int, nav_links: list[PageNavigationLink]):
+        self._trees.put(course_id, (content_version, nav_links))
+
+    def get_or_build(
+        self,
+        course_id: int,
+        build: Callable[[], list[PageNavigationLink]]
+    ) -> list[PageNavigationLink]:
+        # Read the version first, so a tree built while a write commits
+        # gets cached under the old version, never the new one
+        content_version = self.content_version(course_id)
+        entry = self._trees.get(course_id)
+        if entry is not None and entry[0] == content_version:
+            return entry[1]
+
+        def build_and_put():
+            nav_links = build()
+            self.put(course_id, content_version, nav_links)
+            return nav_links
+
+        stale_nav_links = entry[1] if entry is not None else None
+        return self.singleflight.do((course_id, content_version), build_and_put, stale=stale_nav_links)
@@ -0,0 +1,58 @@
+from typing import Callable, Optional
+
+from caches.content_versions import ContentVersions
+from caches.lru_cache import LRUCache
+from caches.singleflight import SingleFlight
+from models.page import Page
+
+
+class PageCache:
+    """
+    Pages keyed by (course_id, url_path), stored with their course's
+    content version at the time they were fetched, like NavTreeCache.
+
+    Any page write in a course makes all of its cached pages stale. Stale
+    pages are still served while another request fetches the current one.
+    Missing pages aren't cached, and a page found missing is dropped.
+    """
+
+    def __init__(self, max_entries: int = 4096, singleflight_timeout_seconds: float = 5):
+        # (course_id, url_path) -> (content version, page)
+        self._pages = LRUCache(max_entries)
+        self._content_versions = ContentVersions()
+        self.singleflight = SingleFlight(singleflight_timeout_seconds)
+
+    @property
+    def stats(self):
+        return self._pages.stats
+
+    def content_version(self, course_id: int) -> int:
+        return self._content_versions.get(course_id)
+
+    def bump_content_version(self, course_id: int):
+        self._content_versions.bump(course_id)
+
+    def clear(self):
+        self._content_versions.bump_all()
+        self._pages.clear()
+
+    def put(self, page: Page, content_version: int):
+        self._pages.put((page.course_id, page.url_path_after_course_path), (content_version, page))
+
+    def get_or_fetch(self, course_id: int, url_path: str, fetch: Callable[[], Optional[Page]]) -> Optional[Page]:
+        content_version = self.content_version(course_id)
+        entry = self._pages.get((course_id, url_path))
+        if entry is not None and entry[0] == content_version:
+            return entry[1]
+
+        def fetch_and_put():
+            page = fetch()
+            if page:
+                self.put(page, content_version)
+            else:
+                # Deleted or moved, so later requests mustn't be served it as stale
+                self._pages.invalidate((course_id, url_path))
+            return page
+
+        stale_page = entry[1] if entry is not None else None
+        return self.singleflight.do((course_id, url_path, content_version), fetch_and_put, stale=stale_page)
@@ -0,0 +1,165 @@
+import socket
+import threading
+import urllib.parse
+from typing import Hashable, Optional
+
+from caches.invalidation_bus import InvalidationBus
+
+DEFAULT_CHANNEL = "cache_invalidation"
+
+
+class RespConnection:
+    """
+    Just enough of the Redis protocol (RESP2) to AUTH, PUBLISH and SUBSCRIBE,
+    so the bus doesn't need a Redis client library.
+    """
+
+    def __init__(self, host: str, port: int, password: Optional[str] = None, timeout: Optional[float] = 5):
+        self.socket = socket.create_connection((host, port), timeout=timeout)
+        self.reader = self.socket.makefile("rb")
+        if password:
+            self.execute("AUTH", password)
+
+    def send_command(self, *args: str | bytes):
+        encoded_args = [arg if isinstance(arg, bytes) else str(arg).encode() for arg in args]
+        command = b"*%d\r\n" % len(encoded_args)
+        for arg in encoded_args:
+            command += b"$%d\r\n%s\r\n" % (len(arg), arg)
+        self.socket.sendall(command)
+
+    def read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+
+        reply_type, payload = line[:1], line[1:-2]
+        if reply_type == b"+":
+            return payload.decode()
+        elif reply_type == b"-":
+            raise ConnectionError(f"Server returned an error: {payload.decode()}")
+        elif reply_type == b":":
+            return int(payload)
+        elif reply_type == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        elif reply_type == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self.read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply: {line!r}")
+
+    def execute(self, *args: str | bytes):
+        self.send_command(*args)
+        return self.read_reply()
+
+    def set_timeout(self, timeout: Optional[float]):
+        self.socket.settimeout(timeout)
+
+    def close(self):
+        # Shut down first, so a thread blocked reading from the socket
+        # wakes up instead of holding the socket open
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
+
+
+class RedisInvalidationBus(InvalidationBus):
+    """
+    Sends invalidations over a Redis (or Redis-protocol compatible) pub/sub
+    channel.
+
+    Pub/sub doesn't keep messages for subscribers that are disconnected, so
+    every cache is cleared after the subscriber reconnects.
+    """
+
+    def __init__(self, redis_url: str, channel: str = DEFAULT_CHANNEL, reconnect_delay_seconds: float = 1):
+        """
+        :param redis_url: redis://[:password@]host[:port]
+        """
+        super().__init__()
+        parsed_url = urllib.parse.urlparse(redis_url)
+        self.host = parsed_url.hostname or "localhost"
+        self.port = parsed_url.port or 6379
+        self.password = parsed_url.password
+        self.channel = channel
+        self.reconnect_delay_seconds = reconnect_delay_seconds
+
+        self._publish_connection: Optional[RespConnection] = None
+        self._publish_lock = threading.Lock()
+        self._subscribe_connection: Optional[RespConnection] = None
+        self._subscriber_thread: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+        # Set once the subscriber thread is listening, mainly for tests
+        self.subscribed = threading.Event()
+
+    def send(self, topic: str, key: Hashable):
+        message = self.encode_message(topic, key)
+        with self._publish_lock:
+            # Retry once in case the server closed an idle connection
+            for attempt in range(2):
+                try:
+                    if not self._publish_connection:
+                        self._publish_connection = RespConnection(self.host, self.port, self.password)
+                    self._publish_connection.execute("PUBLISH", self.channel, message)
+                    return
+                except OSError:
+                    if self._publish_connection:
+                        self._publish_connection.close()
+                        self._publish_connection = None
+                    if attempt == 1:
+                        raise
+
+    def start(self):
+        if self._subscriber_thread:
+            return
+        self._subscriber_thread = threading.Thread(
+            target=self._listen,
+            name="redis-invalidation-bus",
+            daemon=True,
+        )
+        self._subscriber_thread.start()
+
+    def close(self):
+        self._closed.set()
+        if self._subscribe_connection:
+            self._subscribe_connection.close()
+        with self._publish_lock:
+            if self._publish_connection:
+                self._publish_connection.close()
+                self._publish_connection = None
+        if self._subscriber_thread:
+            self._subscriber_thread.join(timeout=5)
+
+    def _listen(self):
+        has_subscribed_before = False
+        while not self._closed.is_set():
+            try:
+                self._subscribe_connection = RespConnection(self.host, self.port, self.password)
+                self._subscribe_connection.execute("SUBSCRIBE", self.channel)
+                self._subscribe_connection.set_timeout(None)
+
+                # Anything published while disconnected is lost
+                if has_subscribed_before:
+                    self.dispatch_clear()
+                has_subscribed_before = True
+                self.subscribed.set()
+
+                while not self._closed.is_set():
+                    reply = self._subscribe_connection.read_reply()
+                    if not isinstance(reply, list) or len(reply) != 3 or reply[0] != b"message":
+                        continue
+                    decoded_message = self.decode_message(reply[2])
+                    if decoded_message:
+                        self.dispatch(*decoded_message)
+            except (OSError, ValueError):
+                self.subscribed.clear()
+                if self._subscribe_connection:
+                    self._subscribe_connection.close()
+                    self._subscribe_connection = None
+                self._closed.wait(self.reconnect_delay_seconds)
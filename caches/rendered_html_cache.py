@@ -0,0 +1,75 @@
+import hashlib
+from typing import Callable, Optional
+
+from caches.lru_cache import LRUCache
+from caches.singleflight import SingleFlight
+from models.page import Page
+
+
+class RenderedHtmlCache:
+    """
+    Rendered page HTML keyed by (page_id, content hash, course starting URL path).
+
+    The content hash means an edited page never gets its old HTML, even
+    before its entries are invalidated, and the starting URL path is part
+    of the key because relative links are rewritten against it.
+    Invalidating a page just frees its entries early.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        max_entries: int = 4096,
+        singleflight_timeout_seconds: float = 5,
+    ):
+        self._html = LRUCache(max_entries, max_bytes=max_bytes)
+        self.singleflight = SingleFlight(singleflight_timeout_seconds)
+
+    @property
+    def stats(self):
+        return self._html.stats
+
+    @property
+    def total_bytes(self) -> int:
+        return self._html.total_bytes
+
+    @staticmethod
+    def content_hash(page_content: str) -> str:
+        return hashlib.sha256(page_content.encode()).hexdigest()
+
+    def get(self, page: Page, starting_url_path: str) -> Optional[str]:
+        return self._html.get(self._key(page, starting_url_path))
+
+    def put(self, page: Page, starting_url_path: str, page_html: str):
+        self._html.put(self._key(page, starting_url_path), page_html)
+
+    def get_or_render(
+        self,
+        page: Page,
+        starting_url_path: str,
+        render: Callable[[], str],
+        stale_html: Optional[str] = None,
+    ) -> str:
+        """
+        :param stale_html: served instead of waiting while another request renders the page
+        """
+        key = self._key(page, starting_url_path)
+        page_html = self._html.get(key)
+        if page_html is not None:
+            return page_html
+
+        def render_and_put():
+            rendered_html = render()
+            self._html.put(key, rendered_html)
+            return rendered_html
+
+        return self.singleflight.do(key, render_and_put, stale=stale_html)
+
+    def clear(self):
+        self._html.clear()
+
+    def invalidate_page(self, page_id: int):
+        self._html.invalidate_matching(lambda key, _: key[0] == page_id)
+
+    def _key(self, page: Page, starting_url_path: str) -> tuple[int, str, str]:
+        return page.page_id, self.content_hash(page.page_content), starting_url_path
@@ -0,0 +1,75 @@
+import threading
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    # Calls that ran the computation for everyone
+    leaders: int = 0
+    # Calls that waited for a leader, including ones that then fell back
+    waited: int = 0
+    # Calls that got a stale value instead of waiting
+    stale_served: int = 0
+    # Calls that ran the computation themselves because the leader was too slow or failed
+    fallbacks: int = 0
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+
+
+class SingleFlight:
+    """
+    Runs one computation per key at a time, so when a hot cache entry is
+    missing, concurrent requests share one rebuild instead of all running
+    the same queries at once.
+
+    While a key's computation is running, other calls for it return their
+    `stale` value if they have one (stale-while-revalidate), and otherwise
+    wait for its result. A caller that waits longer than `timeout_seconds`,
+    or whose leader raises, runs the computation itself.
+    """
+
+    def __init__(self, timeout_seconds: float = 5):
+        self.timeout_seconds = timeout_seconds
+        self.stats = SingleFlightStats()
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, compute: Callable[[], T], stale: Optional[T] = None) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+                self.stats.leaders += 1
+            elif stale is not None:
+                self.stats.stale_served += 1
+                return stale
+            else:
+                self.stats.waited += 1
+
+        if is_leader:
+            try:
+                call.result = compute()
+                return call.result
+            except BaseException:
+                call.failed = True
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.done.wait(self.timeout_seconds) and not call.failed:
+            return call.result
+
+        with self._lock:
+            self.stats.fallbacks += 1
+        return compute()
@@ -0,0 +1,34 @@
+from typing import Optional
+
+from caches.lru_cache import LRUCache
+from models.user import User
+
+
+class UserSessionCache:
+    """
+    Signed-in users keyed by user_uuid, so requests don't have to look
+    up the user behind their session every time.
+
+    Entries expire after `ttl_seconds`, which bounds how long another app
+    process can keep serving a user after their sessions were revoked.
+    This process invalidates its own entries as soon as it revokes them.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 30):
+        self._users = LRUCache(max_entries, ttl_seconds=ttl_seconds)
+
+    @property
+    def stats(self):
+        return self._users.stats
+
+    def get(self, user_uuid: str) -> Optional[User]:
+        return self._users.get(user_uuid)
+
+    def put(self, user: User):
+        self._users.put(user.user_uuid, user)
+
+    def clear(self):
+        self._users.clear()
+
+    def invalidate_user_id(self, user_id: int):
+        self._users.invalidate_matching(lambda _, user: user.user_id == user_id)
@@ -0,0 +1,18 @@
+import click
+from flask import current_app
+
+from datarepos.content_repo import ContentRepo
+
+
+@click.command("rerender-pages")
+@click.option("--all", "rerender_all", is_flag=True, help="Re-render pages whose stored HTML is already current.")
+def rerender_pages_command(rerender_all: bool):
+    """Render and store the HTML of every page with outdated stored HTML."""
+    connection = current_app.config["DB_CONFIG_OBJECT"].connect()
+    try:
+        content_repo = ContentRepo(connection)
+        rendered_page_count = content_repo.rerender_stale_pages(rerender_all)
+    finally:
+        connection.close()
+
+    click.echo(f"Rendered {rendered_page_count} page(s).")
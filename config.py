@@ -11,5 +11,56 @@ DATABASE_USER = os.environ.get("DATABASE_USER")
 DATABASE_PASSWORD = os.environ.get("DATABASE_PASSWORD")
 DATABASE_SCHEMA_NAME = os.environ.get("DATABASE_SCHEMA_NAME")
 
-TEST_CONTAINER_IMAGE = "mysql:9.0.1"
+# Optional comma-separated list of read replicas, e.g. "replica-1:3306,replica-2:3306".
+# Replicas use the same user, password and schema name as the primary.
+DATABASE_REPLICA_HOSTS = [
+    host.strip()
+    for host in (os.environ.get("DATABASE_REPLICA_HOSTS") or "").split(",")
+    if host.strip()
+]
+
+# After a user writes something, their reads go to the primary for this long,
+# so they see their own changes even if the replicas are behind
+DATABASE_READ_YOUR_WRITES_SECONDS = float(os.environ.get("DATABASE_READ_YOUR_WRITES_SECONDS") or 5)
+
+# Connection pool settings, see db_connection_pool.py
+DATABASE_POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE") or 5)
+DATABASE_POOL_MAX_OVERFLOW = int(os.environ.get("DATABASE_POOL_MAX_OVERFLOW") or 10)
+DATABASE_POOL_CHECKOUT_TIMEOUT_SECONDS = float(os.environ.get("DATABASE_POOL_CHECKOUT_TIMEOUT_SECONDS") or 30)
+DATABASE_POOL_PRE_PING = (os.environ.get("DATABASE_POOL_PRE_PING") or "true").lower() == "true"
+DATABASE_POOL_RECYCLE_SECONDS = float(os.environ.get("DATABASE_POOL_RECYCLE_SECONDS") or 3600)
+
+# Number of server-side prepared statements kept per pooled connection.
+# Off by default: the connector resets the statement before every execution,
+# which costs one extra round trip per query in exchange for skipping the parse.
+DATABASE_PREPARED_STATEMENT_CACHE_SIZE = int(os.environ.get("DATABASE_PREPARED_STATEMENT_CACHE_SIZE") or 0)
 
+# In-process caches, see the caches package
+CACHING_ENABLED = (os.environ.get("CACHING_ENABLED") or "true").lower() == "true"
+NAV_TREE_CACHE_MAX_ENTRIES = int(os.environ.get("NAV_TREE_CACHE_MAX_ENTRIES") or 256)
+RENDERED_HTML_CACHE_MAX_BYTES = int(os.environ.get("RENDERED_HTML_CACHE_MAX_BYTES") or 32 * 1024 * 1024)
+PAGE_CACHE_MAX_ENTRIES = int(os.environ.get("PAGE_CACHE_MAX_ENTRIES") or 4096)
+# How long a request waits for another request to rebuild the same cache entry before doing it itself
+CACHE_SINGLEFLIGHT_TIMEOUT_SECONDS = float(os.environ.get("CACHE_SINGLEFLIGHT_TIMEOUT_SECONDS") or 5)
+# Also how long other app processes may keep a user signed in after their sessions are revoked
+USER_SESSION_CACHE_TTL_SECONDS = float(os.environ.get("USER_SESSION_CACHE_TTL_SECONDS") or 30)
+COURSE_ENROLLMENT_CACHE_TTL_SECONDS = float(os.environ.get("COURSE_ENROLLMENT_CACHE_TTL_SECONDS") or 60)
+
+# How writes evict cached data in the other app processes: "local" (only one process),
+# "redis" (pub/sub at INVALIDATION_BUS_REDIS_URL) or "mysql" (polls the cache_version table)
+INVALIDATION_BUS_BACKEND = os.environ.get("INVALIDATION_BUS_BACKEND") or "local"
+INVALIDATION_BUS_REDIS_URL = os.environ.get("INVALIDATION_BUS_REDIS_URL") or "redis://localhost:6379"
+INVALIDATION_BUS_POLL_SECONDS = float(os.environ.get("INVALIDATION_BUS_POLL_SECONDS") or 1)
+
+# Rows fetched from MySQL at a time while streaming exports
+EXPORT_FETCH_BATCH_SIZE = int(os.environ.get("EXPORT_FETCH_BATCH_SIZE") or 1000)
+# Connections used to export tables in parallel
+EXPORT_WORKER_COUNT = int(os.environ.get("EXPORT_WORKER_COUNT") or 4)
+# Export jobs the admin app runs at once
+EXPORT_JOB_WORKER_COUNT = int(os.environ.get("EXPORT_JOB_WORKER_COUNT") or 2)
+# How often running export jobs save their progress and check for cancellation
+EXPORT_JOB_PROGRESS_INTERVAL_SECONDS = float(os.environ.get("EXPORT_JOB_PROGRESS_INTERVAL_SECONDS") or 1)
+# Export jobs that haven't saved progress for this long are assumed dead
+EXPORT_JOB_STALE_SECONDS = float(os.environ.get("EXPORT_JOB_STALE_SECONDS") or 600)
+
+TEST_CONTAINER_IMAGE = "mysql:9.0.1"
@@ -0,0 +1,34 @@
+import csv
+import io
+from typing import Iterable, Iterator, Optional
+
+# Rows written into each chunk of a streamed CSV download
+CSV_ROWS_PER_CHUNK = 1000
+
+
+def generate_csv_chunks(
+    rows: Iterable[tuple],
+    header: Optional[list[str]] = None,
+    rows_per_chunk: int = CSV_ROWS_PER_CHUNK,
+) -> Iterator[str]:
+    """
+    Turn rows into CSV text, `rows_per_chunk` rows at a time, for a
+    streamed HTTP response.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(header)
+
+    rows_in_buffer = 0
+    for row in rows:
+        writer.writerow(row)
+        rows_in_buffer += 1
+        if rows_in_buffer == rows_per_chunk:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows_in_buffer = 0
+
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -13,3 +13,6 @@ class DependencyException(Exception):
 class InvalidPathException(Exception):
     pass
 
+
+class CancelledException(Exception):
+    pass
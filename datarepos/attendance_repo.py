@@ -1,5 +1,7 @@
 from datetime import datetime
 
+from mysql.connector import IntegrityError
+
 from custom_exceptions import NotFoundException
 from datarepos.repo import Repo
 from models.attendance_record import AttendanceRecordStatus, AttendanceRecord
@@ -9,6 +11,9 @@ from models.course_enrollment import Role
 
 
 class AttendanceRepo(Repo):
+    # Rows per multi-row upsert or delete, to keep statements a reasonable size
+    BULK_UPDATE_BATCH_SIZE = 500
+
     def start_new_attendance_session_and_get_id(self, course_id: int):
         date_format_string = '%Y.%m.%d %H:%M'
 
@@ -21,8 +26,7 @@ class AttendanceRepo(Repo):
         )
 
         cursor = self.connection.cursor()
-        try:
-
+        with self.unit_of_work.transaction():
             insert_new_session_query = '''
             INSERT INTO attendance_session (course_id, opening_time, closing_time, title)
             VALUES (%s, %s, %s, %s)
@@ -35,36 +39,10 @@ class AttendanceRepo(Repo):
             )
             cursor.execute(insert_new_session_query, params)
 
+            # No records are created, since students without one count as NONE
             attendance_session_id = cursor.lastrowid
 
-            select_student_enrollments_query = '''
-            SELECT enrollment.user_id
-            FROM enrollment
-            WHERE enrollment.course_id = %s
-                AND enrollment.role = %s
-            '''
-            params = (course_id, Role.STUDENT.value)
-
-            cursor.execute(select_student_enrollments_query, params)
-            student_enrollment_results = cursor.fetchall()
-
-            insert_record_query = '''
-            INSERT INTO attendance_record (user_id, attendance_session_id, attendance_status) 
-            VALUES (%s, %s, %s)
-            '''
-            insert_record_params = [
-                (user_id, attendance_session_id, AttendanceRecordStatus.NONE.value)
-                for user_id, in student_enrollment_results
-            ]
-
-            cursor.executemany(insert_record_query, insert_record_params)
-            self.connection.commit()
-
-            return attendance_session_id
-
-        except Exception as e:
-            self.connection.rollback()
-            raise e
+        return attendance_session_id
 
     def close_in_progress_session(self, attendance_session_id: int):
         update_query = '''
@@ -78,37 +56,24 @@ class AttendanceRepo(Repo):
             attendance_session_id,
         )
 
-        precheck_query = '''
-        SELECT COUNT(*)
-        FROM attendance_session ats
-        WHERE ats.attendance_session_id = %s
-            AND ats.closing_time IS NULL
-        '''
-        precheck_params = (attendance_session_id,)
-
-        self.execute_dml_query(update_query, params, precheck_query, precheck_params)
+        self.execute_dml_query(update_query, params, raise_if_not_found=True)
 
     def delete_attendance_session_and_records(self, attendance_session_id: int):
-        delete_session_query = '''
-        DELETE FROM attendance_session ats
-        WHERE ats.attendance_session_id = %s
-        '''
-        delete_records_query = '''
-        DELETE FROM attendance_record atr
-        WHERE atr.attendance_session_id = %s
-        '''
         params = (attendance_session_id,)
-        try:
-            cursor = self.connection.cursor()
-            cursor.execute(delete_records_query, params)
-            cursor.execute(delete_session_query, params)
-
-            if cursor.rowcount < 1:
-                raise NotFoundException
-            self.connection.commit()
-        except Exception as e:
-            self.connection.rollback()
-            raise e
+        with self.unit_of_work.transaction():
+            self.execute_delete_query(
+                'attendance_record',
+                ('user_id', 'attendance_session_id'),
+                'attendance_record.attendance_session_id = %s',
+                params,
+            )
+            self.execute_delete_query(
+                'attendance_session',
+                ('attendance_session_id',),
+                'attendance_session.attendance_session_id = %s',
+                params,
+                raise_if_not_found=True,
+            )
 
 
     def edit_attendance_session_title(self, attendance_session_id: int, new_title: str):
@@ -116,47 +81,95 @@ class AttendanceRepo(Repo):
         UPDATE attendance_session ats
         SET ats.title = %s
         WHERE ats.attendance_session_id = %s
+            AND ats.closing_time IS NULL
         '''
         params = (
             new_title,
             attendance_session_id,
         )
 
-        precheck_query = '''
-        SELECT COUNT(*)
-        FROM attendance_session ats
-        WHERE ats.attendance_session_id = %s
-            AND ats.closing_time IS NULL
-        '''
-        precheck_params = (attendance_session_id,)
-
-        self.execute_dml_query(update_query, params, precheck_query, precheck_params)
+        self.execute_dml_query(update_query, params, raise_if_not_found=True)
 
     def update_status_by_attendance_session_and_user_id(self, attendance_record: AttendanceRecord):
-        update_query = '''
-        UPDATE attendance_record atr
-        SET atr.attendance_status = %s
-        WHERE atr.attendance_session_id = %s
-            AND atr.user_id = %s
-        '''
-        params = (
-            attendance_record.attendance_status.value,
-            attendance_record.attendance_session_id,
-            attendance_record.user_id,
-        )
+        self.save_statuses(attendance_record.attendance_session_id, [
+            (attendance_record.user_id, attendance_record.attendance_status),
+        ])
+
+    def update_changed_statuses_by_attendance_session_id(
+        self,
+        attendance_session_id: int,
+        submitted_records: list[AttendanceRecord],
+        loaded_records: list[AttendanceRecord],
+    ) -> int:
+        """
+        Save every submitted status that differs from the loaded records,
+        in one transaction.
+
+        :param loaded_records: the session's current records, read from the
+        primary so that no change is skipped for matching a stale status
+        :return: the number of records saved
+        :raises NotFoundException listing every submitted user_id that isn't in
+        the loaded records, in which case nothing is saved
+        """
+        loaded_statuses = {record.user_id: record.attendance_status for record in loaded_records}
+
+        missing_user_ids = [record.user_id for record in submitted_records if record.user_id not in loaded_statuses]
+        if missing_user_ids:
+            raise NotFoundException(
+                f"No attendance records in session {attendance_session_id} for user_ids {missing_user_ids}"
+            )
 
-        precheck_query = '''
-        SELECT COUNT(*)
-        FROM attendance_record atr
-        WHERE atr.attendance_session_id = %s
-            AND atr.user_id = %s
-        '''
-        precheck_params = (
-            attendance_record.attendance_session_id,
-            attendance_record.user_id
-        )
+        changed_statuses = [
+            (record.user_id, record.attendance_status)
+            for record in submitted_records
+            if record.attendance_status != loaded_statuses[record.user_id]
+        ]
+        self.save_statuses(attendance_session_id, changed_statuses)
+        return len(changed_statuses)
+
+    def save_statuses(self, attendance_session_id: int, statuses: list[tuple[int, AttendanceRecordStatus]]):
+        """
+        Upsert (user_id, status) pairs into a session, with one multi-row
+        statement per BULK_UPDATE_BATCH_SIZE pairs. Records are sparse: NONE
+        is saved by deleting the user's row.
+
+        :raises NotFoundException if the session or one of the users doesn't exist
+        """
+        upserted_statuses = [(user_id, status) for user_id, status in statuses if status != AttendanceRecordStatus.NONE]
+        deleted_user_ids = [user_id for user_id, status in statuses if status == AttendanceRecordStatus.NONE]
 
-        self.execute_dml_query(update_query, params, precheck_query, precheck_params)
+        cursor = self.connection.cursor()
+        try:
+            with self.unit_of_work.transaction():
+                for batch_start in range(0, len(upserted_statuses), self.BULK_UPDATE_BATCH_SIZE):
+                    batch = upserted_statuses[batch_start:batch_start + self.BULK_UPDATE_BATCH_SIZE]
+
+                    upsert_query = f'''
+                    INSERT INTO attendance_record (user_id, attendance_session_id, attendance_status)
+                    VALUES {", ".join(["(%s, %s, %s)"] * len(batch))} AS submitted
+                    ON DUPLICATE KEY UPDATE attendance_status = submitted.attendance_status
+                    '''
+                    params = tuple(
+                        value
+                        for user_id, status in batch
+                        for value in (user_id, attendance_session_id, status.value)
+                    )
+                    cursor.execute(upsert_query, params)
+
+                for batch_start in range(0, len(deleted_user_ids), self.BULK_UPDATE_BATCH_SIZE):
+                    batch = deleted_user_ids[batch_start:batch_start + self.BULK_UPDATE_BATCH_SIZE]
+
+                    self.execute_delete_query(
+                        'attendance_record',
+                        ('user_id', 'attendance_session_id'),
+                        f'''attendance_record.attendance_session_id = %s
+                            AND attendance_record.user_id IN ({", ".join(["%s"] * len(batch))})''',
+                        (attendance_session_id, *batch),
+                    )
+        except IntegrityError as e:
+            if e.errno == self.MYSQL_FOREIGN_KEY_MISSING_PARENT_EXCEPTION_CODE:
+                raise NotFoundException(f"Attendance session {attendance_session_id} or one of its users doesn't exist")
+            raise e
 
     def get_attendance_session_from_id(self, attendance_session_id: int):
         select_query = '''
@@ -166,7 +179,7 @@ class AttendanceRepo(Repo):
         '''
         params = (attendance_session_id,)
 
-        cursor = self.connection.cursor(dictionary=True)
+        cursor = self.read_connection.cursor(dictionary=True)
         cursor.execute(select_query, params)
         result = cursor.fetchone()
 
@@ -184,7 +197,7 @@ class AttendanceRepo(Repo):
         '''
         params = (course_id,)
 
-        cursor = self.connection.cursor(dictionary=True)
+        cursor = self.read_connection.cursor(dictionary=True)
         cursor.execute(select_query, params)
         results = cursor.fetchall()
 
@@ -200,26 +213,58 @@ class AttendanceRepo(Repo):
         '''
         params = (course_id,)
 
-        cursor = self.connection.cursor(dictionary=True)
+        cursor = self.read_connection.cursor(dictionary=True)
         cursor.execute(select_query, params)
         results = cursor.fetchall()
 
         return [AttendanceSession(**result) for result in results]
 
     def get_student_attendance_records_with_names_from_session_id(self, attendance_session_id: int):
+        """
+        Get a record for every student enrolled in the session's course,
+        NONE unless one was saved, along with the saved records of users
+        who are no longer enrolled as students.
+        """
         select_query = '''
+        SELECT enrollment.user_id,
+            ats.attendance_session_id,
+            COALESCE(atr.attendance_status, %s) AS attendance_status,
+            user.full_name
+        FROM attendance_session ats
+        INNER JOIN enrollment
+            ON enrollment.course_id = ats.course_id
+            AND enrollment.role = %s
+        INNER JOIN user
+            ON user.user_id = enrollment.user_id
+        LEFT JOIN attendance_record atr
+            ON atr.attendance_session_id = ats.attendance_session_id
+            AND atr.user_id = enrollment.user_id
+        WHERE ats.attendance_session_id = %s
+        UNION ALL
         SELECT atr.user_id, atr.attendance_session_id, atr.attendance_status, user.full_name
         FROM attendance_record atr
+        INNER JOIN attendance_session ats
+            ON ats.attendance_session_id = atr.attendance_session_id
         INNER JOIN user
             ON user.user_id = atr.user_id
-        WHERE attendance_session_id = %s
-        ORDER BY user.full_name ASC;
+        LEFT JOIN enrollment
+            ON enrollment.course_id = ats.course_id
+            AND enrollment.user_id = atr.user_id
+            AND enrollment.role = %s
+        WHERE atr.attendance_session_id = %s
+            AND enrollment.user_id IS NULL
+        ORDER BY full_name ASC;
         '''
-        params = (attendance_session_id,)
+        params = (
+            AttendanceRecordStatus.NONE.value,
+            Role.STUDENT.value,
+            attendance_session_id,
+            Role.STUDENT.value,
+            attendance_session_id,
+        )
 
-        cursor = self.connection.cursor(dictionary=True)
+        cursor = self.read_connection.cursor(dictionary=True)
         cursor.execute(select_query, params)
         results = cursor.fetchall()
 
         return [AttendanceRecordWithName(**result) for result in results]
-
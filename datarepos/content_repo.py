@@ -1,19 +1,87 @@
-from collections import deque
 from typing import Optional
 
-from mysql.connector import IntegrityError
-
+from caches.invalidation_bus import InvalidationBus, COURSE_CONTENT_TOPIC, RENDERED_HTML_TOPIC
+from caches.nav_tree_cache import NavTreeCache
 from custom_exceptions import AlreadyExistsException
 from datarepos.repo import Repo
+from datarepos.unit_of_work import UnitOfWork
 from models.page import Page, VisibilitySetting
 from models.page_navigation_link import PageNavigationLink
+from page_renderer import RENDERER_VERSION, render_page_html
 
 
 class ContentRepo(Repo):
+    def __init__(
+        self,
+        connection = None,
+        unit_of_work: Optional[UnitOfWork] = None,
+        nav_tree_cache: Optional[NavTreeCache] = None,
+        invalidation_bus: Optional[InvalidationBus] = None,
+    ):
+        super().__init__(connection, unit_of_work, invalidation_bus)
+        self.nav_tree_cache = nav_tree_cache
+
+    def bump_content_version_after_commit(self, *course_ids: int):
+        for course_id in set(course_ids):
+            self.publish_invalidation_after_commit(COURSE_CONTENT_TOPIC, course_id)
+
+    def invalidate_rendered_html_after_commit(self, page_id: int):
+        self.publish_invalidation_after_commit(RENDERED_HTML_TOPIC, page_id)
+
+    def get_course_id_for_page_id_if_exists(self, page_id: int) -> Optional[int]:
+        # Read from the primary, since this is only used right before writes
+        get_course_id_query = '''
+        SELECT page.course_id
+        FROM page
+        WHERE page.page_id = %s;
+        '''
+        params = (page_id,)
+
+        cursor = self.connection.cursor()
+        cursor.execute(get_course_id_query, params)
+        result = cursor.fetchone()
+
+        if not result:
+            return None
+
+        course_id, = result
+        return course_id
+
+    def get_starting_url_path_for_course_id_if_exists(self, course_id: int) -> Optional[str]:
+        # Read from the primary, since this is only used right before writes
+        get_starting_url_path_query = '''
+        SELECT course.starting_url_path
+        FROM course
+        WHERE course.course_id = %s;
+        '''
+        params = (course_id,)
+
+        cursor = self.connection.cursor()
+        cursor.execute(get_starting_url_path_query, params)
+        result = cursor.fetchone()
+
+        if not result:
+            return None
+
+        starting_url_path, = result
+        return starting_url_path
+
+    def render_page_html_for_write(self, page: Page):
+        # A missing course is left for the write itself to report
+        starting_url_path = self.get_starting_url_path_for_course_id_if_exists(page.course_id)
+        if starting_url_path is None:
+            return
+
+        page.page_html = render_page_html(page.page_content, starting_url_path)
+        page.page_html_renderer_version = RENDERER_VERSION
+        page.page_html_starting_url_path = starting_url_path
+
     def add_new_page_and_get_id(self, page: Page) -> int:
         if page.page_id:
             raise AlreadyExistsException
 
+        self.render_page_html_for_write(page)
+
         insert_page_query = '''
         INSERT INTO page (
             page_visibility_setting,
@@ -21,9 +89,14 @@ class ContentRepo(Repo):
             page_title,
             url_path_after_course_path,
             course_id,
-            created_by_user_id
+            created_by_user_id,
+            depth,
+            parent_path,
+            page_html,
+            page_html_renderer_version,
+            page_html_starting_url_path
         ) 
-        VALUES (%s, %s, %s, %s, %s, %s);
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
         '''
         params = (
             page.page_visibility_setting.value,
@@ -31,10 +104,16 @@ class ContentRepo(Repo):
             page.page_title,
             page.url_path_after_course_path,
             page.course_id,
-            page.created_by_user_id
+            page.created_by_user_id,
+            page.depth,
+            page.parent_path,
+            page.page_html,
+            page.page_html_renderer_version,
+            page.page_html_starting_url_path
         )
 
         page_id = self.insert_single_entry_into_db_and_return_id(insert_page_query, params)
+        self.bump_content_version_after_commit(page.course_id)
         return page_id
 
     def update_page_by_id(self, page: Page):
@@ -46,9 +125,15 @@ class ContentRepo(Repo):
             page.course_id = %s,
             page.created_by_user_id = %s,
             page.page_content = %s,
-            page.page_title = %s
+            page.page_title = %s,
+            page.depth = %s,
+            page.parent_path = %s,
+            page.page_html = %s,
+            page.page_html_renderer_version = %s,
+            page.page_html_starting_url_path = %s
         WHERE page.page_id = %s;
         '''
+        self.render_page_html_for_write(page)
         params = (
             page.page_visibility_setting.value,
             page.url_path_after_course_path,
@@ -56,47 +141,125 @@ class ContentRepo(Repo):
             page.created_by_user_id,
             page.page_content,
             page.page_title,
+            page.depth,
+            page.parent_path,
+            page.page_html,
+            page.page_html_renderer_version,
+            page.page_html_starting_url_path,
             page.page_id,
         )
 
-        precheck_query = '''
-        SELECT COUNT(*)
+        # The page may be moving out of another course, whose tree changes too
+        previous_course_id = self.get_course_id_for_page_id_if_exists(page.page_id) \
+            if self.invalidation_bus else None
+
+        self.execute_dml_query(update_query, params, raise_if_not_found=True)
+        self.bump_content_version_after_commit(page.course_id, previous_course_id or page.course_id)
+        self.invalidate_rendered_html_after_commit(page.page_id)
+
+    def store_rendered_page_html(self, page: Page, starting_url_path: str, page_html: str):
+        """
+        Save HTML rendered on read, so later reads can use it. Skipped if the
+        page's content changed since `page` was read, so HTML rendered from
+        old content never overwrites HTML rendered by the newer write, and
+        if another request already stored HTML from this renderer.
+        """
+        store_html_query = '''
+        UPDATE page
+        SET
+            page.page_html = %s,
+            page.page_html_renderer_version = %s,
+            page.page_html_starting_url_path = %s,
+            -- The page itself hasn't changed, so neither does its version
+            page.updated_at = page.updated_at
+        WHERE page.page_id = %s
+            -- Compared as bytes, since the column's collation ignores case and accents
+            AND CAST(page.page_content AS BINARY) = CAST(%s AS BINARY)
+            AND NOT (page.page_html_renderer_version <=> %s AND page.page_html_starting_url_path <=> %s);
+        '''
+        params = (
+            page_html,
+            RENDERER_VERSION,
+            starting_url_path,
+            page.page_id,
+            page.page_content,
+            RENDERER_VERSION,
+            starting_url_path,
+        )
+
+        self.execute_dml_query(store_html_query, params)
+
+    def rerender_stale_pages(self, rerender_all: bool = False, batch_size: int = 100) -> int:
+        """
+        Render every page whose stored HTML is missing, from an older renderer,
+        or for an old course path, committing once per batch.
+
+        :param rerender_all: re-render pages with current HTML as well
+        :return: the number of pages rendered
+        """
+        select_stale_pages_query = '''
+        SELECT
+            page.page_id,
+            page.page_content,
+            course.starting_url_path
         FROM page
-        WHERE page.page_id = %s;
+        INNER JOIN course ON page.course_id = course.course_id
+        WHERE page.page_id > %s
+            AND (%s
+                OR page.page_html IS NULL
+                OR NOT (page.page_html_renderer_version <=> %s)
+                OR NOT (page.page_html_starting_url_path <=> course.starting_url_path))
+        ORDER BY page.page_id ASC
+        LIMIT %s;
+        '''
+        update_html_query = '''
+        UPDATE page
+        SET
+            page.page_html = %s,
+            page.page_html_renderer_version = %s,
+            page.page_html_starting_url_path = %s,
+            -- The page itself hasn't changed, so neither does its version
+            page.updated_at = page.updated_at
+        WHERE page.page_id = %s AND CAST(page.page_content AS BINARY) = CAST(%s AS BINARY);
         '''
-        precheck_params = (page.page_id,)
 
-        self.execute_dml_query(update_query, params, precheck_query, precheck_params)
+        rendered_page_count = 0
+        last_page_id = 0
+        while True:
+            with self.unit_of_work.transaction():
+                cursor = self.connection.cursor()
+                cursor.execute(select_stale_pages_query, (last_page_id, rerender_all, RENDERER_VERSION, batch_size))
+                results = cursor.fetchall()
+
+                for page_id, page_content, starting_url_path in results:
+                    page_html = render_page_html(page_content, starting_url_path)
+                    cursor.execute(
+                        update_html_query,
+                        (page_html, RENDERER_VERSION, starting_url_path, page_id, page_content),
+                    )
+
+            rendered_page_count += len(results)
+            if len(results) < batch_size:
+                return rendered_page_count
+            last_page_id = results[-1][0]
 
     def delete_page_by_id(self, page_id: int):
-        delete_query = '''
-        DELETE FROM page
-        WHERE page.page_id = %s;
-        '''
         params = (page_id,)
 
-        precheck_query = '''
-        SELECT COUNT(*)
-        FROM page
-        WHERE page.page_id = %s;
-        '''
+        course_id = self.get_course_id_for_page_id_if_exists(page_id) \
+            if self.invalidation_bus else None
 
-        self.execute_dml_query(delete_query, params, precheck_query, params)
+        self.execute_delete_query('page', ('page_id',), 'page.page_id = %s', params, raise_if_not_found=True)
+        if course_id:
+            self.bump_content_version_after_commit(course_id)
+        self.invalidate_rendered_html_after_commit(page_id)
 
     def delete_pages_with_course_id(self, course_id: int):
-        delete_from_course_query = '''
-        DELETE FROM page
-        WHERE page.course_id = %s
-        '''
         params = (course_id,)
 
-        cursor = self.connection.cursor()
-        try:
-            cursor.execute(delete_from_course_query, params)
-        except IntegrityError as e:
-            raise e
+        self.execute_delete_query('page', ('page_id',), 'page.course_id = %s', params)
 
-        self.connection.commit()
+        self.bump_content_version_after_commit(course_id)
 
     def get_page_by_id_if_exists(self, page_id: int) -> Optional[Page]:
         get_page_query = '''
@@ -107,13 +270,17 @@ class ContentRepo(Repo):
             page.course_id,
             page.url_path_after_course_path,
             page.page_visibility_setting,
-            page.page_id
+            page.page_id,
+            page.page_html,
+            page.page_html_renderer_version,
+            page.page_html_starting_url_path,
+            page.updated_at
         FROM page
         WHERE page.page_id = %s
         '''
         params = (page_id,)
 
-        cursor = self.connection.cursor(dictionary=True)
+        cursor = self.read_connection.cursor(dictionary=True)
         cursor.execute(get_page_query, params)
         result = cursor.fetchone()
 
@@ -131,14 +298,17 @@ class ContentRepo(Repo):
             page.course_id,
             page.url_path_after_course_path,
             page.page_visibility_setting,
-            page.page_id
+            page.page_id,
+            page.page_html,
+            page.page_html_renderer_version,
+            page.page_html_starting_url_path,
+            page.updated_at
         FROM page
         WHERE page.course_id = %s AND page.url_path_after_course_path = %s
         '''
         params = (course_id, url_path)
 
-        cursor = self.connection.cursor(dictionary=True)
-        cursor.execute(get_page_query, params)
+        cursor = self.execute_cached_query(get_page_query, params, dictionary=True)
         result = cursor.fetchone()
 
         if not result:
@@ -161,59 +331,59 @@ class ContentRepo(Repo):
         '''
         params = (course_id, VisibilitySetting.LISTED.value)
 
-        cursor = self.connection.cursor(dictionary=True)
+        cursor = self.read_connection.cursor(dictionary=True)
         cursor.execute(get_pages_query, params)
         results = cursor.fetchall()
 
         return [Page(**result) for result in results]
 
     def generate_listed_page_navigation_link_tree_for_course_id(self, course_id: int) -> list[PageNavigationLink]:
+        if not self.nav_tree_cache:
+            return self.build_listed_page_navigation_link_tree_for_course_id(course_id)
+
+        def build():
+            with self.reading_for_cache():
+                return self.build_listed_page_navigation_link_tree_for_course_id(course_id)
+
+        return self.nav_tree_cache.get_or_build(course_id, build)
+
+    def build_listed_page_navigation_link_tree_for_course_id(self, course_id: int) -> list[PageNavigationLink]:
         selection_query = '''
         SELECT
             page.course_id,
             page.url_path_after_course_path,
-            page.page_title
+            page.page_title,
+            page.parent_path
         FROM page
-        WHERE page.page_visibility_setting = %s
-            AND page.course_id = %s
-            AND ROUND (  
-                (  
-                LENGTH(page.url_path_after_course_path)  
-                  - LENGTH( REPLACE ( page.url_path_after_course_path, '/', '') )  
-                ) / LENGTH('/')  
-            ) = %s
-            AND page.url_path_after_course_path LIKE %s
+        WHERE page.course_id = %s
+            AND page.page_visibility_setting = %s
         ORDER BY page.page_title ASC;
         '''
+        params = (course_id, VisibilitySetting.LISTED.value)
 
-        processing_queue = deque()
-        processing_queue.append((None, 1))
+        cursor = self.read_connection.cursor(dictionary=True)
+        cursor.execute(selection_query, params)
+        results = cursor.fetchall()
 
         url_mapping = {}
+        parent_paths = {}
+        for result in results:
+            parent_path = result.pop("parent_path")
+            navigation_link = PageNavigationLink(**result)
+            navigation_link.nested_links = []
+            url_mapping[navigation_link.url_path_after_course_path] = navigation_link
+            parent_paths[navigation_link.url_path_after_course_path] = parent_path
+
+        # Rows are already sorted by title, so appending in
+        # row order keeps every level sorted by title
+        value_to_return = []
+        for url_path, navigation_link in url_mapping.items():
+            parent_path = parent_paths[url_path]
+            if parent_path is None:
+                value_to_return.append(navigation_link)
+
+            # Pages whose parent isn't listed are left out, along with their children
+            elif parent_path in url_mapping:
+                url_mapping[parent_path].nested_links.append(navigation_link)
 
-        while processing_queue:
-            starting_path, nesting_level = processing_queue.popleft()
-            if starting_path is None:
-                filter_string = "%%"
-            else:
-                filter_string = starting_path + "%"
-            params = (VisibilitySetting.LISTED.value, course_id, nesting_level, filter_string)
-
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(selection_query, params)
-            results = cursor.fetchall()
-
-            for result in results:
-                navigation_link = PageNavigationLink(**result)
-                navigation_link.nested_links = []
-
-                if starting_path in url_mapping:
-                    url_mapping[starting_path].nested_links.append(navigation_link)
-
-                url_mapping[navigation_link.url_path_after_course_path] = navigation_link
-
-                if navigation_link.url_path_after_course_path != "/":
-                    processing_queue.append((navigation_link.url_path_after_course_path, nesting_level + 1))
-
-        value_to_return = [value for value in url_mapping.values() if value.url_path_after_course_path.count("/") == 1]
         return value_to_return
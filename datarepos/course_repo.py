@@ -3,14 +3,33 @@ from typing import Optional
 
 from mysql.connector import IntegrityError
 
+from caches.course_enrollment_cache import CourseEnrollmentCache
+from caches.invalidation_bus import InvalidationBus, COURSE_TOPIC, ROLE_TOPIC
 from custom_exceptions import AlreadyExistsException, NotFoundException, DependencyException
 from models.course_enrollment import CourseEnrollment, Role
 from datarepos.repo import Repo
+from datarepos.unit_of_work import UnitOfWork
 from models.course import Course
 from models.course_term_with_courses import CourseTermWithCourses
 
 
 class CourseRepo(Repo):
+    def __init__(
+        self,
+        connection = None,
+        unit_of_work: Optional[UnitOfWork] = None,
+        course_enrollment_cache: Optional[CourseEnrollmentCache] = None,
+        invalidation_bus: Optional[InvalidationBus] = None,
+    ):
+        super().__init__(connection, unit_of_work, invalidation_bus)
+        self.course_enrollment_cache = course_enrollment_cache
+
+    def invalidate_cached_course_after_commit(self, course_id: int):
+        self.publish_invalidation_after_commit(COURSE_TOPIC, course_id)
+
+    def invalidate_cached_role_after_commit(self, user_id: int, course_id: int):
+        self.publish_invalidation_after_commit(ROLE_TOPIC, (user_id, course_id))
+
     def get_all_course_enrollments_for_user_id(self, user_id: int) -> list[CourseEnrollment]:
         get_all_enrollments_query = '''
         SELECT enrollment.course_id, enrollment.user_id, enrollment.role
@@ -20,7 +39,7 @@ class CourseRepo(Repo):
         '''
         params = (user_id,)
 
-        cursor = self.connection.cursor(dictionary=True)
+        cursor = self.read_connection.cursor(dictionary=True)
         cursor.execute(get_all_enrollments_query, params)
         results = cursor.fetchall()
 
@@ -47,7 +66,7 @@ class CourseRepo(Repo):
         '''
         params = (user_id,)
 
-        cursor = self.connection.cursor(dictionary=True)
+        cursor = self.read_connection.cursor(dictionary=True)
         cursor.execute(get_courses_and_course_terms_query, params)
         results = cursor.fetchall()
 
@@ -86,6 +105,12 @@ class CourseRepo(Repo):
 
 
     def get_course_by_starting_url_if_exists(self, url: str) -> Optional[Course]:
+        if self.course_enrollment_cache:
+            course = self.course_enrollment_cache.get_course(url)
+            if course:
+                return course
+            generation = self.course_enrollment_cache.generation
+
         get_course_query = '''
         SELECT
             course.course_id,
@@ -98,13 +123,17 @@ class CourseRepo(Repo):
         '''
         params = (url,)
 
-        cursor = self.connection.cursor(dictionary=True)
-        cursor.execute(get_course_query, params)
-        result = cursor.fetchone()
+        with self.reading_for_cache(bool(self.course_enrollment_cache)):
+            cursor = self.execute_cached_query(get_course_query, params, dictionary=True)
+            result = cursor.fetchone()
 
-        if result:
-            return Course(**result)
-        return None
+        if not result:
+            return None
+
+        course = Course(**result)
+        if self.course_enrollment_cache:
+            self.course_enrollment_cache.put_course(course, generation)
+        return course
 
     def get_course_by_id_if_exists(self, course_id: int) -> Optional[Course]:
         get_course_query = '''
@@ -119,7 +148,7 @@ class CourseRepo(Repo):
         '''
         params = (course_id,)
 
-        cursor = self.connection.cursor(dictionary=True)
+        cursor = self.read_connection.cursor(dictionary=True)
         cursor.execute(get_course_query, params)
         result = cursor.fetchone()
 
@@ -172,31 +201,22 @@ class CourseRepo(Repo):
             course.course_id
         )
 
-        precheck_query = '''
-        SELECT COUNT(*)
-        FROM course
-        WHERE course.course_id = %s;
-        '''
-        precheck_params = (course.course_id,)
-
-        self.execute_dml_query(update_query, params, precheck_query, precheck_params)
+        self.execute_dml_query(update_query, params, raise_if_not_found=True)
+        self.invalidate_cached_course_after_commit(course.course_id)
 
     def delete_course_by_id(self, course_id: int):
-        delete_course_query = '''
-        DELETE FROM course
-        WHERE course.course_id = %s;
-        '''
         params = (course_id,)
 
-        precheck_query = '''
-        SELECT COUNT(*)
-        FROM course
-        WHERE course.course_id = %s;
-        '''
-
-        self.execute_dml_query(delete_course_query, params, precheck_query, params)
+        self.execute_delete_query('course', ('course_id',), 'course.course_id = %s', params, raise_if_not_found=True)
+        self.invalidate_cached_course_after_commit(course_id)
 
     def get_user_role_in_class_if_exists(self, user_id: str, course_id: str) -> Optional[Role]:
+        if self.course_enrollment_cache:
+            role = self.course_enrollment_cache.get_role(user_id, course_id)
+            if role:
+                return role
+            generation = self.course_enrollment_cache.generation
+
         get_enrollment_query = '''
         SELECT enrollment.role
         FROM enrollment
@@ -205,15 +225,17 @@ class CourseRepo(Repo):
         '''
         params = (user_id, course_id)
 
-        cursor = self.connection.cursor()
-        cursor.execute(get_enrollment_query, params)
-        result = cursor.fetchone()
+        with self.reading_for_cache(bool(self.course_enrollment_cache)):
+            cursor = self.execute_cached_query(get_enrollment_query, params)
+            result = cursor.fetchone()
         if not result:
             return None
 
         role_number, = result
         role = Role(role_number)
 
+        if self.course_enrollment_cache:
+            self.course_enrollment_cache.put_role(user_id, course_id, role, generation)
         return role
 
     def add_course_enrollment(self, course_enrollment: CourseEnrollment):
@@ -224,6 +246,7 @@ class CourseRepo(Repo):
         params = (course_enrollment.course_id, course_enrollment.user_id, course_enrollment.role.value)
 
         self.insert_single_entry_into_db_and_return_id(add_course_enrollment_query, params)
+        self.invalidate_cached_role_after_commit(course_enrollment.user_id, course_enrollment.course_id)
 
     def update_role_by_course_and_user_id(self, course_enrollment: CourseEnrollment):
         update_course_enrollment_query = '''
@@ -234,13 +257,8 @@ class CourseRepo(Repo):
         '''
         params = (course_enrollment.role.value, course_enrollment.course_id, course_enrollment.user_id)
 
-        cursor = self.connection.cursor()
-        cursor.execute(update_course_enrollment_query, params)
-
-        if cursor.rowcount < 1:
-            raise NotFoundException
-
-        self.connection.commit()
+        self.execute_dml_query(update_course_enrollment_query, params, raise_if_not_found=True)
+        self.invalidate_cached_role_after_commit(course_enrollment.user_id, course_enrollment.course_id)
 
     def delete_course_enrollment_by_id(self, course_id: int, user_id: int):
         delete_course_enrollment_query = '''
@@ -249,11 +267,6 @@ class CourseRepo(Repo):
         '''
         params = (course_id, user_id)
 
-        cursor = self.connection.cursor()
-        cursor.execute(delete_course_enrollment_query, params)
-
-        if cursor.rowcount < 1:
-            raise NotFoundException
-
-        self.connection.commit()
+        self.execute_dml_query(delete_course_enrollment_query, params, raise_if_not_found=True)
+        self.invalidate_cached_role_after_commit(user_id, course_id)
 
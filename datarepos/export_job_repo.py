@@ -0,0 +1,186 @@
+import json
+from typing import Optional
+
+from custom_exceptions import AlreadyExistsException, NotFoundException
+from datarepos.repo import Repo
+from models.export_job import ExportJob, ExportJobStatus
+
+EXPORT_JOB_COLUMNS = '''
+ej.export_job_id, ej.export_type, ej.export_format, ej.status, ej.progress, ej.cancel_requested,
+ej.error_message, ej.created_at, ej.started_at, ej.finished_at
+'''
+
+
+class ExportJobRepo(Repo):
+    """
+    Export jobs are read from the primary, since their status changes
+    too often for replicas to keep up.
+    """
+
+    def add_export_job_or_get_active(
+        self,
+        export_type: str,
+        stale_after_seconds: float,
+        export_format: str = 'csv'
+    ) -> tuple[ExportJob, bool]:
+        """
+        Queue a job for `export_type` in `export_format`, unless one is already
+        queued or running.
+
+        Active jobs that haven't reported progress for `stale_after_seconds`
+        are assumed to have died with their process, and are failed first.
+
+        :return: the new or active job, and whether it's new
+        """
+        fail_stale_jobs_query = '''
+        UPDATE export_job
+        SET status = %s, error_message = %s, finished_at = CURRENT_TIMESTAMP(6)
+        WHERE active_export = CONCAT(%s, ':', %s)
+            AND updated_at < CURRENT_TIMESTAMP(6) - INTERVAL %s SECOND
+        '''
+        fail_stale_jobs_params = (
+            ExportJobStatus.FAILED.value,
+            'Stopped reporting progress',
+            export_type,
+            export_format,
+            stale_after_seconds,
+        )
+        insert_query = '''
+        INSERT INTO export_job (export_type, export_format, status, progress)
+        VALUES (%s, %s, %s, %s)
+        '''
+        insert_params = (export_type, export_format, ExportJobStatus.QUEUED.value, json.dumps({}))
+
+        # The active job can finish between a failed insert and reading it, so try again then
+        while True:
+            try:
+                self.execute_dml_query(fail_stale_jobs_query, fail_stale_jobs_params)
+                export_job_id = self.insert_single_entry_into_db_and_return_id(insert_query, insert_params)
+                return self.get_export_job_by_id(export_job_id), True
+            except AlreadyExistsException:
+                active_export_job = self.get_active_export_job(export_type, export_format)
+                if active_export_job:
+                    return active_export_job, False
+
+    def get_export_job_by_id(self, export_job_id: int) -> ExportJob:
+        """
+        :raises NotFoundException if there's no job with that id
+        """
+        select_query = f'''
+        SELECT {EXPORT_JOB_COLUMNS}
+        FROM export_job ej
+        WHERE ej.export_job_id = %s
+        '''
+        cursor = self.connection.cursor(dictionary=True)
+        cursor.execute(select_query, (export_job_id,))
+        result = cursor.fetchone()
+
+        if not result:
+            raise NotFoundException
+
+        return ExportJob(**result)
+
+    def get_active_export_job(self, export_type: str, export_format: str = 'csv') -> Optional[ExportJob]:
+        select_query = f'''
+        SELECT {EXPORT_JOB_COLUMNS}
+        FROM export_job ej
+        WHERE ej.active_export = CONCAT(%s, ':', %s)
+        '''
+        cursor = self.connection.cursor(dictionary=True)
+        cursor.execute(select_query, (export_type, export_format))
+        result = cursor.fetchone()
+
+        return ExportJob(**result) if result else None
+
+    def get_recent_export_jobs(self, limit: int) -> list[ExportJob]:
+        select_query = f'''
+        SELECT {EXPORT_JOB_COLUMNS}
+        FROM export_job ej
+        ORDER BY ej.export_job_id DESC
+        LIMIT %s
+        '''
+        cursor = self.connection.cursor(dictionary=True)
+        cursor.execute(select_query, (limit,))
+
+        return [ExportJob(**result) for result in cursor.fetchall()]
+
+    def mark_export_job_running(self, export_job_id: int):
+        """
+        :raises NotFoundException if the job isn't queued, e.g. it was cancelled
+        """
+        update_query = '''
+        UPDATE export_job
+        SET status = %s, started_at = CURRENT_TIMESTAMP(6)
+        WHERE export_job_id = %s
+            AND status = %s
+        '''
+        params = (ExportJobStatus.RUNNING.value, export_job_id, ExportJobStatus.QUEUED.value)
+
+        self.execute_dml_query(update_query, params, raise_if_not_found=True)
+
+    def update_export_job_progress(self, export_job_id: int, progress: dict[str, int]) -> bool:
+        """
+        Save a running job's progress, which also shows it's still alive.
+
+        :return: whether the job has been asked to cancel
+        """
+        update_query = '''
+        UPDATE export_job
+        SET progress = %s, updated_at = CURRENT_TIMESTAMP(6)
+        WHERE export_job_id = %s
+        '''
+        select_query = '''
+        SELECT ej.cancel_requested
+        FROM export_job ej
+        WHERE ej.export_job_id = %s
+        '''
+        with self.unit_of_work.transaction():
+            self.execute_dml_query(update_query, (json.dumps(progress), export_job_id), raise_if_not_found=True)
+
+            cursor = self.connection.cursor()
+            cursor.execute(select_query, (export_job_id,))
+            cancel_requested, = cursor.fetchone()
+
+        return bool(cancel_requested)
+
+    def finish_export_job(
+        self,
+        export_job_id: int,
+        status: ExportJobStatus,
+        progress: dict[str, int],
+        error_message: Optional[str] = None
+    ):
+        update_query = '''
+        UPDATE export_job
+        SET status = %s, progress = %s, error_message = %s, finished_at = CURRENT_TIMESTAMP(6)
+        WHERE export_job_id = %s
+        '''
+        params = (status.value, json.dumps(progress), error_message, export_job_id)
+
+        self.execute_dml_query(update_query, params, raise_if_not_found=True)
+
+    def request_export_job_cancel(self, export_job_id: int):
+        """
+        Cancel a queued job right away, or ask a running one to stop.
+
+        :raises NotFoundException if there's no queued or running job with that id
+        """
+        # MySQL assigns left to right, so status is checked before it changes
+        update_query = '''
+        UPDATE export_job
+        SET finished_at = IF(status = %s, CURRENT_TIMESTAMP(6), finished_at),
+            status = IF(status = %s, %s, status),
+            cancel_requested = TRUE
+        WHERE export_job_id = %s
+            AND status IN (%s, %s)
+        '''
+        params = (
+            ExportJobStatus.QUEUED.value,
+            ExportJobStatus.QUEUED.value,
+            ExportJobStatus.CANCELLED.value,
+            export_job_id,
+            ExportJobStatus.QUEUED.value,
+            ExportJobStatus.RUNNING.value,
+        )
+
+        self.execute_dml_query(update_query, params, raise_if_not_found=True)
@@ -0,0 +1,262 @@
+from datetime import datetime
+from typing import Iterator, Optional
+
+from caches.invalidation_bus import InvalidationBus
+from config import EXPORT_FETCH_BATCH_SIZE
+from datarepos.repo import Repo
+from datarepos.unit_of_work import UnitOfWork
+from models.attendance_record import AttendanceRecordStatus
+from models.course_enrollment import Role
+from models.export_column import ExportColumn, ExportColumnType
+from models.page import VisibilitySetting
+
+# Tables the admin app can export whole
+EXPORTABLE_TABLES = (
+    'course',
+    'user',
+    'page',
+    'file',
+    'page_file_bridge',
+    'attendance_session',
+    'attendance_record',
+)
+
+ATTENDANCE_RECORDS_AND_STUDENTS_VIEW = 'attendance_records_students_classes'
+
+STUDENT_COUNT_PER_CLASS_COLUMNS = [
+    ExportColumn('course_id', ExportColumnType.INT),
+    ExportColumn('title'),
+    ExportColumn('user_friendly_class_code'),
+    ExportColumn('student_count', ExportColumnType.INT),
+]
+DELETED_ROW_KEY_COLUMNS = [
+    ExportColumn('row_key'),
+    ExportColumn('deleted_at', ExportColumnType.DATETIME),
+]
+
+# MySQL data type -> export column type. Any other type is exported as text.
+COLUMN_TYPES_BY_DATA_TYPE = {
+    'tinyint': ExportColumnType.SMALL_INT,
+    'smallint': ExportColumnType.INT,
+    'mediumint': ExportColumnType.INT,
+    'int': ExportColumnType.INT,
+    'bigint': ExportColumnType.INT,
+    'float': ExportColumnType.FLOAT,
+    'double': ExportColumnType.FLOAT,
+    'datetime': ExportColumnType.DATETIME,
+    'timestamp': ExportColumnType.DATETIME,
+}
+# Int columns holding the value of one of these enums, which fit in a small int
+ENUM_COLUMNS = {
+    'attendance_status': AttendanceRecordStatus,
+    'role': Role,
+    'page_visibility_setting': VisibilitySetting,
+}
+
+
+def _check_exportable(table_name: str):
+    if table_name not in EXPORTABLE_TABLES:
+        raise ValueError(f"Table {table_name} can't be exported")
+
+
+class ExportRepo(Repo):
+    def __init__(
+        self,
+        connection = None,
+        unit_of_work: Optional[UnitOfWork] = None,
+        invalidation_bus: Optional[InvalidationBus] = None,
+        abandon_unread_rows: bool = False,
+    ):
+        """
+        :param abandon_unread_rows: when a stream of rows is stopped early,
+        shut the connection down instead of reading the rest of the rows, for
+        connections of the repo's own that won't be used again
+        """
+        super().__init__(connection, unit_of_work, invalidation_bus)
+        self.abandon_unread_rows = abandon_unread_rows
+
+    def lock_tables_for_reading(self, table_names: list[str]) -> datetime:
+        """
+        Hold read locks on the tables, and on the tombstones of their deleted
+        rows, so no other session can write to them until `unlock_tables()`.
+        Waits for writes already in progress to finish.
+
+        :return: the database time just before locking. Writes that commit
+        after the lock is released are all stamped later than this.
+        """
+        for table_name in table_names:
+            _check_exportable(table_name)
+
+        cursor = self.read_connection.cursor()
+        cursor.execute("SELECT CURRENT_TIMESTAMP(6)")
+        locked_at, = cursor.fetchone()
+
+        locked_tables = [*table_names, 'deleted_row']
+        cursor.execute(f"LOCK TABLES {', '.join(f'{table_name} READ' for table_name in locked_tables)}")
+        return locked_at
+
+    def unlock_tables(self):
+        cursor = self.read_connection.cursor()
+        cursor.execute("UNLOCK TABLES")
+
+    def start_snapshot(self):
+        """
+        Start a read-only transaction in which every read sees the database
+        as it was when this was called.
+        """
+        self.read_connection.start_transaction(
+            consistent_snapshot=True,
+            isolation_level='REPEATABLE READ',
+            readonly=True,
+        )
+
+    def get_table_columns(self, table_name: str) -> list[ExportColumn]:
+        """
+        Get the table's columns in `SELECT *` order, typed for export.
+        """
+        _check_exportable(table_name)
+
+        return self._get_columns(table_name)
+
+    def get_attendance_records_and_students_columns(self) -> list[ExportColumn]:
+        return self._get_columns(ATTENDANCE_RECORDS_AND_STUDENTS_VIEW)
+
+    def _get_columns(self, table_name: str) -> list[ExportColumn]:
+        select_query = '''
+        SELECT columns.column_name, columns.data_type
+        FROM information_schema.columns
+        WHERE columns.table_schema = DATABASE()
+            AND columns.table_name = %s
+        ORDER BY columns.ordinal_position
+        '''
+        cursor = self.read_connection.cursor()
+        cursor.execute(select_query, (table_name,))
+
+        return [
+            ExportColumn(
+                column_name,
+                ExportColumnType.SMALL_INT if column_name in ENUM_COLUMNS
+                else COLUMN_TYPES_BY_DATA_TYPE.get(data_type.lower(), ExportColumnType.TEXT),
+            )
+            for column_name, data_type in cursor.fetchall()
+        ]
+
+    def stream_query_rows(self, query: str, params: tuple = ()) -> Iterator[tuple]:
+        """
+        Yield the query's rows as the server sends them, `EXPORT_FETCH_BATCH_SIZE`
+        at a time, so memory use doesn't grow with the result.
+
+        The cursor is unbuffered, so nothing else can run on the read
+        connection until every row has been read. If the caller stops
+        early, the rest of the rows are read and dropped, a batch at a time,
+        or with `abandon_unread_rows` the connection is shut down unread.
+        """
+        cursor = self.read_connection.cursor(buffered=False)
+        try:
+            cursor.execute(query, params)
+            while rows := cursor.fetchmany(EXPORT_FETCH_BATCH_SIZE):
+                yield from rows
+        finally:
+            if self.abandon_unread_rows and cursor.with_rows and self.read_connection.unread_result:
+                # Closing the socket ends the query on the server, and the cursor can't be closed with rows unread
+                self.read_connection.shutdown()
+                self.connection_is_open = False
+            else:
+                while cursor.with_rows and cursor.fetchmany(EXPORT_FETCH_BATCH_SIZE):
+                    pass
+                cursor.close()
+
+    def stream_table_rows(self, table_name: str) -> Iterator[tuple]:
+        _check_exportable(table_name)
+
+        return self.stream_query_rows(f'''SELECT * FROM {table_name};''')
+
+    def stream_changed_table_rows(self, table_name: str, changed_after: datetime) -> Iterator[tuple]:
+        _check_exportable(table_name)
+
+        return self.stream_query_rows(f'''SELECT * FROM {table_name} WHERE updated_at > %s;''', (changed_after,))
+
+    def stream_deleted_row_keys(self, table_name: str, deleted_after: datetime) -> Iterator[tuple]:
+        """
+        Yield (row_key, deleted_at) for the table's rows deleted since `deleted_after`.
+        """
+        query = '''
+        SELECT deleted_row.row_key, deleted_row.deleted_at
+        FROM deleted_row
+        WHERE deleted_row.table_name = %s
+            AND deleted_row.deleted_at > %s
+        ORDER BY deleted_row.deleted_at
+        '''
+        params = (table_name, deleted_after)
+
+        return self.stream_query_rows(query, params)
+
+    def get_high_water_marks(self) -> dict[str, datetime]:
+        """
+        Get the point in time each table was last exported through.
+        Tables that were never exported are left out.
+        """
+        select_query = '''
+        SELECT export_high_water_mark.table_name, export_high_water_mark.exported_through
+        FROM export_high_water_mark
+        '''
+        cursor = self.connection.cursor()
+        cursor.execute(select_query)
+
+        return dict(cursor.fetchall())
+
+    def save_high_water_marks(self, table_names: list[str], exported_through: datetime):
+        """
+        Record that the tables have been exported through `exported_through`,
+        and drop their tombstones up to then, which have now been exported
+        or are covered by a full export. A mark never moves back.
+        """
+        for table_name in table_names:
+            _check_exportable(table_name)
+
+        upsert_query = f'''
+        INSERT INTO export_high_water_mark (table_name, exported_through)
+        VALUES {", ".join(["(%s, %s)"] * len(table_names))} AS exported
+        ON DUPLICATE KEY UPDATE exported_through = GREATEST(
+            export_high_water_mark.exported_through, exported.exported_through
+        )
+        '''
+        upsert_params = tuple(
+            value
+            for table_name in table_names
+            for value in (table_name, exported_through)
+        )
+        delete_tombstones_query = f'''
+        DELETE FROM deleted_row
+        WHERE deleted_row.table_name IN ({", ".join(["%s"] * len(table_names))})
+            AND deleted_row.deleted_at <= %s
+        '''
+        delete_tombstones_params = (*table_names, exported_through)
+
+        cursor = self.connection.cursor()
+        with self.unit_of_work.transaction():
+            cursor.execute(upsert_query, upsert_params)
+            cursor.execute(delete_tombstones_query, delete_tombstones_params)
+
+    def stream_student_count_per_class_rows(self) -> Iterator[tuple]:
+        query = '''
+        SELECT course.course_id, course.title, course.user_friendly_class_code, COUNT(filtered_enrollments.user_id)
+        FROM course
+        INNER JOIN (
+            SELECT enrollment.course_id, enrollment.user_id
+            FROM enrollment
+            WHERE enrollment.role = %s
+        ) as filtered_enrollments
+            ON course.course_id = filtered_enrollments.course_id
+        GROUP BY course.course_id
+        '''
+        params = (Role.STUDENT.value,)
+
+        return self.stream_query_rows(query, params)
+
+    def stream_attendance_records_and_students_rows(self) -> Iterator[tuple]:
+        query = f'''
+        SELECT * FROM {ATTENDANCE_RECORDS_AND_STUDENTS_VIEW};
+        '''
+
+        return self.stream_query_rows(query)
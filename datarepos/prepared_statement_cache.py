@@ -0,0 +1,63 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Optional
+
+
+class PreparedStatementCache:
+    """
+    Server-side prepared statements for one connection, keyed by query text.
+
+    Caches live as long as their connection, so pooled connections keep
+    their prepared statements across requests. Attach one with `attach`
+    when the connection is opened, and look it up with `for_connection`.
+    """
+
+    _caches_by_connection: "weakref.WeakKeyDictionary[object, PreparedStatementCache]" = weakref.WeakKeyDictionary()
+    _registry_lock = threading.Lock()
+
+    def __init__(self, connection, max_statements: int = 32):
+        self.connection = connection
+        self.max_statements = max_statements
+        self.hits = 0
+        self.misses = 0
+
+        # (query, dictionary) -> (query, cursor)
+        # The original query string is kept because the connector only skips
+        # re-preparing when it's given the exact same string object
+        self._cursors: OrderedDict[tuple[str, bool], tuple[str, any]] = OrderedDict()
+
+    @classmethod
+    def attach(cls, connection, max_statements: int = 32) -> "PreparedStatementCache":
+        statement_cache = cls(connection, max_statements)
+        with cls._registry_lock:
+            cls._caches_by_connection[connection] = statement_cache
+        return statement_cache
+
+    @classmethod
+    def for_connection(cls, connection) -> Optional["PreparedStatementCache"]:
+        with cls._registry_lock:
+            return cls._caches_by_connection.get(connection)
+
+    def execute(self, query: str, params: tuple, dictionary: bool = False):
+        """
+        Execute `query` with a prepared cursor, preparing it on first use.
+        Results must be fully read before the connection runs anything else.
+        """
+        key = (query, dictionary)
+        if key in self._cursors:
+            self.hits += 1
+            self._cursors.move_to_end(key)
+            query, cursor = self._cursors[key]
+        else:
+            self.misses += 1
+            cursor = self.connection.cursor(prepared=True, dictionary=dictionary)
+            self._cursors[key] = (query, cursor)
+
+            if len(self._cursors) > self.max_statements:
+                _, (_, evicted_cursor) = self._cursors.popitem(last=False)
+                # Deallocates the statement on the server
+                evicted_cursor.close()
+
+        cursor.execute(query, params)
+        return cursor
@@ -1,39 +1,96 @@
-from typing import Optional
+from contextlib import nullcontext
+from typing import Hashable, Optional
 
-import mysql.connector
 from mysql.connector import IntegrityError
 
+from caches.invalidation_bus import InvalidationBus
 from config import DATABASE_HOST, DATABASE_PORT, DATABASE_USER, DATABASE_PASSWORD, DATABASE_SCHEMA_NAME
 from custom_exceptions import AlreadyExistsException, NotFoundException, DependencyException
+from datarepos.prepared_statement_cache import PreparedStatementCache
+from datarepos.unit_of_work import UnitOfWork
+from db_connection_details import DBConnectionDetails
 
 
 class Repo:
     MYSQL_DUPLICATE_ENTRY_EXCEPTION_CODE = 1062
     MYSQL_FOREIGN_KEY_CONSTRAINT_EXCEPTION_CODE = 1451
+    MYSQL_FOREIGN_KEY_MISSING_PARENT_EXCEPTION_CODE = 1452
 
-    def __init__(self, connection = None):
-        if not connection:
-            self.connection = mysql.connector.connect(
+    def __init__(
+        self,
+        connection = None,
+        unit_of_work: Optional[UnitOfWork] = None,
+        invalidation_bus: Optional[InvalidationBus] = None,
+    ):
+        if not unit_of_work and not connection:
+            connection = DBConnectionDetails(
                 host=DATABASE_HOST,
                 port=DATABASE_PORT,
                 user=DATABASE_USER,
                 password=DATABASE_PASSWORD,
                 database=DATABASE_SCHEMA_NAME
-            )
-        else:
-            self.connection = connection
+            ).connect()
 
+        # Without a shared unit of work, each write commits on its own
+        self.unit_of_work = unit_of_work or UnitOfWork(connection)
+        self.invalidation_bus = invalidation_bus
         self.connection_is_open = True
 
+    @property
+    def connection(self):
+        """
+        Connection to the primary database, used for writes.
+        """
+        return self.unit_of_work.connection
+
+    @property
+    def read_connection(self):
+        """
+        Connection for read-only queries, which may be a replica.
+        """
+        return self.unit_of_work.read_connection
+
+    def reading_for_cache(self, is_cached: bool = True):
+        """
+        Context for reads whose results get cached, which go to a fresh
+        snapshot of the primary (see UnitOfWork.reading_for_cache_fill).
+        Does nothing if `is_cached` is false.
+        """
+        return self.unit_of_work.reading_for_cache_fill() if is_cached else nullcontext()
+
+    def publish_invalidation_after_commit(self, topic: str, key: Hashable):
+        """
+        Evict `key` from every app process's caches once the current
+        transaction commits. Does nothing if caching is off.
+        """
+        if not self.invalidation_bus:
+            return
+
+        self.unit_of_work.call_after_commit(lambda: self.invalidation_bus.publish(topic, key))
+
     def close_connection(self):
         self.connection.close()
         self.connection_is_open = False
 
+    def execute_cached_query(self, select_query, params, dictionary = False):
+        """
+        Execute a frequently run SELECT through the connection's prepared
+        statement cache, or as a plain query if the connection has none.
+        Rows must be fully read before running another query.
+        """
+        statement_cache = PreparedStatementCache.for_connection(self.read_connection)
+        if statement_cache:
+            return statement_cache.execute(select_query, params, dictionary)
+
+        cursor = self.read_connection.cursor(dictionary=dictionary)
+        cursor.execute(select_query, params)
+        return cursor
+
     def insert_single_entry_into_db_and_return_id(self, insert_query, params):
         cursor = self.connection.cursor()
         try:
-            cursor.execute(insert_query, params)
-            self.connection.commit()
+            with self.unit_of_work.transaction():
+                cursor.execute(insert_query, params)
         except IntegrityError as e:
             if e.errno == self.MYSQL_DUPLICATE_ENTRY_EXCEPTION_CODE:
                 raise AlreadyExistsException
@@ -46,34 +103,28 @@ class Repo:
         self,
         update_query,
         params,
-        not_found_precheck_query: Optional[str] = None,
-        not_found_precheck_params: Optional[tuple] = None
+        raise_if_not_found: bool = False
     ):
         """
-        Execute a DML query with commit/rollback.
+        Execute a DML query inside the repo's unit of work, which commits
+        or rolls back once its outermost transaction ends.
 
         :param update_query: DML query to be executed.
         :param params: Params to pass into the DML query.
-        :param not_found_precheck_query: Optional `SELECT COUNT(*) FROM table_name`
-        query run before the update query, raising a NotFoundException if
-        count < 1.
-        :param not_found_precheck_params: Params to pass into `not_found_precheck_query`.
+        :param raise_if_not_found: Raise a NotFoundException if the query
+        matched no rows. Connections from DBConnectionDetails.connect report
+        matched rows, so an UPDATE that changes nothing still counts.
+        :raises NotFoundException if `raise_if_not_found` and no rows matched
         :raises DependencyException if foreign key constraint violated
         :raises AlreadyExistsException if primary key or unique constraint violated
         """
-        # If provided, this query checks whether the value exists
-        # by checking the row count
-        if not_found_precheck_query:
-            cursor = self.connection.cursor()
-            cursor.execute(not_found_precheck_query, not_found_precheck_params)
-            count, = cursor.fetchone()
-
-            if count < 1:
-                raise NotFoundException
-
         cursor = self.connection.cursor()
         try:
-            cursor.execute(update_query, params)
+            with self.unit_of_work.transaction():
+                cursor.execute(update_query, params)
+
+                if raise_if_not_found and cursor.rowcount < 1:
+                    raise NotFoundException
         except IntegrityError as e:
             if e.errno == self.MYSQL_DUPLICATE_ENTRY_EXCEPTION_CODE:
                 raise AlreadyExistsException
@@ -82,4 +133,48 @@ class Repo:
             else:
                 raise e
 
-        self.connection.commit()
+    def execute_delete_query(
+        self,
+        table_name: str,
+        key_columns: tuple[str, ...],
+        where_clause: str,
+        params,
+        raise_if_not_found: bool = False
+    ) -> int:
+        """
+        Delete rows and leave a tombstone in deleted_row for each one,
+        in the same transaction, so delta exports can pass the deletion on.
+
+        :param table_name: table to delete from, which can't be aliased in `where_clause`
+        :param key_columns: primary key columns of the table, saved in the tombstone
+        :param where_clause: condition selecting the rows to delete, without WHERE
+        :return: the number of rows deleted
+        :raises NotFoundException if `raise_if_not_found` and no rows matched
+        :raises DependencyException if other rows still reference a deleted row
+        """
+        row_key = ', '.join(f"'{column}', {table_name}.{column}" for column in key_columns)
+        record_tombstones_query = f'''
+        INSERT INTO deleted_row (table_name, row_key)
+        SELECT %s, JSON_OBJECT({row_key})
+        FROM {table_name}
+        WHERE {where_clause}
+        '''
+        delete_query = f'''
+        DELETE FROM {table_name}
+        WHERE {where_clause}
+        '''
+
+        cursor = self.connection.cursor()
+        try:
+            with self.unit_of_work.transaction():
+                cursor.execute(record_tombstones_query, (table_name, *params))
+                cursor.execute(delete_query, params)
+
+                if raise_if_not_found and cursor.rowcount < 1:
+                    raise NotFoundException
+        except IntegrityError as e:
+            if e.errno == self.MYSQL_FOREIGN_KEY_CONSTRAINT_EXCEPTION_CODE:
+                raise DependencyException
+            else:
+                raise e
+        return cursor.rowcount
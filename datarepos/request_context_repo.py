@@ -0,0 +1,96 @@
+from typing import Optional
+
+from datarepos.repo import Repo
+from models.course import Course
+from models.course_enrollment import Role
+from models.page import Page
+from models.request_context import RequestContext
+from models.user import User
+
+
+class RequestContextRepo(Repo):
+    def get_request_context(self, user_uuid: str, starting_url_path: str, url_path: Optional[str] = None) -> RequestContext:
+        """
+        Look up a user, a course, the user's role in it and one of its pages
+        in a single round trip.
+
+        :param url_path: path of the page after the course's path, or None to skip the page
+        """
+        get_request_context_query = '''
+        SELECT
+            user.user_id,
+            user.user_uuid,
+            user.email,
+            user.full_name,
+            user.session_version,
+            course.course_id,
+            course.course_term_id,
+            course.starting_url_path,
+            course.title AS course_title,
+            course.user_friendly_class_code,
+            enrollment.role,
+            page.page_id,
+            page.page_title,
+            page.page_content,
+            page.created_by_user_id,
+            page.url_path_after_course_path,
+            page.page_visibility_setting,
+            page.page_html,
+            page.page_html_renderer_version,
+            page.page_html_starting_url_path,
+            page.updated_at
+        FROM user
+        LEFT JOIN course
+            ON course.starting_url_path = %s
+        LEFT JOIN enrollment
+            ON enrollment.course_id = course.course_id
+            AND enrollment.user_id = user.user_id
+        LEFT JOIN page
+            ON page.course_id = course.course_id
+            AND page.url_path_after_course_path = %s
+        WHERE user.user_uuid = %s;
+        '''
+        params = (starting_url_path, url_path, user_uuid)
+
+        cursor = self.execute_cached_query(get_request_context_query, params, dictionary=True)
+        result = cursor.fetchone()
+
+        if not result:
+            return RequestContext()
+
+        request_context = RequestContext(user=User(
+            user_id=result["user_id"],
+            user_uuid=result["user_uuid"],
+            email=result["email"],
+            full_name=result["full_name"],
+            session_version=result["session_version"],
+        ))
+
+        if result["course_id"] is not None:
+            request_context.course = Course(
+                course_id=result["course_id"],
+                course_term_id=result["course_term_id"],
+                starting_url_path=result["starting_url_path"],
+                title=result["course_title"],
+                user_friendly_class_code=result["user_friendly_class_code"],
+            )
+
+        if result["role"] is not None:
+            request_context.role = Role(result["role"])
+
+        if result["page_id"] is not None:
+            request_context.page = Page(
+                page_id=result["page_id"],
+                page_title=result["page_title"],
+                page_content=result["page_content"],
+                created_by_user_id=result["created_by_user_id"],
+                course_id=result["course_id"],
+                url_path_after_course_path=result["url_path_after_course_path"],
+                page_visibility_setting=result["page_visibility_setting"],
+                page_html=result["page_html"],
+                page_html_renderer_version=result["page_html_renderer_version"],
+                page_html_starting_url_path=result["page_html_starting_url_path"],
+                updated_at=result["updated_at"],
+            )
+
+        return request_context
@@ -0,0 +1,185 @@
+from contextlib import contextmanager
+from typing import Optional, Callable
+
+import mysql.connector
+
+
+class UnitOfWork:
+    """
+    Groups the writes of several repos into one transaction on one connection.
+
+    Repos wrap each write in `transaction()`. The outermost `transaction()`
+    commits (or rolls back on exception). Nested ones use savepoints, so a
+    failed write only undoes its own changes and the caller can keep going.
+
+    For a whole Flask request, `begin()` opens the outer transaction and
+    `end()` commits or rolls it back once the view has finished.
+
+    Connections can be given directly or opened lazily through providers.
+    Reads go through `read_connection`, which uses a replica connection from
+    `replica_connection_provider` until the first write, or the primary
+    connection if `pin_reads_to_primary` is set or inside `reading_from_primary()`.
+    Inside `reading_for_cache_fill()`, it uses a primary connection from
+    `cache_fill_connection_provider` instead.
+    """
+
+    def __init__(
+        self,
+        connection = None,
+        connection_provider: Optional[Callable[[], any]] = None,
+        replica_connection_provider: Optional[Callable[[], any]] = None,
+        pin_reads_to_primary: bool = False,
+        cache_fill_connection_provider: Optional[Callable[[], any]] = None,
+    ):
+        if not connection and not connection_provider:
+            raise ValueError("Either connection or connection_provider must be given")
+
+        self.connection_provider = connection_provider
+        self.replica_connection_provider = replica_connection_provider
+        self.pin_reads_to_primary = pin_reads_to_primary
+        self.cache_fill_connection_provider = cache_fill_connection_provider
+        self.has_writes = False
+
+        self._connection = connection
+        self._replica_connection = None
+        self._cache_fill_connection = None
+        self._is_filling_cache = False
+        self._depth = 0
+        self._after_commit_callbacks: list[Callable[[], None]] = []
+
+    @property
+    def connection(self):
+        if not self._connection:
+            self._connection = self.connection_provider()
+        return self._connection
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._depth > 0
+
+    @property
+    def read_connection(self):
+        if self._is_filling_cache:
+            return self._cache_fill_connection
+
+        # Once this unit of work has written anything, later reads
+        # must see those writes, which replicas may not have yet
+        if self.has_writes or self.pin_reads_to_primary or not self.replica_connection_provider:
+            return self.connection
+
+        if not self._replica_connection:
+            self._replica_connection = self.replica_connection_provider()
+        return self._replica_connection
+
+    @contextmanager
+    def reading_from_primary(self):
+        """
+        Send reads to the primary until the block ends, e.g. for results
+        that must reflect writes a replica may not have caught up with.
+        """
+        was_pinned = self.pin_reads_to_primary
+        self.pin_reads_to_primary = True
+        try:
+            yield self
+        finally:
+            self.pin_reads_to_primary = was_pinned
+
+    @contextmanager
+    def reading_for_cache_fill(self):
+        """
+        Send reads to the cache fill connection until the block ends, for
+        results that get cached and served to other users under a cache
+        version read just before the block.
+
+        The fill connection is on the primary, since a replica that hasn't
+        caught up with a write would have its results cached as current.
+        It's also apart from this unit of work, whose snapshot may predate
+        that version: rows from before a write would get cached under the
+        version bumped by it, and served until the next write. The fill's
+        transaction is ended with the block, so each fill reads a fresh
+        snapshot, taken after the version was read.
+
+        Without a `cache_fill_connection_provider`, reads just go to the primary.
+        """
+        if not self.cache_fill_connection_provider:
+            with self.reading_from_primary():
+                yield self
+            return
+
+        if self._is_filling_cache:
+            # Part of a bigger fill, which ends the snapshot
+            yield self
+            return
+
+        if not self._cache_fill_connection:
+            self._cache_fill_connection = self.cache_fill_connection_provider()
+
+        self._is_filling_cache = True
+        try:
+            yield self
+        finally:
+            self._is_filling_cache = False
+            self._cache_fill_connection.rollback()
+
+    def call_after_commit(self, callback: Callable[[], None]):
+        """
+        Run `callback` once the outermost transaction commits, e.g. to
+        invalidate caches only after the new data is visible to other
+        connections. Dropped if the transaction is rolled back.
+        """
+        if self._depth == 0:
+            callback()
+        else:
+            self._after_commit_callbacks.append(callback)
+
+    def begin(self):
+        # With autocommit off, MySQL opens the outer transaction implicitly
+        if self._depth > 0:
+            self._execute(f"SAVEPOINT {self._savepoint_name()}")
+        self._depth += 1
+
+    def end(self, exception: Optional[BaseException] = None):
+        if self._depth == 0:
+            raise RuntimeError("No transaction in progress")
+
+        self._depth -= 1
+        if self._depth == 0:
+            callbacks = self._after_commit_callbacks
+            self._after_commit_callbacks = []
+
+            if self._connection is not None:
+                if exception is None:
+                    self.connection.commit()
+                else:
+                    self.connection.rollback()
+
+            if exception is None:
+                for callback in callbacks:
+                    callback()
+        elif exception is None:
+            self._execute(f"RELEASE SAVEPOINT {self._savepoint_name()}")
+        else:
+            try:
+                self._execute(f"ROLLBACK TO SAVEPOINT {self._savepoint_name()}")
+            except mysql.connector.Error:
+                # Errors like deadlocks already rolled back the
+                # whole transaction, taking the savepoint with it
+                pass
+
+    @contextmanager
+    def transaction(self):
+        self.has_writes = True
+        self.begin()
+        try:
+            yield self
+        except BaseException as e:
+            self.end(e)
+            raise
+        self.end()
+
+    def _savepoint_name(self):
+        return f"unit_of_work_{self._depth}"
+
+    def _execute(self, query: str):
+        cursor = self.connection.cursor()
+        cursor.execute(query)
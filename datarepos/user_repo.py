@@ -3,6 +3,7 @@ from typing import Optional
 import mysql.connector
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from caches.invalidation_bus import USER_TOPIC
 from custom_exceptions import AlreadyExistsException, DependencyException
 from datarepos.repo import Repo
 from models.user import User
@@ -10,6 +11,9 @@ from models.user import User
 
 
 class UserRepo(Repo):
+    def invalidate_cached_user_after_commit(self, user_id: int):
+        self.publish_invalidation_after_commit(USER_TOPIC, user_id)
+
     def get_user_id_if_credentials_match(self, email: str, given_password: str) -> Optional[str]:
         get_user_query = '''
         SELECT user_id, hashed_password
@@ -18,7 +22,7 @@ class UserRepo(Repo):
         '''
         params = (email,)
 
-        cursor = self.connection.cursor()
+        cursor = self.read_connection.cursor()
         cursor.execute(get_user_query, params)
 
         cursor_result = cursor.fetchone()
@@ -33,13 +37,13 @@ class UserRepo(Repo):
 
     def get_user_from_id_if_exists(self, user_id: int) -> Optional[User]:
         get_user_query = '''
-        SELECT user_id, user_uuid, email, full_name
+        SELECT user_id, user_uuid, email, full_name, session_version
         FROM user
         WHERE user.user_id = %s
         '''
         params = (user_id,)
 
-        cursor = self.connection.cursor(dictionary=True)
+        cursor = self.read_connection.cursor(dictionary=True)
         cursor.execute(get_user_query, params)
         cursor_result = cursor.fetchone()
 
@@ -49,14 +53,13 @@ class UserRepo(Repo):
 
     def get_user_from_uuid_if_exists(self, user_uuid: str) -> Optional[User]:
         get_user_query = '''
-        SELECT user_id, user_uuid, email, full_name
+        SELECT user_id, user_uuid, email, full_name, session_version
         FROM user
         WHERE user.user_uuid = %s
         '''
         params = (user_uuid,)
 
-        cursor = self.connection.cursor(dictionary=True)
-        cursor.execute(get_user_query, params)
+        cursor = self.execute_cached_query(get_user_query, params, dictionary=True)
         cursor_result = cursor.fetchone()
 
         if cursor_result:
@@ -78,25 +81,46 @@ class UserRepo(Repo):
 
         try:
             cursor = self.connection.cursor()
-            cursor.execute(insert_query, params)
-            self.connection.commit()
+            with self.unit_of_work.transaction():
+                cursor.execute(insert_query, params)
             row_id = cursor.lastrowid
             return row_id
         except mysql.connector.errors.IntegrityError as e:
             if e.errno == self.MYSQL_DUPLICATE_ENTRY_EXCEPTION_CODE:
                 raise AlreadyExistsException
 
-    def delete_user_by_id(self, user_id: int):
-        delete_user_query = '''
-        DELETE FROM user
+    def bump_session_version_by_id(self, user_id: int):
+        """
+        Sign the user out of all of their sessions.
+        """
+        bump_session_version_query = '''
+        UPDATE user
+        SET user.session_version = user.session_version + 1
         WHERE user.user_id = %s
         '''
         params = (user_id,)
 
-        precheck_query = '''
-        SELECT COUNT(*)
-        FROM user
-        WHERE user.user_id = %s;
+        self.execute_dml_query(bump_session_version_query, params, raise_if_not_found=True)
+        self.invalidate_cached_user_after_commit(user_id)
+
+    def update_password_by_id(self, user_id: int, new_password: str):
+        """
+        Change the user's password and sign them out of all of their sessions.
+        """
+        update_password_query = '''
+        UPDATE user
+        SET
+            user.hashed_password = %s,
+            user.session_version = user.session_version + 1
+        WHERE user.user_id = %s
         '''
+        params = (generate_password_hash(new_password), user_id)
+
+        self.execute_dml_query(update_password_query, params, raise_if_not_found=True)
+        self.invalidate_cached_user_after_commit(user_id)
+
+    def delete_user_by_id(self, user_id: int):
+        params = (user_id,)
 
-        self.execute_dml_query(delete_user_query, params, precheck_query, params)
+        self.execute_delete_query('user', ('user_id',), 'user.user_id = %s', params, raise_if_not_found=True)
+        self.invalidate_cached_user_after_commit(user_id)
@@ -1,4 +1,8 @@
-from dataclasses import dataclass
+import random
+from dataclasses import dataclass, field
+
+import mysql.connector
+from mysql.connector.constants import ClientFlag
 
 
 @dataclass
@@ -7,4 +11,25 @@ class DBConnectionDetails:
     port: str
     user: str
     password: str
-    database: str
\ No newline at end of file
+    database: str
+
+    # Read-only copies of this database, see UnitOfWork.read_connection
+    replicas: list["DBConnectionDetails"] = field(default_factory=list)
+
+    def read_only_config(self) -> "DBConnectionDetails":
+        """
+        A random replica to run long reads on, or this database if there are none.
+        """
+        return random.choice(self.replicas) if self.replicas else self
+
+    def connect(self):
+        # FOUND_ROWS makes UPDATE report matched rows instead of changed rows,
+        # so Repo.execute_dml_query can tell "not found" apart from "no changes"
+        return mysql.connector.connect(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            client_flags=[ClientFlag.FOUND_ROWS],
+        )
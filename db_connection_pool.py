@@ -0,0 +1,203 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import mysql.connector
+
+from datarepos.prepared_statement_cache import PreparedStatementCache
+from db_connection_details import DBConnectionDetails
+
+
+class PoolTimeoutException(Exception):
+    pass
+
+
+@dataclass
+class _PooledConnection:
+    connection: any
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class DBConnectionPool:
+    """
+    Thread-safe pool of MySQL connections.
+
+    Up to `pool_size` connections are kept open between checkouts. When all
+    of them are in use, up to `max_overflow` extra connections are opened,
+    and those are closed as soon as they are checked back in. Once both limits
+    are reached, `checkout` blocks for up to `checkout_timeout` seconds.
+
+    If `prepared_statement_cache_size` is set, each connection gets a
+    PreparedStatementCache holding up to that many statements.
+    """
+
+    def __init__(
+        self,
+        db_config: DBConnectionDetails,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        checkout_timeout: float = 30,
+        pre_ping: bool = True,
+        recycle_seconds: float = 3600,
+        prepared_statement_cache_size: int = 0,
+    ):
+        self.db_config = db_config
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.checkout_timeout = checkout_timeout
+        self.pre_ping = pre_ping
+        self.recycle_seconds = recycle_seconds
+        self.prepared_statement_cache_size = prepared_statement_cache_size
+
+        # Most recently returned connection is reused first,
+        # so rarely used connections age out through recycling
+        self._idle_connections: deque[_PooledConnection] = deque()
+        self._checked_out_connections: dict[int, _PooledConnection] = {}
+        self._pending_connection_count = 0
+        self._condition = threading.Condition()
+
+    @property
+    def total_connection_count(self) -> int:
+        return len(self._idle_connections) \
+            + len(self._checked_out_connections) \
+            + self._pending_connection_count
+
+    @property
+    def checked_out_connection_count(self) -> int:
+        return len(self._checked_out_connections)
+
+    @property
+    def idle_connection_count(self) -> int:
+        return len(self._idle_connections)
+
+    def prepared_statement_cache_stats(self) -> dict[str, int]:
+        """
+        Hit and miss counts summed over the pool's current connections.
+        """
+        with self._condition:
+            pooled_connections = list(self._idle_connections) + list(self._checked_out_connections.values())
+
+        stats = {"hits": 0, "misses": 0}
+        for pooled_connection in pooled_connections:
+            statement_cache = PreparedStatementCache.for_connection(pooled_connection.connection)
+            if statement_cache:
+                stats["hits"] += statement_cache.hits
+                stats["misses"] += statement_cache.misses
+        return stats
+
+    def checkout(self):
+        """
+        Get a connection from the pool, opening a new one if allowed.
+
+        :raises PoolTimeoutException if no connection frees up within
+        `checkout_timeout` seconds.
+        """
+        deadline = time.monotonic() + self.checkout_timeout
+
+        with self._condition:
+            while True:
+                if self._idle_connections:
+                    pooled_connection = self._idle_connections.pop()
+                    break
+
+                if self.total_connection_count < self.pool_size + self.max_overflow:
+                    pooled_connection = None
+                    break
+
+                remaining_time = deadline - time.monotonic()
+                if remaining_time <= 0 or not self._condition.wait(remaining_time):
+                    raise PoolTimeoutException(
+                        f"Timed out after {self.checkout_timeout}s waiting for a database connection"
+                    )
+
+            # Hold the slot while pinging or connecting outside the lock
+            self._pending_connection_count += 1
+
+        try:
+            if pooled_connection is not None and not self._is_usable(pooled_connection):
+                self._close_quietly(pooled_connection)
+                pooled_connection = None
+
+            if pooled_connection is None:
+                pooled_connection = self._open_connection()
+        except BaseException:
+            with self._condition:
+                self._pending_connection_count -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._pending_connection_count -= 1
+            self._checked_out_connections[id(pooled_connection.connection)] = pooled_connection
+
+        return pooled_connection.connection
+
+    def checkin(self, connection):
+        """
+        Return a connection to the pool. Any open transaction is rolled back.
+        """
+        with self._condition:
+            pooled_connection = self._checked_out_connections.pop(id(connection), None)
+            if pooled_connection is None:
+                return
+
+            should_keep = len(self._idle_connections) < self.pool_size \
+                and not self._is_expired(pooled_connection)
+
+            # Hold the slot until the connection is either idle or closed
+            self._pending_connection_count += 1
+
+        if should_keep:
+            try:
+                connection.rollback()
+            except mysql.connector.Error:
+                should_keep = False
+
+        if not should_keep:
+            self._close_quietly(pooled_connection)
+
+        with self._condition:
+            self._pending_connection_count -= 1
+            if should_keep:
+                self._idle_connections.append(pooled_connection)
+            self._condition.notify()
+
+    def close_all(self):
+        """
+        Close every idle connection. Checked out connections are closed
+        when they are checked back in.
+        """
+        with self._condition:
+            idle_connections = list(self._idle_connections)
+            self._idle_connections.clear()
+            self.pool_size = 0
+
+        for pooled_connection in idle_connections:
+            self._close_quietly(pooled_connection)
+
+    def _open_connection(self) -> _PooledConnection:
+        connection = self.db_config.connect()
+        if self.prepared_statement_cache_size > 0:
+            PreparedStatementCache.attach(connection, self.prepared_statement_cache_size)
+        return _PooledConnection(connection)
+
+    def _is_expired(self, pooled_connection: _PooledConnection) -> bool:
+        age = time.monotonic() - pooled_connection.created_at
+        return self.recycle_seconds is not None and age > self.recycle_seconds
+
+    def _is_usable(self, pooled_connection: _PooledConnection) -> bool:
+        if self._is_expired(pooled_connection):
+            return False
+        if self.pre_ping:
+            # Sends COM_PING to catch connections dropped by the server
+            # (e.g. wait_timeout or a restart)
+            return pooled_connection.connection.is_connected()
+        return True
+
+    @staticmethod
+    def _close_quietly(pooled_connection: _PooledConnection):
+        try:
+            pooled_connection.connection.close()
+        except mysql.connector.Error:
+            pass
@@ -0,0 +1,421 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import struct
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, date, time, timedelta
+from decimal import Decimal
+from itertools import islice
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional
+
+from models.export_column import ExportColumn, ExportColumnType
+
+try:
+    import zstandard
+except ImportError:
+    # Only needed for zstd-compressed exports
+    zstandard = None
+
+# Rows encoded at a time before they're written to the file
+ROWS_PER_WRITE = 1000
+GZIP_COMPRESSION_LEVEL = 6
+ZSTD_COMPRESSION_LEVEL = 3
+# Rows buffered per row group of a columnar file, which bounds the writer's memory use
+COLUMNAR_ROWS_PER_GROUP = 65536
+COLUMNAR_COMPRESSION_LEVEL = 6
+# Text columns are dictionary encoded when a group has at most this many distinct values per row
+COLUMNAR_MAX_DICTIONARY_RATIO = 0.5
+COLUMNAR_MAGIC = b'SBCOLS1\n'
+# Flags of a column in a row group of a columnar file
+COLUMN_HAS_NULLS = 1
+COLUMN_IS_DICTIONARY = 2
+
+# Datetimes are stored as microseconds since this, naive like the database's
+_EPOCH = datetime(1970, 1, 1)
+_UINT32 = struct.Struct('<I')
+_COLUMN_CHUNK_HEADER = struct.Struct('<BI')
+
+# Column type -> array typecode its values are packed as, besides TEXT
+_ARRAY_TYPECODES = {
+    ExportColumnType.SMALL_INT: 'b',
+    ExportColumnType.INT: 'q',
+    ExportColumnType.FLOAT: 'd',
+    ExportColumnType.DATETIME: 'q',
+}
+# What NULLs are packed as, besides 0
+_EMPTY_VALUES = {
+    ExportColumnType.TEXT: '',
+    ExportColumnType.DATETIME: _EPOCH,
+}
+
+
+@dataclass
+class WrittenExportFile:
+    # Rows written, not counting any header
+    row_count: int
+    # SHA-256 of the file's bytes, as written to disk
+    sha256: str
+
+
+def _batches(rows: Iterable[tuple], batch_size: int) -> Iterator[list[tuple]]:
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        yield batch
+
+
+class ExportWriter:
+    """
+    Writes rows to a binary stream as they arrive, in a format defined by
+    the subclass. `write_rows()` can be called any number of times, and
+    `finish()` writes whatever is still buffered without closing the stream.
+    """
+
+    def __init__(self, stream: BinaryIO, columns: list[ExportColumn], include_header: bool = True):
+        self.stream = stream
+        self.columns = columns
+        self.include_header = include_header
+
+    def write_rows(self, rows: Iterable[tuple]) -> int:
+        """
+        :return: the number of rows written
+        """
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+
+class CsvExportWriter(ExportWriter):
+    """
+    UTF-8 CSV, with a header row of the column names if `include_header`.
+    """
+
+    def __init__(self, stream: BinaryIO, columns: list[ExportColumn], include_header: bool = True):
+        super().__init__(stream, columns, include_header)
+        self._text = io.StringIO()
+        self._csv_writer = csv.writer(self._text)
+        if include_header and columns:
+            self._csv_writer.writerow([column.name for column in columns])
+            self._write_text()
+
+    def write_rows(self, rows: Iterable[tuple]) -> int:
+        row_count = 0
+        for batch in _batches(rows, ROWS_PER_WRITE):
+            self._csv_writer.writerows(batch)
+            self._write_text()
+            row_count += len(batch)
+        return row_count
+
+    def _write_text(self):
+        self.stream.write(self._text.getvalue().encode('utf-8'))
+        self._text.seek(0)
+        self._text.truncate()
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    raise TypeError(f"Can't export {type(value).__name__} values as JSON")
+
+
+class JsonLinesExportWriter(ExportWriter):
+    """
+    One JSON object per row, keyed by column name, on its own line.
+    Datetimes are written in ISO 8601. There's never a header.
+    """
+
+    def __init__(self, stream: BinaryIO, columns: list[ExportColumn], include_header: bool = True):
+        super().__init__(stream, columns, include_header)
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_json_value)
+
+    def write_rows(self, rows: Iterable[tuple]) -> int:
+        column_names = [column.name for column in self.columns]
+        row_count = 0
+        for batch in _batches(rows, ROWS_PER_WRITE):
+            lines = [self._encoder.encode(dict(zip(column_names, row))) for row in batch]
+            self.stream.write(('\n'.join(lines) + '\n').encode('utf-8'))
+            row_count += len(batch)
+        return row_count
+
+
+def _to_microseconds(value) -> int:
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time())
+    return (value.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+
+def _to_text_bytes(value) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return (value if isinstance(value, str) else str(value)).encode('utf-8')
+
+def _pack_array(typecode: str, values: Iterable) -> bytes:
+    packed_values = array(typecode, values)
+    if sys.byteorder == 'big':
+        packed_values.byteswap()
+    return packed_values.tobytes()
+
+def _unpack_array(typecode: str, data: bytes) -> array:
+    packed_values = array(typecode)
+    packed_values.frombytes(data)
+    if sys.byteorder == 'big':
+        packed_values.byteswap()
+    return packed_values
+
+def _index_typecode(dictionary_size: int) -> str:
+    if dictionary_size <= 0x100:
+        return 'B'
+    return 'H' if dictionary_size <= 0x10000 else 'I'
+
+def _pack_text(values: list) -> bytes:
+    encoded_values = [_to_text_bytes(value) for value in values]
+    return _pack_array('I', map(len, encoded_values)) + b''.join(encoded_values)
+
+def _unpack_text(data: bytes, value_count: int) -> tuple[list[str], int]:
+    """
+    :return: the values, and the offset in `data` just past them
+    """
+    lengths_end = value_count * array('I').itemsize
+    values = []
+    offset = lengths_end
+    for length in _unpack_array('I', data[:lengths_end]):
+        values.append(data[offset:offset + length].decode('utf-8'))
+        offset += length
+    return values, offset
+
+def _pack_column_values(column_type: ExportColumnType, values: list) -> tuple[bytes, bool]:
+    """
+    :return: the packed values, and whether they're dictionary encoded
+    """
+    if column_type != ExportColumnType.TEXT:
+        if column_type == ExportColumnType.DATETIME:
+            values = [_to_microseconds(value) for value in values]
+        return _pack_array(_ARRAY_TYPECODES[column_type], values), False
+
+    dictionary = {}
+    indexes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+    if len(dictionary) > len(values) * COLUMNAR_MAX_DICTIONARY_RATIO:
+        return _pack_text(values), False
+
+    return (
+        _UINT32.pack(len(dictionary))
+        + _pack_text(list(dictionary))
+        + _pack_array(_index_typecode(len(dictionary)), indexes)
+    ), True
+
+def _unpack_column_values(column_type: ExportColumnType, data: bytes, row_count: int, is_dictionary: bool) -> list:
+    if column_type == ExportColumnType.TEXT and is_dictionary:
+        dictionary_size, = _UINT32.unpack_from(data)
+        dictionary, indexes_start = _unpack_text(data[_UINT32.size:], dictionary_size)
+        indexes = _unpack_array(_index_typecode(dictionary_size), data[_UINT32.size + indexes_start:])
+        return [dictionary[index] for index in indexes]
+
+    if column_type == ExportColumnType.TEXT:
+        return _unpack_text(data, row_count)[0]
+
+    values = _unpack_array(_ARRAY_TYPECODES[column_type], data)
+    if column_type == ExportColumnType.DATETIME:
+        return [_EPOCH + timedelta(microseconds=value) for value in values]
+    return values.tolist()
+
+
+class ColumnarExportWriter(ExportWriter):
+    """
+    A typed columnar format, which is much smaller than CSV and loads
+    without parsing text. Rows are buffered into groups of up to
+    COLUMNAR_ROWS_PER_GROUP, and each group is written a column at a time,
+    packed by the column's type and compressed on its own. Enum columns,
+    like attendance_status, take one byte per row before compression.
+
+    Little-endian throughout, the file holds:
+    - COLUMNAR_MAGIC, then a uint32 length and that much UTF-8 JSON listing
+      the columns' names and types
+    - for each row group, a uint32 row count, then for each column a uint8
+      of flags (COLUMN_HAS_NULLS, COLUMN_IS_DICTIONARY), a uint32 length and
+      that many bytes of zlib data: a byte per row (1 for NULL) if it has
+      NULLs, then the values
+    - a uint32 0 after the last group
+
+    Values are packed as int8 (SMALL_INT), int64 (INT, and DATETIME as
+    microseconds since 1970), float64 (FLOAT), or for TEXT, uint32 UTF-8
+    lengths followed by the UTF-8 bytes. TEXT with few distinct values in
+    a group, like course titles, is dictionary encoded instead: a uint32
+    count of distinct values, those values packed as TEXT, then each row's
+    index into them as the smallest of uint8, uint16 and uint32 that fits.
+    NULLs are packed as 0 or ''. Read the files back with `read_columnar_file()`.
+    """
+
+    def __init__(self, stream: BinaryIO, columns: list[ExportColumn], include_header: bool = True):
+        super().__init__(stream, columns, include_header)
+        schema = json.dumps({
+            'columns': [{'name': column.name, 'type': column.column_type.value} for column in columns],
+        }).encode('utf-8')
+        self.stream.write(COLUMNAR_MAGIC + _UINT32.pack(len(schema)) + schema)
+
+    def write_rows(self, rows: Iterable[tuple]) -> int:
+        row_count = 0
+        for row_group in _batches(rows, COLUMNAR_ROWS_PER_GROUP):
+            self._write_row_group(row_group)
+            row_count += len(row_group)
+        return row_count
+
+    def finish(self):
+        self.stream.write(_UINT32.pack(0))
+
+    def _write_row_group(self, row_group: list[tuple]):
+        self.stream.write(_UINT32.pack(len(row_group)))
+        for column, values in zip(self.columns, zip(*row_group)):
+            flags = 0
+            null_mask = b''
+            if None in values:
+                flags |= COLUMN_HAS_NULLS
+                null_mask = bytes(value is None for value in values)
+                empty_value = _EMPTY_VALUES.get(column.column_type, 0)
+                values = [empty_value if value is None else value for value in values]
+
+            packed_values, is_dictionary = _pack_column_values(column.column_type, values)
+            if is_dictionary:
+                flags |= COLUMN_IS_DICTIONARY
+
+            compressed_data = zlib.compress(null_mask + packed_values, COLUMNAR_COMPRESSION_LEVEL)
+            self.stream.write(_COLUMN_CHUNK_HEADER.pack(flags, len(compressed_data)) + compressed_data)
+
+
+def _read_exactly(binary_file: BinaryIO, size: int) -> bytes:
+    data = binary_file.read(size)
+    if len(data) != size:
+        raise ValueError("Columnar file ends early")
+    return data
+
+def read_columnar_file(binary_file: BinaryIO) -> tuple[list[ExportColumn], Iterator[tuple]]:
+    """
+    Read a file written by ColumnarExportWriter, a row group at a time.
+
+    :return: the file's columns, and an iterator over its rows
+    :raises ValueError if it isn't a columnar export file
+    """
+    if binary_file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ValueError("Not a columnar export file")
+
+    schema_length, = _UINT32.unpack(_read_exactly(binary_file, _UINT32.size))
+    schema = json.loads(_read_exactly(binary_file, schema_length))
+    columns = [ExportColumn(column['name'], ExportColumnType(column['type'])) for column in schema['columns']]
+
+    def read_rows() -> Iterator[tuple]:
+        while row_count := _UINT32.unpack(_read_exactly(binary_file, _UINT32.size))[0]:
+            column_values = []
+            for column in columns:
+                flags, data_length = _COLUMN_CHUNK_HEADER.unpack(_read_exactly(binary_file, _COLUMN_CHUNK_HEADER.size))
+                data = zlib.decompress(_read_exactly(binary_file, data_length))
+
+                null_mask = b''
+                if flags & COLUMN_HAS_NULLS:
+                    null_mask, data = data[:row_count], data[row_count:]
+                values = _unpack_column_values(column.column_type, data, row_count, bool(flags & COLUMN_IS_DICTIONARY))
+                if null_mask:
+                    values = [None if is_null else value for is_null, value in zip(null_mask, values)]
+                column_values.append(values)
+
+            yield from zip(*column_values)
+
+    return columns, read_rows()
+
+
+def _open_gzip(stream: BinaryIO) -> BinaryIO:
+    # A fixed mtime keeps the checksums of identical exports identical
+    return gzip.GzipFile(fileobj=stream, mode='wb', compresslevel=GZIP_COMPRESSION_LEVEL, mtime=0)
+
+def _open_zstd(stream: BinaryIO) -> BinaryIO:
+    return zstandard.ZstdCompressor(level=ZSTD_COMPRESSION_LEVEL).stream_writer(stream, closefd=False)
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    name: str
+    # Replaces .csv at the end of export file names
+    extension: str
+    writer_class: type[ExportWriter]
+    # Wraps the file in a compressing stream, which is closed once the writer finishes
+    open_compressed: Optional[Callable[[BinaryIO], BinaryIO]] = None
+    # False if it needs a package that isn't installed
+    is_available: bool = True
+
+    def file_name(self, csv_file_name: str) -> str:
+        return csv_file_name.removesuffix('.csv') + self.extension
+
+
+CSV = ExportFormat('csv', '.csv', CsvExportWriter)
+GZIP_CSV = ExportFormat('csv.gz', '.csv.gz', CsvExportWriter, _open_gzip)
+ZSTD_CSV = ExportFormat('csv.zst', '.csv.zst', CsvExportWriter, _open_zstd, is_available=zstandard is not None)
+JSON_LINES = ExportFormat('jsonl', '.jsonl', JsonLinesExportWriter)
+COLUMNAR = ExportFormat('columnar', '.cols', ColumnarExportWriter)
+
+EXPORT_FORMATS = {
+    export_format.name: export_format
+    for export_format in (CSV, GZIP_CSV, ZSTD_CSV, JSON_LINES, COLUMNAR)
+}
+
+
+def get_export_format(name: str) -> ExportFormat:
+    """
+    :raises ValueError if there's no such format, or it isn't available
+    """
+    export_format = EXPORT_FORMATS.get(name)
+    if not export_format:
+        raise ValueError(f"Unknown export format {name}")
+    if not export_format.is_available:
+        raise ValueError(f"The {name} export format needs the zstandard package, which isn't installed")
+    return export_format
+
+def get_available_export_formats() -> list[ExportFormat]:
+    return [export_format for export_format in EXPORT_FORMATS.values() if export_format.is_available]
+
+
+class _HashingFile:
+    """
+    Passes writes through to a binary file while hashing them.
+    """
+
+    def __init__(self, binary_file: BinaryIO):
+        self.binary_file = binary_file
+        self.hash = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self.hash.update(data)
+        return self.binary_file.write(data)
+
+    def flush(self):
+        self.binary_file.flush()
+
+
+def write_export_file(
+    path: str,
+    rows: Iterable[tuple],
+    columns: list[ExportColumn],
+    export_format: ExportFormat = CSV,
+    include_header: bool = True
+) -> WrittenExportFile:
+    """
+    Write rows to a file in `export_format` as they arrive.
+
+    :param include_header: whether CSV files start with the column names.
+    The other formats always describe their columns.
+    """
+    with open(path, 'wb') as export_file:
+        hashing_file = _HashingFile(export_file)
+        stream = export_format.open_compressed(hashing_file) if export_format.open_compressed else hashing_file
+        writer = export_format.writer_class(stream, columns, include_header)
+        row_count = writer.write_rows(rows)
+        writer.finish()
+        if stream is not hashing_file:
+            stream.close()
+
+    return WrittenExportFile(row_count=row_count, sha256=hashing_file.hash.hexdigest())
@@ -0,0 +1,282 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
+
+from config import EXPORT_JOB_WORKER_COUNT, EXPORT_JOB_STALE_SECONDS, EXPORT_JOB_PROGRESS_INTERVAL_SECONDS
+from custom_exceptions import CancelledException, NotFoundException
+from datarepos.export_job_repo import ExportJobRepo
+from datarepos.export_repo import ExportRepo, STUDENT_COUNT_PER_CLASS_COLUMNS
+from db_connection_details import DBConnectionDetails
+from export_formats import ExportFormat, CSV, get_export_format, write_export_file
+from models.export_job import ExportJob, ExportJobStatus
+from snapshot_export import export_tables_from_snapshot
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIRECTORY = 'exports'
+
+TABLE_EXPORT_FILE_NAMES = {
+    'course': 'courses.csv',
+    'user': 'users.csv',
+    'page': 'pages.csv',
+    'file': 'files.csv',
+    'page_file_bridge': 'page_file_bridge.csv',
+    'attendance_session': 'attendance_sessions.csv',
+    'attendance_record': 'attendance_record.csv',
+}
+STUDENT_COUNT_PER_CLASS_FILE_NAME = 'student_count_per_class.csv'
+STUDENT_COUNT_PER_CLASS_HEADER = [column.name for column in STUDENT_COUNT_PER_CLASS_COLUMNS]
+ATTENDANCE_RECORDS_AND_STUDENTS_FILE_NAME = 'attendance_records_and_students.csv'
+ATTENDANCE_RECORDS_AND_STUDENTS_HEADER = [
+    'full_name', 'email', 'user_id', 'attendance_session_id', 'attendance_status', 'title', 'user_friendly_class_code'
+]
+
+
+class ExportJobProgress:
+    """
+    Counts the rows a job has written to each file, and saves the counts
+    every `interval_seconds`. Raises CancelledException in whichever thread
+    is writing rows once an admin has asked the job to cancel.
+
+    Safe to share between the threads of one job.
+    """
+
+    def __init__(self, export_job_repo: ExportJobRepo, export_job_id: int, interval_seconds: float):
+        self.export_job_repo = export_job_repo
+        self.export_job_id = export_job_id
+        self.interval_seconds = interval_seconds
+        self.rows_written: dict[str, int] = {}
+        self.cancelled = False
+
+        self._last_saved_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def track(self, file_name: str, rows: Iterator[tuple]) -> Iterator[tuple]:
+        self.rows_written[file_name] = 0
+        for row in rows:
+            if self.cancelled:
+                raise CancelledException
+
+            yield row
+            self.rows_written[file_name] += 1
+
+            if time.monotonic() - self._last_saved_at >= self.interval_seconds:
+                self.save()
+
+    def save(self):
+        with self._lock:
+            self._last_saved_at = time.monotonic()
+            if self.export_job_repo.update_export_job_progress(self.export_job_id, dict(self.rows_written)):
+                self.cancelled = True
+
+def export_tables(
+    db_config: DBConnectionDetails,
+    directory: str,
+    progress: ExportJobProgress,
+    export_format: ExportFormat,
+    only_changes: bool = False,
+    advance_high_water_marks: bool = False
+):
+    """
+    Export every table, or only what changed since the last export of each
+    one.
+
+    Reads from the primary, since the high-water marks are primary
+    timestamps that replicas may not have caught up to.
+
+    :param advance_high_water_marks: move the tables' marks up to the new
+    snapshot, dropping the tombstones up to it. Only the delta exports do,
+    so an ad-hoc full export doesn't eat changes the delta consumer hasn't
+    pulled yet.
+    """
+    export_repo = ExportRepo(connection=db_config.connect())
+    try:
+        changed_after = export_repo.get_high_water_marks() if only_changes else None
+        snapshot_export = export_tables_from_snapshot(
+            db_config,
+            TABLE_EXPORT_FILE_NAMES,
+            directory,
+            track_rows=progress.track,
+            changed_after=changed_after,
+            export_format=export_format,
+        )
+        if advance_high_water_marks:
+            export_repo.save_high_water_marks(list(TABLE_EXPORT_FILE_NAMES), snapshot_export.snapshot_taken_at)
+    finally:
+        export_repo.close_connection()
+
+def export_table_changes(
+    db_config: DBConnectionDetails,
+    directory: str,
+    progress: ExportJobProgress,
+    export_format: ExportFormat
+):
+    export_tables(db_config, directory, progress, export_format, only_changes=True, advance_high_water_marks=True)
+
+def export_table_changes_full_refresh(
+    db_config: DBConnectionDetails,
+    directory: str,
+    progress: ExportJobProgress,
+    export_format: ExportFormat
+):
+    """
+    Restart the delta exports from a full export of every table.
+    """
+    export_tables(db_config, directory, progress, export_format, advance_high_water_marks=True)
+
+def export_student_count_per_class(
+    db_config: DBConnectionDetails,
+    directory: str,
+    progress: ExportJobProgress,
+    export_format: ExportFormat
+):
+    file_name = export_format.file_name(STUDENT_COUNT_PER_CLASS_FILE_NAME)
+    export_repo = ExportRepo(connection=db_config.read_only_config().connect())
+    try:
+        write_export_file(
+            os.path.join(directory, file_name),
+            progress.track(file_name, export_repo.stream_student_count_per_class_rows()),
+            STUDENT_COUNT_PER_CLASS_COLUMNS,
+            export_format,
+        )
+    finally:
+        export_repo.close_connection()
+
+def export_attendance_records_and_students(
+    db_config: DBConnectionDetails,
+    directory: str,
+    progress: ExportJobProgress,
+    export_format: ExportFormat
+):
+    file_name = export_format.file_name(ATTENDANCE_RECORDS_AND_STUDENTS_FILE_NAME)
+    export_repo = ExportRepo(connection=db_config.read_only_config().connect())
+    try:
+        write_export_file(
+            os.path.join(directory, file_name),
+            progress.track(file_name, export_repo.stream_attendance_records_and_students_rows()),
+            export_repo.get_attendance_records_and_students_columns(),
+            export_format,
+        )
+    finally:
+        export_repo.close_connection()
+
+# Export type -> function writing its files into a directory in a format, given the primary database
+EXPORTS: dict[str, Callable[[DBConnectionDetails, str, ExportJobProgress, ExportFormat], None]] = {
+    'tables': export_tables,
+    'table_changes': export_table_changes,
+    'table_changes_full_refresh': export_table_changes_full_refresh,
+    'student_count_per_class': export_student_count_per_class,
+    'attendance_records_and_students': export_attendance_records_and_students,
+}
+
+
+class ExportJobRunner:
+    """
+    Runs admin exports on a small thread pool in the background, so the
+    request that starts one returns right away.
+
+    Jobs are tracked in the export_job table, where admins can follow
+    their progress, cancel them and download their files once they
+    succeed. Starting an export that's already queued or running, from
+    any process, returns the existing job instead of starting another.
+    """
+
+    def __init__(
+        self,
+        db_config: DBConnectionDetails,
+        export_directory: str = EXPORT_DIRECTORY,
+        worker_count: int = EXPORT_JOB_WORKER_COUNT,
+        stale_after_seconds: float = EXPORT_JOB_STALE_SECONDS,
+        progress_interval_seconds: float = EXPORT_JOB_PROGRESS_INTERVAL_SECONDS,
+    ):
+        self.db_config = db_config
+        self.export_directory = export_directory
+        self.stale_after_seconds = stale_after_seconds
+        self.progress_interval_seconds = progress_interval_seconds
+        self._executor = ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix='export-job')
+
+    def job_directory(self, export_job_id: int) -> str:
+        return os.path.join(self.export_directory, 'jobs', str(export_job_id))
+
+    def job_file_names(self, export_job: ExportJob) -> list[str]:
+        """
+        Files a job produced, which can be downloaded once it has succeeded.
+        """
+        if export_job.status != ExportJobStatus.SUCCEEDED:
+            return []
+
+        job_directory = self.job_directory(export_job.export_job_id)
+        return sorted(os.listdir(job_directory)) if os.path.isdir(job_directory) else []
+
+    def submit(self, export_type: str, export_format_name: str = CSV.name) -> tuple[ExportJob, bool]:
+        """
+        Queue an export, or find the same one already queued or running.
+
+        The job is committed on its own connection before it's queued,
+        so the worker thread can always see it.
+
+        :return: the job, and whether it's new
+        :raises ValueError if the export type or format doesn't exist, or the format isn't available
+        """
+        if export_type not in EXPORTS:
+            raise ValueError(f"Unknown export type {export_type}")
+        get_export_format(export_format_name)
+
+        export_job_repo = ExportJobRepo(connection=self.db_config.connect())
+        try:
+            export_job, is_new = export_job_repo.add_export_job_or_get_active(
+                export_type,
+                self.stale_after_seconds,
+                export_format_name,
+            )
+        finally:
+            export_job_repo.close_connection()
+
+        if is_new:
+            self._executor.submit(self._run, export_job)
+        return export_job, is_new
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, export_job: ExportJob):
+        export_job_repo = ExportJobRepo(connection=self.db_config.connect())
+        try:
+            try:
+                export_job_repo.mark_export_job_running(export_job.export_job_id)
+            except NotFoundException:
+                # Cancelled while it was queued
+                return
+
+            self._export(export_job_repo, export_job)
+        except Exception:
+            logger.exception("Couldn't record the result of export job %s", export_job.export_job_id)
+        finally:
+            export_job_repo.close_connection()
+
+    def _export(self, export_job_repo: ExportJobRepo, export_job: ExportJob):
+        job_directory = self.job_directory(export_job.export_job_id)
+        os.makedirs(job_directory, exist_ok=True)
+        progress = ExportJobProgress(export_job_repo, export_job.export_job_id, self.progress_interval_seconds)
+
+        try:
+            export_format = get_export_format(export_job.export_format)
+            EXPORTS[export_job.export_type](self.db_config, job_directory, progress, export_format)
+        except CancelledException:
+            shutil.rmtree(job_directory, ignore_errors=True)
+            export_job_repo.finish_export_job(export_job.export_job_id, ExportJobStatus.CANCELLED, progress.rows_written)
+        except Exception as e:
+            logger.exception("Export job %s failed", export_job.export_job_id)
+            shutil.rmtree(job_directory, ignore_errors=True)
+            export_job_repo.finish_export_job(
+                export_job.export_job_id,
+                ExportJobStatus.FAILED,
+                progress.rows_written,
+                error_message=str(e) or type(e).__name__,
+            )
+        else:
+            export_job_repo.finish_export_job(export_job.export_job_id, ExportJobStatus.SUCCEEDED, progress.rows_written)
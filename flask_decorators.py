@@ -1,19 +1,44 @@
 from functools import wraps
+from typing import Optional
 
 from flask import g, redirect, render_template
 
-from flask_helpers import get_user_from_session
+from flask_helpers import get_user_from_session, load_request_context
 from flask_repository_getters import get_course_repository, get_content_repository
 from models.course_enrollment import Role
 from models.page import VisibilitySetting
+from models.request_context import RequestContext
 
+# The course decorators leave their routing arg keys on the view function
+# (functools.wraps copies them outwards), so requires_login can load
+# everything they check in one go before they run
+COURSE_URL_ROUTING_ARG_KEY_ATTRIBUTE = "_course_url_routing_arg_key"
+CUSTOM_PATH_ROUTING_ARG_KEY_ATTRIBUTE = "_custom_path_routing_arg_key"
+
+
+def get_url_path_from_routing_args(kwargs: dict, custom_path_routing_arg_key: str) -> str:
+    if custom_path_routing_arg_key not in kwargs:
+        return "/"
+    return "/" + kwargs[custom_path_routing_arg_key]
+
+def get_loaded_request_context() -> Optional[RequestContext]:
+    return getattr(g, '_request_context', None)
 
 def requires_login(should_redirect: bool):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             if "user" not in g or g.user is None:
-                user = get_user_from_session()
+                course_url_routing_arg_key = getattr(f, COURSE_URL_ROUTING_ARG_KEY_ATTRIBUTE, None)
+                custom_path_routing_arg_key = getattr(f, CUSTOM_PATH_ROUTING_ARG_KEY_ATTRIBUTE, None)
+
+                if course_url_routing_arg_key in kwargs:
+                    url_path = get_url_path_from_routing_args(kwargs, custom_path_routing_arg_key) \
+                        if custom_path_routing_arg_key else None
+                    user = load_request_context("/" + kwargs[course_url_routing_arg_key], url_path).user
+                else:
+                    user = get_user_from_session()
+
                 if user is None and should_redirect:
                     return redirect("/sign-in")
                 elif user is None:
@@ -31,12 +56,19 @@ def requires_course_enrollment(course_url_routing_arg_key: str, required_role: R
             if course_url_routing_arg_key not in kwargs:
                 raise ValueError(f"key {course_url_routing_arg_key} must be provided as Flask routing argument")
 
-            course_repo = get_course_repository()
-            course = course_repo.get_course_by_starting_url_if_exists("/" + kwargs[course_url_routing_arg_key])
+            request_context = get_loaded_request_context()
+            if request_context:
+                course = request_context.course
+            else:
+                course_repo = get_course_repository()
+                course = course_repo.get_course_by_starting_url_if_exists("/" + kwargs[course_url_routing_arg_key])
             if not course:
                 return render_template("404.html"), 404
 
-            role = course_repo.get_user_role_in_class_if_exists(g.user.user_id, course.course_id)
+            if request_context:
+                role = request_context.role
+            else:
+                role = course_repo.get_user_role_in_class_if_exists(g.user.user_id, course.course_id)
             if not role:
                 return render_template(
                     "401.html",
@@ -55,6 +87,8 @@ def requires_course_enrollment(course_url_routing_arg_key: str, required_role: R
             g.nav_links = content_repository.generate_listed_page_navigation_link_tree_for_course_id(g.course.course_id)
 
             return f(*args, **kwargs)
+
+        setattr(decorated_function, COURSE_URL_ROUTING_ARG_KEY_ATTRIBUTE, course_url_routing_arg_key)
         return decorated_function
     return decorator
 
@@ -64,14 +98,15 @@ def requires_course_page(custom_path_routing_arg_key: str, custom_path_is_requir
         def decorated_function(*args, **kwargs):
             if custom_path_routing_arg_key not in kwargs and custom_path_is_required:
                 raise ValueError(f"key {custom_path_routing_arg_key} must be provided as Flask routing argument")
-            elif custom_path_routing_arg_key not in kwargs:
-                url_path = "/"
-            else:
-                url_path = "/" + kwargs[custom_path_routing_arg_key]
+            url_path = get_url_path_from_routing_args(kwargs, custom_path_routing_arg_key)
 
-            content_repo = get_content_repository()
+            request_context = get_loaded_request_context()
+            if request_context:
+                page = request_context.page
+            else:
+                content_repo = get_content_repository()
+                page = content_repo.get_page_by_url_and_course_id_if_exists(course_id=g.course.course_id, url_path=url_path)
 
-            page = content_repo.get_page_by_url_and_course_id_if_exists(course_id=g.course.course_id, url_path=url_path)
             if not page:
                 return render_template(
                     "course_static_page.html",
@@ -94,6 +129,7 @@ def requires_course_page(custom_path_routing_arg_key: str, custom_path_is_requir
 
             g.page = page
             return f(*args, **kwargs)
+
+        setattr(decorated_function, CUSTOM_PATH_ROUTING_ARG_KEY_ATTRIBUTE, custom_path_routing_arg_key)
         return decorated_function
     return decorator
-
@@ -1,11 +1,100 @@
-from flask import session
+from typing import Optional
 
-from flask_repository_getters import get_user_repository
+from flask import session, current_app, g
 
+from caches.course_enrollment_cache import CourseEnrollmentCache
+from caches.page_cache import PageCache
+from caches.user_session_cache import UserSessionCache
+from flask_repository_getters import get_user_repository, get_request_context_repository, get_content_repository
+from models.request_context import RequestContext
+from models.user import User
+
+# Session key holding the user's session_version when they signed in
+SESSION_VERSION_SESSION_KEY = "session_version"
+
+
+def sign_in_to_session(user: User):
+    session["user_uuid"] = user.user_uuid
+    session[SESSION_VERSION_SESSION_KEY] = user.session_version
+
+def sign_out_of_session():
+    session.pop("user_uuid", None)
+    session.pop(SESSION_VERSION_SESSION_KEY, None)
+
+def is_session_current(user: Optional[User]) -> bool:
+    # False if the user was deleted, or signed out of all their sessions since this one began
+    return user is not None and user.session_version == session.get(SESSION_VERSION_SESSION_KEY, 0)
 
 def get_user_from_session():
-    user = None
-    if "user_uuid" in session and session["user_uuid"]:
+    if "user_uuid" not in session or not session["user_uuid"]:
+        return None
+
+    user_session_cache: Optional[UserSessionCache] = current_app.config.get("USER_SESSION_CACHE")
+    user = user_session_cache.get(session["user_uuid"]) if user_session_cache else None
+    if user is None:
         user_repo = get_user_repository()
-        user = user_repo.get_user_from_uuid_if_exists(session["user_uuid"])
+        with user_repo.reading_for_cache(bool(user_session_cache)):
+            user = user_repo.get_user_from_uuid_if_exists(session["user_uuid"])
+        if user and user_session_cache:
+            user_session_cache.put(user)
+
+    if not is_session_current(user):
+        sign_out_of_session()
+        return None
+
     return user
+
+def load_request_context(starting_url_path: str, url_path: Optional[str] = None) -> RequestContext:
+    """
+    Look up the signed-in user, the course at `starting_url_path`, their role
+    in it and the page at `url_path`, and keep them in `g` for the course
+    decorators. Served from the caches when they have the user, course and
+    role, and otherwise from one joined query.
+    """
+    if "user_uuid" not in session or not session["user_uuid"]:
+        g._request_context = RequestContext()
+        return g._request_context
+    user_uuid = session["user_uuid"]
+
+    user_session_cache: Optional[UserSessionCache] = current_app.config.get("USER_SESSION_CACHE")
+    course_enrollment_cache: Optional[CourseEnrollmentCache] = current_app.config.get("COURSE_ENROLLMENT_CACHE")
+    page_cache: Optional[PageCache] = current_app.config.get("PAGE_CACHE")
+
+    user = user_session_cache.get(user_uuid) if user_session_cache else None
+    course = course_enrollment_cache.get_course(starting_url_path) if course_enrollment_cache else None
+    role = course_enrollment_cache.get_role(user.user_id, course.course_id) \
+        if course_enrollment_cache and user and course else None
+
+    if user and course and role:
+        request_context = RequestContext(user=user, course=course, role=role)
+        if url_path is not None:
+            content_repo = get_content_repository()
+
+            def fetch_page():
+                with content_repo.reading_for_cache(bool(page_cache)):
+                    return content_repo.get_page_by_url_and_course_id_if_exists(course.course_id, url_path)
+
+            request_context.page = page_cache.get_or_fetch(course.course_id, url_path, fetch_page) \
+                if page_cache else fetch_page()
+    else:
+        generation = course_enrollment_cache.generation if course_enrollment_cache else None
+
+        request_context_repo = get_request_context_repository()
+        with request_context_repo.reading_for_cache(bool(user_session_cache or course_enrollment_cache)):
+            request_context = request_context_repo.get_request_context(user_uuid, starting_url_path, url_path)
+
+        if user_session_cache and request_context.user:
+            user_session_cache.put(request_context.user)
+        if course_enrollment_cache and request_context.course:
+            course_enrollment_cache.put_course(request_context.course, generation)
+            if request_context.role:
+                course_enrollment_cache.put_role(
+                    request_context.user.user_id, request_context.course.course_id, request_context.role, generation
+                )
+
+    if not is_session_current(request_context.user):
+        sign_out_of_session()
+        request_context = RequestContext()
+
+    g._request_context = request_context
+    return request_context
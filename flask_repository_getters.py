@@ -1,53 +1,174 @@
+import random
+import time
 from typing import Optional
 
-import mysql.connector
-from flask import g, current_app
+from flask import g, current_app, session
 
 from datarepos.attendance_repo import AttendanceRepo
 from datarepos.content_repo import ContentRepo
 from datarepos.course_repo import CourseRepo
+from datarepos.export_job_repo import ExportJobRepo
+from datarepos.export_repo import ExportRepo
+from datarepos.request_context_repo import RequestContextRepo
+from datarepos.unit_of_work import UnitOfWork
 from datarepos.user_repo import UserRepo
+from db_connection_details import DBConnectionDetails
+from db_connection_pool import DBConnectionPool
+from models.page import Page
+
+# Session key holding the time until which the user's reads go to the primary
+PRIMARY_READS_UNTIL_SESSION_KEY = "primary_reads_until"
+
+
+def checkout_pooled_connection(pool: Optional[DBConnectionPool]):
+    if not pool:
+        raise RuntimeError("No database configured.")
+
+    connection = pool.checkout()
+
+    # Returned to the pool in release_unit_of_work
+    if "_pooled_connections" not in g:
+        g._pooled_connections = []
+    g._pooled_connections.append((pool, connection))
+
+    return connection
+
+def checkout_primary_connection():
+    return checkout_pooled_connection(current_app.config.get("DB_CONNECTION_POOL"))
+
+def checkout_replica_connection():
+    replica_pools: list[DBConnectionPool] = current_app.config["DB_REPLICA_CONNECTION_POOLS"]
+    return checkout_pooled_connection(random.choice(replica_pools))
+
+def get_unit_of_work() -> UnitOfWork:
+    """
+    Get the unit of work for the current request. All repos share its
+    connection, and their writes are committed together in
+    `commit_unit_of_work` after the view returns.
+
+    Reads go to a replica, if any are configured, unless the user wrote
+    something within the last DB_READ_YOUR_WRITES_SECONDS. Cache fills
+    read from a primary connection of their own.
+    """
+    unit_of_work: Optional[UnitOfWork] = getattr(g, '_unit_of_work', None)
+    if not unit_of_work:
+        has_replicas = bool(current_app.config.get("DB_REPLICA_CONNECTION_POOLS"))
+        recently_wrote = session.get(PRIMARY_READS_UNTIL_SESSION_KEY, 0) > time.time()
+
+        unit_of_work = g._unit_of_work = UnitOfWork(
+            connection_provider=checkout_primary_connection,
+            replica_connection_provider=checkout_replica_connection if has_replicas else None,
+            pin_reads_to_primary=recently_wrote,
+            cache_fill_connection_provider=checkout_primary_connection,
+        )
+        unit_of_work.begin()
+    return unit_of_work
+
+def commit_unit_of_work(response):
+    # Runs before the response is sent, so a failed commit
+    # turns into an error instead of a silent data loss.
+    # Flask also runs it for the 500 of a view that raised, whose
+    # partial writes are left for `release_unit_of_work` to roll back
+    unit_of_work: Optional[UnitOfWork] = getattr(g, '_unit_of_work', None)
+    if unit_of_work and unit_of_work.in_transaction and response.status_code < 500:
+        unit_of_work.end()
+
+        if unit_of_work.has_writes and current_app.config.get("DB_REPLICA_CONNECTION_POOLS"):
+            session[PRIMARY_READS_UNTIL_SESSION_KEY] = \
+                time.time() + current_app.config["DB_READ_YOUR_WRITES_SECONDS"]
+    return response
+
+def release_unit_of_work(exception: Optional[BaseException] = None):
+    unit_of_work: Optional[UnitOfWork] = g.pop('_unit_of_work', None)
+    if unit_of_work:
+        # Only still open if the view raised or failed, or the commit failed
+        while unit_of_work.in_transaction:
+            unit_of_work.end(exception or RuntimeError("Request ended before commit"))
+
+    for pool, connection in g.pop('_pooled_connections', []):
+        pool.checkin(connection)
+
+def store_rendered_page_html(page: Page, starting_url_path: str, page_html: str):
+    """
+    Save HTML rendered on read on a connection of its own, committed right
+    away. Done through the request's unit of work, it would count as the
+    user's write: the rest of the request's reads, and the user's next
+    requests, would go to the primary just for viewing a page.
+    """
+    pool: DBConnectionPool = current_app.config["DB_CONNECTION_POOL"]
+    connection = pool.checkout()
+    try:
+        ContentRepo(connection).store_rendered_page_html(page, starting_url_path, page_html)
+    finally:
+        pool.checkin(connection)
 
 def get_content_repository():
     repository: Optional[ContentRepo] = getattr(g, '_content_repository', None)
-    if not repository or not repository.connection_is_open:
-        config = vars(current_app.config["DB_CONFIG_OBJECT"])
-        if not config:
-            raise RuntimeError("No database configured.")
-
-        connection = mysql.connector.connect(**config)
-        repository = g._content_repository = ContentRepo(connection)
+    if not repository:
+        repository = g._content_repository = ContentRepo(
+            unit_of_work=get_unit_of_work(),
+            nav_tree_cache=current_app.config.get("NAV_TREE_CACHE"),
+            invalidation_bus=current_app.config.get("INVALIDATION_BUS"),
+        )
     return repository
 
 def get_user_repository():
     repository: Optional[UserRepo] = getattr(g, '_user_repository', None)
-    if not repository or not repository.connection_is_open:
-        config = vars(current_app.config["DB_CONFIG_OBJECT"])
-        if not config:
-            raise RuntimeError("No database configured.")
-
-        connection = mysql.connector.connect(**config)
-        repository = g._user_repository = UserRepo(connection)
+    if not repository:
+        repository = g._user_repository = UserRepo(
+            unit_of_work=get_unit_of_work(),
+            invalidation_bus=current_app.config.get("INVALIDATION_BUS"),
+        )
     return repository
 
 def get_course_repository():
     repository: Optional[CourseRepo] = getattr(g, '_course_repository', None)
-    if not repository or not repository.connection_is_open:
-        config = vars(current_app.config["DB_CONFIG_OBJECT"])
-        if not config:
-            raise RuntimeError("No database configured.")
-
-        connection = mysql.connector.connect(**config)
-        repository = g._course_repository = CourseRepo(connection)
+    if not repository:
+        repository = g._course_repository = CourseRepo(
+            unit_of_work=get_unit_of_work(),
+            course_enrollment_cache=current_app.config.get("COURSE_ENROLLMENT_CACHE"),
+            invalidation_bus=current_app.config.get("INVALIDATION_BUS"),
+        )
     return repository
 
 def get_attendance_repository():
     repository: Optional[AttendanceRepo] = getattr(g, '_attendance_repository', None)
-    if not repository or not repository.connection_is_open:
-        config = vars(current_app.config["DB_CONFIG_OBJECT"])
-        if not config:
-            raise RuntimeError("No database configured.")
+    if not repository:
+        repository = g._attendance_repository = AttendanceRepo(unit_of_work=get_unit_of_work())
+    return repository
 
-        connection = mysql.connector.connect(**config)
-        repository = g._attendance_repo = AttendanceRepo(connection)
+def get_request_context_repository():
+    repository: Optional[RequestContextRepo] = getattr(g, '_request_context_repository', None)
+    if not repository:
+        repository = g._request_context_repository = RequestContextRepo(unit_of_work=get_unit_of_work())
     return repository
+
+def get_export_repository():
+    repository: Optional[ExportRepo] = getattr(g, '_export_repository', None)
+    if not repository:
+        repository = g._export_repository = ExportRepo(unit_of_work=get_unit_of_work())
+    return repository
+
+def get_export_job_repository():
+    repository: Optional[ExportJobRepo] = getattr(g, '_export_job_repository', None)
+    if not repository:
+        repository = g._export_job_repository = ExportJobRepo(unit_of_work=get_unit_of_work())
+    return repository
+
+def open_export_repository() -> ExportRepo:
+    """
+    Open an export repo on its own connection, to a replica if any are
+    configured, for downloads that keep streaming rows after the request's
+    unit of work has ended. The caller must close its connection.
+
+    An aborted download shuts the connection down rather than reading the
+    rest of its rows.
+    """
+    return ExportRepo(connection=get_export_db_config().connect(), abandon_unread_rows=True)
+
+def get_export_db_config() -> DBConnectionDetails:
+    """
+    Database that exports read from: a random replica if any are
+    configured, otherwise the primary.
+    """
+    return current_app.config["DB_CONFIG_OBJECT"].read_only_config()
@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from enum import Enum
+
+
+class ExportColumnType(Enum):
+    # Enum values, e.g. attendance_status and role, which fit in one signed byte
+    SMALL_INT = 'small_int'
+    INT = 'int'
+    FLOAT = 'float'
+    DATETIME = 'datetime'
+    TEXT = 'text'
+
+@dataclass(frozen=True)
+class ExportColumn:
+    name: str
+    column_type: ExportColumnType = ExportColumnType.TEXT
@@ -0,0 +1,45 @@
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+
+class ExportJobStatus(Enum):
+    QUEUED = 0
+    RUNNING = 1
+    SUCCEEDED = 2
+    FAILED = 3
+    CANCELLED = 4
+
+    @property
+    def is_active(self) -> bool:
+        return self in (ExportJobStatus.QUEUED, ExportJobStatus.RUNNING)
+
+@dataclass(kw_only=True)
+class ExportJob:
+    export_type: str
+    # Name of the ExportFormat its files are written in
+    export_format: str = 'csv'
+    status: ExportJobStatus = ExportJobStatus.QUEUED
+    # Rows written so far, by file name
+    progress: dict[str, int] = field(default_factory=dict)
+    cancel_requested: bool = False
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    export_job_id: Optional[int] = None
+
+    def __post_init__(self):
+        if not isinstance(self.status, ExportJobStatus):
+            self.status = ExportJobStatus(int(self.status))
+
+        if isinstance(self.progress, (str, bytes)):
+            self.progress = json.loads(self.progress)
+
+        self.cancel_requested = bool(self.cancel_requested)
+
+    @property
+    def rows_written(self) -> int:
+        return sum(self.progress.values())
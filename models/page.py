@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import datetime
 from enum import Enum
 from typing import Optional
 
@@ -24,6 +25,26 @@ class Page:
 
     page_id: Optional[int] = None
 
+    # Rendered from page_content when the page is written, see page_renderer.
+    # Derived data, so left out of comparisons
+    page_html: Optional[str] = field(default=None, compare=False, repr=False)
+    page_html_renderer_version: Optional[int] = field(default=None, compare=False)
+    page_html_starting_url_path: Optional[str] = field(default=None, compare=False)
+
+    # Set by the database whenever the row changes
+    updated_at: Optional[datetime] = field(default=None, compare=False)
+
+    @property
+    def depth(self) -> int:
+        # "/" and "/syllabus" are both top-level pages at depth 1
+        return self.url_path_after_course_path.count("/")
+
+    @property
+    def parent_path(self) -> Optional[str]:
+        if self.depth <= 1:
+            return None
+        return self.url_path_after_course_path.rsplit("/", 1)[0]
+
     def __post_init__(self):
         # Attempt to auto-convert, and throws an obvious error if it fails
         if not isinstance(self.page_visibility_setting, VisibilitySetting):
@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from models.course import Course
+from models.course_enrollment import Role
+from models.page import Page
+from models.user import User
+
+
+@dataclass
+class RequestContext:
+    """
+    Everything the course decorators check before a view runs.
+    Each part is None if it doesn't exist.
+    """
+    user: Optional[User] = None
+    course: Optional[Course] = None
+    role: Optional[Role] = None
+    page: Optional[Page] = None
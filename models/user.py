@@ -8,3 +8,6 @@ class User:
     email: str
     user_id: Optional[int] = None
     user_uuid: Optional[str] = None
+
+    # Sessions signed in with an older version are signed out
+    session_version: int = 0
@@ -0,0 +1,89 @@
+import re
+import urllib.parse
+from typing import Optional
+
+import markdown2
+
+from models.page import Page
+
+# Bump whenever render_page_html's output changes, so pages stored
+# with an older version get re-rendered (see `flask rerender-pages`)
+RENDERER_VERSION = 3
+
+# Opening <a> tags, whose quoted attribute values may hold ">", plus comments so
+# links commented out in raw HTML are left alone.
+# markdown2 escapes "<" inside code, so code samples never match
+ANCHOR_TAG_OR_COMMENT_PATTERN = re.compile(
+    r"""<!--.*?-->|<a\s(?:[^>"']|"[^"]*"|'[^']*')*>""",
+    re.DOTALL | re.IGNORECASE,
+)
+# One attribute of a tag, with or without a value. Matching every attribute in
+# turn keeps "href=" inside another attribute's quoted value from matching
+ATTRIBUTE_PATTERN = re.compile(
+    r"""(?P<name>\s(?P<attribute_name>[^\s"'>/=]+)\s*=\s*)"""
+    r"""(?:"(?P<double_quoted>[^"]*)"|'(?P<single_quoted>[^']*)'|(?P<unquoted>[^\s"'>]+))"""
+    r"""|\s[^\s"'>/=]+""",
+)
+
+
+def render_page_html(page_content: str, starting_url_path: str) -> str:
+    """
+    Convert page markdown to HTML, pointing links that start with "/"
+    at the course's pages.
+    """
+    page_html_content = markdown2.markdown(page_content)
+    return rewrite_relative_links(page_html_content, starting_url_path)
+
+def rewrite_relative_links(page_html_content: str, starting_url_path: str) -> str:
+    """
+    Join the href of every <a> tag that starts with "/" onto the course's
+    starting URL path, in one pass over the HTML and without parsing it.
+    """
+    course_base_url = starting_url_path + "/"
+
+    def rewrite_href(href_match: re.Match) -> str:
+        if (href_match["attribute_name"] or "").lower() != "href":
+            return href_match[0]
+
+        for group_name, quote in (("double_quoted", '"'), ("single_quoted", "'"), ("unquoted", "")):
+            href = href_match[group_name]
+            if href is not None:
+                break
+
+        if not href.startswith("/"):
+            return href_match[0]
+
+        rewritten_href = urllib.parse.urljoin(course_base_url, href[1:])
+        return f"{href_match['name']}{quote}{rewritten_href}{quote}"
+
+    def rewrite_tag(tag_match: re.Match) -> str:
+        tag = tag_match[0]
+        if tag.startswith("<!--"):
+            return tag
+        return ATTRIBUTE_PATTERN.sub(rewrite_href, tag)
+
+    return ANCHOR_TAG_OR_COMMENT_PATTERN.sub(rewrite_tag, page_html_content)
+
+def get_stored_page_html_if_current(page: Page, starting_url_path: str) -> Optional[str]:
+    """
+    Get the HTML stored with the page, unless it was rendered by an older
+    renderer or for a different course path.
+    """
+    if page.page_html is None \
+        or page.page_html_renderer_version != RENDERER_VERSION \
+        or page.page_html_starting_url_path != starting_url_path:
+        return None
+
+    return page.page_html
+
+def get_stored_page_html_from_older_renderer(page: Page, starting_url_path: str) -> Optional[str]:
+    """
+    Get the HTML stored with the page if an older renderer rendered it for
+    this course path, which is still fine to serve while it's re-rendered.
+    """
+    if page.page_html is None \
+        or page.page_html_renderer_version == RENDERER_VERSION \
+        or page.page_html_starting_url_path != starting_url_path:
+        return None
+
+    return page.page_html
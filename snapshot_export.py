@@ -0,0 +1,196 @@
+import json
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Callable, Iterator, Optional
+
+from config import EXPORT_WORKER_COUNT
+from datarepos.export_repo import ExportRepo, DELETED_ROW_KEY_COLUMNS
+from db_connection_details import DBConnectionDetails
+from export_formats import ExportFormat, CSV, write_export_file
+from models.export_column import ExportColumn
+
+MANIFEST_FILE_NAME = 'manifest.json'
+
+
+@dataclass
+class ExportedTable:
+    table_name: str
+    file_name: str
+    row_count: int
+    sha256: str
+    # Set for delta exports, which only hold the rows changed after this
+    changed_after: Optional[datetime] = None
+    # Keys of the rows deleted after `changed_after`, for delta exports
+    deleted_rows_file_name: Optional[str] = None
+    deleted_row_count: Optional[int] = None
+    deleted_rows_sha256: Optional[str] = None
+
+
+@dataclass
+class SnapshotExport:
+    # Database time the snapshot was taken at, the high-water mark for the next delta export
+    snapshot_taken_at: datetime
+    # Name of the ExportFormat the files are in
+    export_format: str
+    tables: list[ExportedTable]
+
+
+def open_snapshot_export_repos(
+    db_config: DBConnectionDetails,
+    table_names: list[str],
+    repo_count: int
+) -> tuple[list[ExportRepo], datetime]:
+    """
+    Open `repo_count` export repos on their own connections, each in a
+    snapshot of the same moment.
+
+    The tables are read-locked on a separate connection while the snapshots
+    start, so no write to them can commit in between. Writes are only held
+    up for as long as that takes.
+
+    :return: the repos, and the database time of the snapshot. Every change
+    stamped up to then is in the snapshot, and every one after isn't.
+    """
+    export_repos = []
+    lock_repo = ExportRepo(connection=db_config.connect())
+    try:
+        snapshot_taken_at = lock_repo.lock_tables_for_reading(table_names)
+        for _ in range(repo_count):
+            export_repo = ExportRepo(connection=db_config.connect())
+            export_repos.append(export_repo)
+            export_repo.start_snapshot()
+        lock_repo.unlock_tables()
+    except BaseException:
+        for export_repo in export_repos:
+            export_repo.close_connection()
+        raise
+    finally:
+        lock_repo.close_connection()
+
+    return export_repos, snapshot_taken_at
+
+def deleted_rows_file_name(file_name: str) -> str:
+    file_stem, extension = os.path.splitext(file_name)
+    return f'{file_stem}_deleted{extension}'
+
+def export_tables_from_snapshot(
+    db_config: DBConnectionDetails,
+    table_file_names: dict[str, str],
+    directory: str,
+    worker_count: int = EXPORT_WORKER_COUNT,
+    track_rows: Optional[Callable[[str, Iterator[tuple]], Iterator[tuple]]] = None,
+    changed_after: Optional[dict[str, datetime]] = None,
+    export_format: ExportFormat = CSV,
+) -> SnapshotExport:
+    """
+    Export each table to a file in `directory`, several tables at once,
+    all from one snapshot of the database so the files agree with each other.
+
+    Also writes a manifest next to them with each file's row count and checksum.
+
+    :param table_file_names: table name -> CSV file name, which gets the
+    extension of `export_format` instead. Table CSVs have no header row.
+    :param track_rows: wraps each file's rows, given the file name, e.g. to report progress
+    :param changed_after: table name -> high-water mark of its last export.
+    Tables with a mark only get the rows changed since then, plus a file with the
+    keys of rows deleted since then, which should be applied first. Tables without
+    one are exported whole.
+    """
+    changed_after = changed_after or {}
+    worker_count = max(1, min(worker_count, len(table_file_names)))
+    export_repos, snapshot_taken_at = open_snapshot_export_repos(db_config, list(table_file_names), worker_count)
+
+    # Each worker thread takes a repo for one table at a time,
+    # since a connection can only stream one result at a time
+    idle_export_repos = queue.Queue()
+    for export_repo in export_repos:
+        idle_export_repos.put(export_repo)
+
+    def write_rows(file_name: str, rows: Iterator[tuple], columns: list[ExportColumn], include_header: bool):
+        if track_rows:
+            rows = track_rows(file_name, rows)
+        return write_export_file(os.path.join(directory, file_name), rows, columns, export_format, include_header)
+
+    def export_table(table_name: str, csv_file_name: str) -> ExportedTable:
+        table_changed_after = changed_after.get(table_name)
+        file_name = export_format.file_name(csv_file_name)
+        export_repo = idle_export_repos.get()
+        try:
+            columns = export_repo.get_table_columns(table_name)
+            if not table_changed_after:
+                written_file = write_rows(
+                    file_name,
+                    export_repo.stream_table_rows(table_name),
+                    columns,
+                    include_header=False,
+                )
+                return ExportedTable(
+                    table_name=table_name,
+                    file_name=file_name,
+                    row_count=written_file.row_count,
+                    sha256=written_file.sha256,
+                )
+
+            deleted_file_name = export_format.file_name(deleted_rows_file_name(csv_file_name))
+            written_file = write_rows(
+                file_name,
+                export_repo.stream_changed_table_rows(table_name, table_changed_after),
+                columns,
+                include_header=False,
+            )
+            written_deleted_rows_file = write_rows(
+                deleted_file_name,
+                export_repo.stream_deleted_row_keys(table_name, table_changed_after),
+                DELETED_ROW_KEY_COLUMNS,
+                include_header=True,
+            )
+            return ExportedTable(
+                table_name=table_name,
+                file_name=file_name,
+                row_count=written_file.row_count,
+                sha256=written_file.sha256,
+                changed_after=table_changed_after,
+                deleted_rows_file_name=deleted_file_name,
+                deleted_row_count=written_deleted_rows_file.row_count,
+                deleted_rows_sha256=written_deleted_rows_file.sha256,
+            )
+        finally:
+            idle_export_repos.put(export_repo)
+
+    try:
+        with ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix='table-export') as executor:
+            futures = [
+                executor.submit(export_table, table_name, file_name)
+                for table_name, file_name in table_file_names.items()
+            ]
+            exported_tables = [future.result() for future in futures]
+    finally:
+        # Closing the connections also ends their snapshots
+        for export_repo in export_repos:
+            export_repo.close_connection()
+
+    snapshot_export = SnapshotExport(
+        snapshot_taken_at=snapshot_taken_at,
+        export_format=export_format.name,
+        tables=exported_tables,
+    )
+    write_manifest(directory, snapshot_export)
+    return snapshot_export
+
+def write_manifest(directory: str, snapshot_export: SnapshotExport):
+    manifest = {
+        'snapshot_taken_at': snapshot_export.snapshot_taken_at.isoformat(),
+        'export_format': snapshot_export.export_format,
+        'tables': [
+            {
+                **asdict(exported_table),
+                'changed_after': exported_table.changed_after.isoformat() if exported_table.changed_after else None,
+            }
+            for exported_table in snapshot_export.tables
+        ],
+    }
+    with open(os.path.join(directory, MANIFEST_FILE_NAME), 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
@@ -0,0 +1,19 @@
+-- Adds the page.depth and page.parent_path columns and backfills them
+-- for existing rows. Run once against databases created before these
+-- columns were added to setup_schema.sql.
+
+ALTER TABLE page
+    ADD COLUMN depth INT NOT NULL DEFAULT 1,
+    ADD COLUMN parent_path VARCHAR(128);
+
+-- depth is assigned first, so the parent_path expression sees the new value
+UPDATE page
+SET
+    page.depth = LENGTH(page.url_path_after_course_path)
+        - LENGTH(REPLACE(page.url_path_after_course_path, '/', '')),
+    page.parent_path = CASE
+        WHEN page.depth > 1 THEN SUBSTRING_INDEX(page.url_path_after_course_path, '/', page.depth)
+        ELSE NULL
+    END;
+
+CREATE INDEX index_page_hierarchy ON page(course_id, page_visibility_setting, depth, parent_path);
@@ -0,0 +1,8 @@
+-- Adds the columns holding HTML rendered when pages are written.
+-- Existing pages are rendered the first time they're viewed, or all at
+-- once with `flask --app "app:create_app()" rerender-pages`.
+
+ALTER TABLE page
+    ADD COLUMN page_html MEDIUMTEXT,
+    ADD COLUMN page_html_renderer_version INT,
+    ADD COLUMN page_html_starting_url_path VARCHAR(128);
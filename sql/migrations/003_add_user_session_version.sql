@@ -0,0 +1,5 @@
+-- Adds user.session_version, which is bumped to sign a user out of every
+-- session. Existing sessions have no version, which counts as 0.
+
+ALTER TABLE user
+    ADD COLUMN session_version INT NOT NULL DEFAULT 0;
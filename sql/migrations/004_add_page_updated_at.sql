@@ -0,0 +1,5 @@
+-- Adds page.updated_at, which feeds the ETag of course pages.
+-- Existing pages get the time the migration runs.
+
+ALTER TABLE page
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
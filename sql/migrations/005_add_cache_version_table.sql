@@ -0,0 +1,14 @@
+-- Adds the table MySqlInvalidationBus uses to tell app processes
+-- which cache keys to evict. Only needed with INVALIDATION_BUS_BACKEND=mysql.
+
+CREATE TABLE IF NOT EXISTS cache_version (
+    topic VARCHAR(32) NOT NULL,
+    cache_key VARCHAR(255) NOT NULL,
+    version BIGINT NOT NULL DEFAULT 1,
+    sent_by CHAR(36) NOT NULL,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+
+    PRIMARY KEY (topic, cache_key)
+);
+
+CREATE INDEX index_cache_version_updated_at ON cache_version(updated_at);
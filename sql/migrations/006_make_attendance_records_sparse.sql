@@ -0,0 +1,40 @@
+-- Attendance records are now sparse: students without a record in a
+-- session count as NONE, and sessions no longer create a NONE record
+-- for every student. The export view fills in the missing records.
+
+CREATE OR REPLACE VIEW attendance_records_students_classes AS
+-- Attendance records are sparse: enrolled students without one count as NONE (0)
+SELECT user.full_name, user.email, user.user_id, ats.attendance_session_id, COALESCE(atr.attendance_status, 0) AS attendance_status, course.title, course.user_friendly_class_code
+FROM attendance_session ats
+INNER JOIN course
+        ON course.course_id = ats.course_id
+INNER JOIN enrollment
+        ON enrollment.course_id = ats.course_id
+        AND enrollment.role = 1
+INNER JOIN user
+        ON user.user_id = enrollment.user_id
+LEFT JOIN attendance_record atr
+        ON atr.attendance_session_id = ats.attendance_session_id
+        AND atr.user_id = enrollment.user_id
+UNION ALL
+-- Records of users who are no longer enrolled as students
+SELECT user.full_name, user.email, user.user_id, atr.attendance_session_id, atr.attendance_status, course.title, course.user_friendly_class_code
+FROM attendance_record atr
+INNER JOIN user
+        ON user.user_id = atr.user_id
+INNER JOIN attendance_session ats
+        ON ats.attendance_session_id = atr.attendance_session_id
+INNER JOIN course
+        ON course.course_id = ats.course_id
+LEFT JOIN enrollment
+        ON enrollment.course_id = ats.course_id
+        AND enrollment.user_id = atr.user_id
+        AND enrollment.role = 1
+WHERE enrollment.user_id IS NULL;
+
+-- Existing NONE records are left in place, and still count as NONE. To
+-- reclaim their space, run this by hand once the app no longer creates them.
+-- It also drops the NONE records of users who are no longer enrolled as
+-- students, so they stop showing up in the export view. Once deleted_row
+-- exists (008), delta exports won't see these deletions.
+-- DELETE FROM attendance_record WHERE attendance_status = 0;
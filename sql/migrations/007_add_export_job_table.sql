@@ -0,0 +1,19 @@
+-- Adds the table the admin app tracks background export jobs in.
+-- active_export_type is only set while a job is queued or running,
+-- so each export type can have one active job at a time.
+
+CREATE TABLE IF NOT EXISTS export_job (
+    export_job_id INT PRIMARY KEY AUTO_INCREMENT,
+    export_type VARCHAR(64) NOT NULL,
+    status INT NOT NULL,
+    progress JSON NOT NULL,
+    cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+    error_message TEXT,
+    created_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    started_at DATETIME(6),
+    finished_at DATETIME(6),
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    active_export_type VARCHAR(64) AS (IF(status IN (0, 1), export_type, NULL)) STORED,
+
+    UNIQUE (active_export_type)
+);
@@ -0,0 +1,39 @@
+-- Adds what delta exports need: updated_at on every exported table,
+-- tombstones for deleted rows, and the point each table was last
+-- exported through. Existing rows get the time the migration runs,
+-- and the first export after it is a full one.
+
+ALTER TABLE course
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+ALTER TABLE user
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+ALTER TABLE file
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+ALTER TABLE page_file_bridge
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+ALTER TABLE attendance_session
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+ALTER TABLE attendance_record
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+
+CREATE INDEX index_course_updated_at ON course(updated_at);
+CREATE INDEX index_user_updated_at ON user(updated_at);
+CREATE INDEX index_page_updated_at ON page(updated_at);
+CREATE INDEX index_file_updated_at ON file(updated_at);
+CREATE INDEX index_page_file_bridge_updated_at ON page_file_bridge(updated_at);
+CREATE INDEX index_attendance_session_updated_at ON attendance_session(updated_at);
+CREATE INDEX index_attendance_record_updated_at ON attendance_record(updated_at);
+
+CREATE TABLE IF NOT EXISTS deleted_row (
+    deleted_row_id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    table_name VARCHAR(64) NOT NULL,
+    row_key JSON NOT NULL,
+    deleted_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6)
+);
+
+CREATE INDEX index_deleted_row_table_name_deleted_at ON deleted_row(table_name, deleted_at);
+
+CREATE TABLE IF NOT EXISTS export_high_water_mark (
+    table_name VARCHAR(64) PRIMARY KEY,
+    exported_through TIMESTAMP(6) NOT NULL
+);
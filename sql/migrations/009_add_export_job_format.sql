@@ -0,0 +1,13 @@
+-- Adds the format export jobs write their files in. Each export type can
+-- now have one active job per format, so active_export_type is replaced
+-- by active_export, which also holds the format.
+
+ALTER TABLE export_job
+    ADD COLUMN export_format VARCHAR(16) NOT NULL DEFAULT 'csv' AFTER export_type;
+
+ALTER TABLE export_job
+    DROP COLUMN active_export_type;
+
+ALTER TABLE export_job
+    ADD COLUMN active_export VARCHAR(96) AS (IF(status IN (0, 1), CONCAT(export_type, ':', export_format), NULL)) STORED,
+    ADD UNIQUE (active_export);
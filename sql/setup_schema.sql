@@ -15,6 +15,8 @@ CREATE TABLE IF NOT EXISTS course (
     -- the unique URL path that all pages must start with
     starting_url_path VARCHAR(128) UNIQUE NOT NULL,
 
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+
     FOREIGN KEY (course_term_id) REFERENCES course_term(course_term_id)
 );
 
@@ -30,7 +32,12 @@ CREATE TABLE IF NOT EXISTS user (
     full_name VARCHAR(64) NOT NULL,
     email VARCHAR(128) UNIQUE NOT NULL,
     -- hashed password is fixed length
-    hashed_password CHAR(163) NOT NULL
+    hashed_password CHAR(163) NOT NULL,
+
+    -- bumped to sign the user out of every session, see flask_helpers
+    session_version INT NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
 );
 
 CREATE TABLE IF NOT EXISTS enrollment (
@@ -52,6 +59,20 @@ CREATE TABLE IF NOT EXISTS page (
     url_path_after_course_path VARCHAR(128) NOT NULL,
     course_id INT NOT NULL,
 
+    -- derived from url_path_after_course_path and kept in sync by ContentRepo
+    -- number of '/' in the path, so "/" and "/syllabus" are both top-level (1)
+    depth INT NOT NULL DEFAULT 1,
+    -- path of the parent page, NULL for top-level pages
+    parent_path VARCHAR(128),
+
+    -- rendered from page_content by ContentRepo when the page is written
+    -- re-rendered on read if the renderer version or course path changed since
+    page_html MEDIUMTEXT,
+    page_html_renderer_version INT,
+    page_html_starting_url_path VARCHAR(128),
+
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+
     -- may be empty if the user is deleted
     created_by_user_id INT,
 
@@ -62,6 +83,9 @@ CREATE TABLE IF NOT EXISTS page (
     FOREIGN KEY (course_id) REFERENCES course(course_id)
 );
 
+-- child and subtree lookups within a course
+CREATE INDEX index_page_hierarchy ON page(course_id, page_visibility_setting, depth, parent_path);
+
 CREATE TABLE IF NOT EXISTS file (
     file_id INT PRIMARY KEY AUTO_INCREMENT,
     file_uuid CHAR(36) UNIQUE NOT NULL,
@@ -70,6 +94,8 @@ CREATE TABLE IF NOT EXISTS file (
 
     course_id INT NOT NULL,
 
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+
     FOREIGN KEY (course_id) REFERENCES course(course_id),
     FOREIGN KEY (uploaded_by_user_id) REFERENCES user(user_id)
 );
@@ -78,6 +104,8 @@ CREATE TABLE IF NOT EXISTS page_file_bridge (
     page_id INT,
     file_id INT,
 
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+
     PRIMARY KEY (page_id, file_id),
     FOREIGN KEY (page_id) REFERENCES page(page_id),
     FOREIGN KEY (file_id) REFERENCES file(file_id)
@@ -92,6 +120,8 @@ CREATE TABLE IF NOT EXISTS attendance_session (
     -- optional user-friendly title
     title VARCHAR(128),
 
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+
     FOREIGN KEY (course_id) REFERENCES course(course_id)
 );
 
@@ -100,11 +130,71 @@ CREATE TABLE IF NOT EXISTS attendance_record (
     attendance_session_id INT NOT NULL,
     attendance_status INT NOT NULL,
 
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+
     PRIMARY KEY (user_id, attendance_session_id),
     FOREIGN KEY (user_id) REFERENCES user(user_id),
     FOREIGN KEY (attendance_session_id) REFERENCES attendance_session(attendance_session_id)
 );
 
+-- Written by MySqlInvalidationBus, one row per invalidated cache key
+CREATE TABLE IF NOT EXISTS cache_version (
+    topic VARCHAR(32) NOT NULL,
+    cache_key VARCHAR(255) NOT NULL,
+    version BIGINT NOT NULL DEFAULT 1,
+    sent_by CHAR(36) NOT NULL,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+
+    PRIMARY KEY (topic, cache_key)
+);
+
+CREATE INDEX index_cache_version_updated_at ON cache_version(updated_at);
+
+-- Admin export jobs. active_export is only set while a job is queued
+-- or running, so each export type can have one active job per format at a time
+CREATE TABLE IF NOT EXISTS export_job (
+    export_job_id INT PRIMARY KEY AUTO_INCREMENT,
+    export_type VARCHAR(64) NOT NULL,
+    export_format VARCHAR(16) NOT NULL DEFAULT 'csv',
+    status INT NOT NULL,
+    progress JSON NOT NULL,
+    cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+    error_message TEXT,
+    created_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    started_at DATETIME(6),
+    finished_at DATETIME(6),
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    active_export VARCHAR(96) AS (IF(status IN (0, 1), CONCAT(export_type, ':', export_format), NULL)) STORED,
+
+    UNIQUE (active_export)
+);
+
+-- Delta exports read the rows changed since the last export through these
+CREATE INDEX index_course_updated_at ON course(updated_at);
+CREATE INDEX index_user_updated_at ON user(updated_at);
+CREATE INDEX index_page_updated_at ON page(updated_at);
+CREATE INDEX index_file_updated_at ON file(updated_at);
+CREATE INDEX index_page_file_bridge_updated_at ON page_file_bridge(updated_at);
+CREATE INDEX index_attendance_session_updated_at ON attendance_session(updated_at);
+CREATE INDEX index_attendance_record_updated_at ON attendance_record(updated_at);
+
+-- Tombstones for rows the repos delete from exported tables, so delta
+-- exports can pass deletions on. row_key holds the deleted row's primary key
+CREATE TABLE IF NOT EXISTS deleted_row (
+    deleted_row_id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    table_name VARCHAR(64) NOT NULL,
+    row_key JSON NOT NULL,
+    deleted_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6)
+);
+
+CREATE INDEX index_deleted_row_table_name_deleted_at ON deleted_row(table_name, deleted_at);
+
+-- Point in time each table has been exported through, see snapshot_export
+CREATE TABLE IF NOT EXISTS export_high_water_mark (
+    table_name VARCHAR(64) PRIMARY KEY,
+    exported_through TIMESTAMP(6) NOT NULL
+);
+
 -- Triggers
 DROP TRIGGER IF EXISTS before_insert_trigger;
 DELIMITER //
@@ -138,6 +228,21 @@ DELIMITER ;
 
 -- Views
 CREATE VIEW attendance_records_students_classes AS
+-- Attendance records are sparse: enrolled students without one count as NONE (0)
+SELECT user.full_name, user.email, user.user_id, ats.attendance_session_id, COALESCE(atr.attendance_status, 0) AS attendance_status, course.title, course.user_friendly_class_code
+FROM attendance_session ats
+INNER JOIN course
+        ON course.course_id = ats.course_id
+INNER JOIN enrollment
+        ON enrollment.course_id = ats.course_id
+        AND enrollment.role = 1
+INNER JOIN user
+        ON user.user_id = enrollment.user_id
+LEFT JOIN attendance_record atr
+        ON atr.attendance_session_id = ats.attendance_session_id
+        AND atr.user_id = enrollment.user_id
+UNION ALL
+-- Records of users who are no longer enrolled as students
 SELECT user.full_name, user.email, user.user_id, atr.attendance_session_id, atr.attendance_status, course.title, course.user_friendly_class_code
 FROM attendance_record atr
 INNER JOIN user
@@ -145,4 +250,9 @@ INNER JOIN user
 INNER JOIN attendance_session ats
         ON ats.attendance_session_id = atr.attendance_session_id
 INNER JOIN course
-        ON course.course_id = ats.course_id;
+        ON course.course_id = ats.course_id
+LEFT JOIN enrollment
+        ON enrollment.course_id = ats.course_id
+        AND enrollment.user_id = atr.user_id
+        AND enrollment.role = 1
+WHERE enrollment.user_id IS NULL;
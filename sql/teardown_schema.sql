@@ -1,6 +1,10 @@
 DROP INDEX index_course_id ON course;
 DROP VIEW attendance_records_students_classes;
 
+DROP TABLE export_high_water_mark;
+DROP TABLE deleted_row;
+DROP TABLE export_job;
+DROP TABLE cache_version;
 DROP TABLE attendance_record;
 DROP TABLE attendance_session;
 DROP TABLE enrollment;
@@ -225,6 +225,49 @@ This is the home page.
 
         self.assert_static_page_content_with_links(course, response)
 
+    def test_course_home_page_conditional_get(self):
+        user, _ = self.add_sample_user_to_test_db()
+        courses, course_terms = self.add_sample_course_term_and_course_cluster()
+        course = courses[0]
+
+        self.add_single_enrollment(CourseEnrollment(role=Role.STUDENT, user_id=user.user_id, course_id=course.course_id))
+        home_page = Page(
+            url_path_after_course_path="/",
+            page_title="Home Page",
+            page_visibility_setting=VisibilitySetting.LISTED,
+            page_content=self.static_page_content_for_testing,
+            course_id=course.course_id
+        )
+        self.add_single_page_and_get_id(home_page)
+
+        self.sign_user_into_session(user)
+
+        response = self.test_client.get(course.starting_url_path + "/")
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+
+        response = self.test_client.get(course.starting_url_path + "/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+
+        # Editing the page changes its ETag
+        cursor = self.connection.cursor()
+        cursor.execute("UPDATE page SET page_content = 'Edited';")
+        self.connection.commit()
+
+        response = self.test_client.get(course.starting_url_path + "/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_course_home_page_conditional_get_if_not_enrolled(self):
+        user, _ = self.add_sample_user_to_test_db()
+        courses, course_terms = self.add_sample_course_term_and_course_cluster()
+        course = courses[0]
+        self.sign_user_into_session(user)
+
+        response = self.test_client.get(course.starting_url_path + "/", headers={"If-None-Match": "*"})
+        self.assertEqual(response.status_code, 401)
+
     def test_course_home_page_content_if_not_enrolled(self):
         user, _ = self.add_sample_user_to_test_db()
         courses, course_terms = self.add_sample_course_term_and_course_cluster()
@@ -128,6 +128,21 @@ class TestIndexBlueprint(TestFlaskApp):
         with self.test_client.session_transaction() as session:
             self.assertNotIn("user_uuid", session)
 
+    def test_sign_out_ends_other_sessions(self):
+        user, _ = self.add_sample_user_to_test_db()
+        self.sign_user_into_session(user)
+
+        other_test_client = self.app.test_client()
+        with other_test_client.session_transaction() as session:
+            session["user_uuid"] = user.user_uuid
+
+        self.test_client.get("/sign-out")
+
+        response = other_test_client.get("/")
+        self.assertEqual(response.status_code, 302)
+        with other_test_client.session_transaction() as session:
+            self.assertNotIn("user_uuid", session)
+
     def test_sign_out_if_already_signed_out(self):
         sign_out_response = self.test_client.get("/sign-out")
         self.assertEqual(sign_out_response.status_code, 302)
@@ -0,0 +1,55 @@
+import unittest
+
+from caches.course_enrollment_cache import CourseEnrollmentCache
+from models.course import Course
+from models.course_enrollment import Role
+
+
+class TestCourseEnrollmentCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = CourseEnrollmentCache()
+        self.course = Course(
+            title="Database Management",
+            user_friendly_class_code="CPSC 408",
+            starting_url_path="/cpsc-408-f24",
+            course_id=1,
+        )
+
+    def test_get_after_put(self):
+        generation = self.cache.generation
+        self.cache.put_course(self.course, generation)
+        self.cache.put_role(1, self.course.course_id, Role.STUDENT, generation)
+
+        self.assertEqual(self.cache.get_course(self.course.starting_url_path), self.course)
+        self.assertEqual(self.cache.get_role(1, self.course.course_id), Role.STUDENT)
+        self.assertEqual(self.cache.course_stats.hit_rate, 1.0)
+
+    def test_put_after_invalidation_is_dropped(self):
+        # Loaded before the write that invalidated it committed
+        generation = self.cache.generation
+        self.cache.invalidate_role(1, self.course.course_id)
+
+        self.cache.put_role(1, self.course.course_id, Role.STUDENT, generation)
+        self.assertIsNone(self.cache.get_role(1, self.course.course_id))
+
+    def test_invalidate_role(self):
+        generation = self.cache.generation
+        self.cache.put_role(1, self.course.course_id, Role.STUDENT, generation)
+        self.cache.put_role(2, self.course.course_id, Role.STUDENT, generation)
+
+        self.cache.invalidate_role(1, self.course.course_id)
+
+        self.assertIsNone(self.cache.get_role(1, self.course.course_id))
+        self.assertEqual(self.cache.get_role(2, self.course.course_id), Role.STUDENT)
+
+    def test_invalidate_course(self):
+        generation = self.cache.generation
+        self.cache.put_course(self.course, generation)
+        self.cache.put_role(1, self.course.course_id, Role.STUDENT, generation)
+        self.cache.put_role(1, 2, Role.PROFESSOR, generation)
+
+        self.cache.invalidate_course(self.course.course_id)
+
+        self.assertIsNone(self.cache.get_course(self.course.starting_url_path))
+        self.assertIsNone(self.cache.get_role(1, self.course.course_id))
+        self.assertEqual(self.cache.get_role(1, 2), Role.PROFESSOR)
@@ -0,0 +1,49 @@
+import unittest
+
+from caches.course_enrollment_cache import CourseEnrollmentCache
+from caches.invalidation_bus import InvalidationBus, subscribe_caches_to_invalidation_bus, ROLE_TOPIC, USER_TOPIC
+from caches.user_session_cache import UserSessionCache
+from models.course_enrollment import Role
+from models.user import User
+
+
+class TestInvalidationBus(unittest.TestCase):
+    def setUp(self):
+        self.user = User(full_name="Test Name", email="example@example.com", user_id=1, user_uuid="uuid-1")
+        self.user_session_cache = UserSessionCache()
+        self.course_enrollment_cache = CourseEnrollmentCache()
+
+        self.bus = InvalidationBus()
+        subscribe_caches_to_invalidation_bus(
+            self.bus,
+            user_session_cache=self.user_session_cache,
+            course_enrollment_cache=self.course_enrollment_cache,
+        )
+
+    def test_publish_evicts_from_subscribed_caches(self):
+        self.user_session_cache.put(self.user)
+        self.course_enrollment_cache.put_role(1, 2, Role.STUDENT, self.course_enrollment_cache.generation)
+
+        self.bus.publish(USER_TOPIC, self.user.user_id)
+        self.bus.publish(ROLE_TOPIC, (1, 2))
+
+        self.assertIsNone(self.user_session_cache.get(self.user.user_uuid))
+        self.assertIsNone(self.course_enrollment_cache.get_role(1, 2))
+
+    def test_dispatch_clear_clears_subscribed_caches(self):
+        self.user_session_cache.put(self.user)
+
+        self.bus.dispatch_clear()
+
+        self.assertIsNone(self.user_session_cache.get(self.user.user_uuid))
+
+    def test_decode_message_from_other_process(self):
+        other_bus = InvalidationBus()
+        message = other_bus.encode_message(ROLE_TOPIC, (1, 2))
+
+        self.assertEqual(self.bus.decode_message(message), (ROLE_TOPIC, (1, 2)))
+
+    def test_decode_own_message(self):
+        message = self.bus.encode_message(USER_TOPIC, 1)
+
+        self.assertIsNone(self.bus.decode_message(message))
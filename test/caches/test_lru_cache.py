@@ -0,0 +1,92 @@
+import unittest
+
+from caches.lru_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_get_after_put(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("key", "value")
+        self.assertEqual(cache.get("key"), "value")
+
+    def test_get_missing_key(self):
+        cache = LRUCache(max_entries=2)
+        self.assertIsNone(cache.get("key"))
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+
+        # Touch "a", so "b" is the least recently used
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats.evictions, 1)
+
+    def test_invalidate(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("key", "value")
+        cache.invalidate("key")
+        self.assertIsNone(cache.get("key"))
+
+    def test_put_none(self):
+        cache = LRUCache(max_entries=2)
+        with self.assertRaises(ValueError):
+            cache.put("key", None)
+
+    def test_stats(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("key", "value")
+        cache.get("key")
+        cache.get("key")
+        cache.get("missing")
+
+        self.assertEqual(cache.stats.hits, 2)
+        self.assertEqual(cache.stats.misses, 1)
+        self.assertAlmostEqual(cache.stats.hit_rate, 2 / 3)
+
+    def test_evicts_past_max_bytes(self):
+        cache = LRUCache(max_entries=10, max_bytes=10, size_of=len)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.put("c", "cccc")
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), "bbbb")
+        self.assertEqual(cache.get("c"), "cccc")
+        self.assertEqual(cache.total_bytes, 8)
+        self.assertEqual(cache.stats.evictions, 1)
+        self.assertEqual(cache.stats.evicted_bytes, 4)
+
+    def test_value_larger_than_max_bytes_is_not_cached(self):
+        cache = LRUCache(max_entries=10, max_bytes=10, size_of=len)
+        cache.put("a", "aaaa")
+        cache.put("b", "b" * 11)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "aaaa")
+
+    def test_replacing_value_updates_total_bytes(self):
+        cache = LRUCache(max_entries=10, max_bytes=10, size_of=len)
+        cache.put("a", "aaaa")
+        cache.put("a", "aa")
+        self.assertEqual(cache.total_bytes, 2)
+
+        cache.invalidate("a")
+        self.assertEqual(cache.total_bytes, 0)
+
+    def test_invalidate_matching(self):
+        cache = LRUCache(max_entries=10)
+        cache.put((1, "a"), "value")
+        cache.put((1, "b"), "value")
+        cache.put((2, "a"), "value")
+
+        cache.invalidate_matching(lambda key, _: key[0] == 1)
+
+        self.assertIsNone(cache.get((1, "a")))
+        self.assertIsNone(cache.get((1, "b")))
+        self.assertEqual(cache.get((2, "a")), "value")
@@ -0,0 +1,49 @@
+from caches.invalidation_bus import ROLE_TOPIC, USER_TOPIC
+from caches.mysql_invalidation_bus import MySqlInvalidationBus
+from test.test_with_database_container import TestWithDatabaseContainer
+
+
+class TestMySqlInvalidationBus(TestWithDatabaseContainer):
+    def setUp(self):
+        super().setUp()
+        self.publishing_bus = MySqlInvalidationBus(self.database_config)
+        self.receiving_bus = MySqlInvalidationBus(self.database_config)
+
+        self.published_keys = []
+        self.received_keys = []
+        self.publishing_bus.subscribe(ROLE_TOPIC, self.published_keys.append)
+        self.publishing_bus.subscribe(USER_TOPIC, self.published_keys.append)
+        self.receiving_bus.subscribe(ROLE_TOPIC, self.received_keys.append)
+        self.receiving_bus.subscribe(USER_TOPIC, self.received_keys.append)
+
+        # The first poll sets where the buses start reading from
+        self.publishing_bus.poll()
+        self.receiving_bus.poll()
+
+    def tearDown(self):
+        self.publishing_bus.close()
+        self.receiving_bus.close()
+        super().tearDown()
+
+    def test_poll_dispatches_invalidations_from_other_processes(self):
+        self.publishing_bus.publish(ROLE_TOPIC, (1, 2))
+        self.publishing_bus.publish(USER_TOPIC, 3)
+
+        self.receiving_bus.poll()
+        self.publishing_bus.poll()
+
+        self.assertCountEqual(self.received_keys, [(1, 2), 3])
+        # Dispatched once, when published
+        self.assertCountEqual(self.published_keys, [(1, 2), 3])
+
+    def test_poll_dispatches_each_version_once(self):
+        self.publishing_bus.publish(USER_TOPIC, 3)
+        self.receiving_bus.poll()
+        self.receiving_bus.poll()
+
+        self.assertEqual(self.received_keys, [3])
+
+        self.publishing_bus.publish(USER_TOPIC, 3)
+        self.receiving_bus.poll()
+
+        self.assertEqual(self.received_keys, [3, 3])
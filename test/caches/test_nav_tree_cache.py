@@ -0,0 +1,65 @@
+import unittest
+
+from caches.nav_tree_cache import NavTreeCache
+from models.page_navigation_link import PageNavigationLink
+
+
+class TestNavTreeCache(unittest.TestCase):
+    def setUp(self):
+        self.nav_tree_cache = NavTreeCache(max_entries=4)
+        self.nav_links = [
+            PageNavigationLink(page_title="Home", url_path_after_course_path="/", course_id=1, nested_links=[])
+        ]
+
+    def test_get_after_put(self):
+        content_version = self.nav_tree_cache.content_version(1)
+        self.nav_tree_cache.put(1, content_version, self.nav_links)
+
+        self.assertEqual(self.nav_tree_cache.get(1, content_version), self.nav_links)
+
+    def test_bump_content_version_hides_old_tree(self):
+        content_version = self.nav_tree_cache.content_version(1)
+        self.nav_tree_cache.put(1, content_version, self.nav_links)
+
+        self.nav_tree_cache.bump_content_version(1)
+
+        new_content_version = self.nav_tree_cache.content_version(1)
+        self.assertNotEqual(new_content_version, content_version)
+        self.assertIsNone(self.nav_tree_cache.get(1, new_content_version))
+
+    def test_bump_content_version_only_affects_one_course(self):
+        self.nav_tree_cache.put(2, self.nav_tree_cache.content_version(2), self.nav_links)
+
+        self.nav_tree_cache.bump_content_version(1)
+
+        self.assertEqual(self.nav_tree_cache.get(2, self.nav_tree_cache.content_version(2)), self.nav_links)
+
+    def test_empty_tree_is_cached(self):
+        self.nav_tree_cache.put(1, 0, [])
+
+        self.assertEqual(self.nav_tree_cache.get(1, 0), [])
+        self.assertEqual(self.nav_tree_cache.stats.hits, 1)
+
+    def test_get_or_build_caches_built_tree(self):
+        self.assertEqual(self.nav_tree_cache.get_or_build(1, lambda: self.nav_links), self.nav_links)
+        self.assertEqual(self.nav_tree_cache.get_or_build(1, lambda: self.fail("Shouldn't rebuild")), self.nav_links)
+
+    def test_get_or_build_rebuilds_after_bump(self):
+        self.nav_tree_cache.get_or_build(1, lambda: self.nav_links)
+        self.nav_tree_cache.bump_content_version(1)
+
+        self.assertEqual(self.nav_tree_cache.get_or_build(1, lambda: []), [])
+
+    def test_get_or_build_serves_stale_tree_while_rebuilding(self):
+        self.nav_tree_cache.get_or_build(1, lambda: self.nav_links)
+        self.nav_tree_cache.bump_content_version(1)
+
+        stale_results = []
+        def rebuild():
+            # Another request asks for the tree while this one rebuilds it
+            stale_results.append(self.nav_tree_cache.get_or_build(1, lambda: self.fail("Shouldn't rebuild twice")))
+            return []
+
+        self.assertEqual(self.nav_tree_cache.get_or_build(1, rebuild), [])
+        self.assertEqual(stale_results, [self.nav_links])
+        self.assertEqual(self.nav_tree_cache.singleflight.stats.stale_served, 1)
@@ -0,0 +1,84 @@
+import threading
+import time
+import unittest
+
+from caches.page_cache import PageCache
+from models.page import Page, VisibilitySetting
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = PageCache()
+        self.page = Page(
+            page_title="Syllabus",
+            page_content="# Syllabus",
+            page_visibility_setting=VisibilitySetting.LISTED,
+            url_path_after_course_path="/syllabus",
+            course_id=1,
+            page_id=1,
+        )
+
+    def test_get_or_fetch_caches_page(self):
+        self.assertEqual(self.cache.get_or_fetch(1, "/syllabus", lambda: self.page), self.page)
+        self.assertEqual(self.cache.get_or_fetch(1, "/syllabus", lambda: self.fail("Shouldn't fetch")), self.page)
+
+    def test_missing_page_is_not_cached(self):
+        self.assertIsNone(self.cache.get_or_fetch(1, "/syllabus", lambda: None))
+        self.assertEqual(self.cache.get_or_fetch(1, "/syllabus", lambda: self.page), self.page)
+
+    def test_bump_content_version_refetches(self):
+        self.cache.get_or_fetch(1, "/syllabus", lambda: self.page)
+        self.cache.bump_content_version(1)
+
+        self.assertIsNone(self.cache.get_or_fetch(1, "/syllabus", lambda: None))
+
+    def test_serves_stale_page_while_refetching(self):
+        self.cache.get_or_fetch(1, "/syllabus", lambda: self.page)
+        self.cache.bump_content_version(1)
+        edited_page = Page(**{**self.page.__dict__, "page_content": "# New Syllabus"})
+
+        stale_results = []
+        def fetch():
+            stale_results.append(self.cache.get_or_fetch(1, "/syllabus", lambda: self.fail("Shouldn't fetch twice")))
+            return edited_page
+
+        self.assertEqual(self.cache.get_or_fetch(1, "/syllabus", fetch), edited_page)
+        self.assertEqual(stale_results, [self.page])
+
+    def test_deleted_page_is_not_served_stale(self):
+        self.cache.get_or_fetch(1, "/syllabus", lambda: self.page)
+        self.cache.bump_content_version(1)
+        self.assertIsNone(self.cache.get_or_fetch(1, "/syllabus", lambda: None))
+
+        fetch_started = threading.Event()
+        release_fetch = threading.Event()
+        def slow_fetch():
+            fetch_started.set()
+            release_fetch.wait(5)
+            return None
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(self.cache.get_or_fetch(1, "/syllabus", slow_fetch)))
+        leader.start()
+        fetch_started.wait(5)
+        waiter = threading.Thread(
+            target=lambda: results.append(self.cache.get_or_fetch(1, "/syllabus", lambda: self.fail("Shouldn't fetch")))
+        )
+        waiter.start()
+
+        # The waiter has no stale page to fall back on, so it waits for the leader
+        deadline = time.monotonic() + 5
+        while self.cache.singleflight.stats.waited == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release_fetch.set()
+        leader.join()
+        waiter.join()
+
+        self.assertEqual(results, [None, None])
+        self.assertEqual(self.cache.singleflight.stats.stale_served, 0)
+
+    def test_clear(self):
+        self.cache.get_or_fetch(1, "/syllabus", lambda: self.page)
+        self.cache.clear()
+
+        self.assertIsNone(self.cache.get_or_fetch(1, "/syllabus", lambda: None))
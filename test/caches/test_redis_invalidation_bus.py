@@ -0,0 +1,143 @@
+import socket
+import socketserver
+import threading
+import unittest
+
+from caches.invalidation_bus import subscribe_caches_to_invalidation_bus, USER_TOPIC
+from caches.redis_invalidation_bus import RedisInvalidationBus
+from caches.user_session_cache import UserSessionCache
+from models.user import User
+
+WAIT_SECONDS = 5
+
+
+class StandInRedisServer(socketserver.ThreadingTCPServer):
+    """
+    Handles the AUTH, PUBLISH and SUBSCRIBE commands the bus sends,
+    like a Redis server would.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInRedisHandler)
+        self.subscribers: list[tuple[str, "StandInRedisHandler"]] = []
+        self.subscribers_lock = threading.Lock()
+        self.subscribed = threading.Condition(self.subscribers_lock)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"redis://{host}:{port}"
+
+    def wait_for_subscribers(self, count: int):
+        with self.subscribed:
+            return self.subscribed.wait_for(lambda: len(self.subscribers) >= count, timeout=WAIT_SECONDS)
+
+    def publish(self, channel: bytes, message: bytes) -> int:
+        with self.subscribers_lock:
+            subscribers = [handler for subscribed_channel, handler in self.subscribers if subscribed_channel == channel]
+        for handler in subscribers:
+            handler.write_array([b"message", channel, message])
+        return len(subscribers)
+
+    def disconnect_subscribers(self):
+        with self.subscribers_lock:
+            subscribers, self.subscribers = self.subscribers, []
+        for _, handler in subscribers:
+            handler.request.shutdown(socket.SHUT_RDWR)
+
+
+class StandInRedisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                command = self.read_command()
+            except (OSError, ValueError):
+                return
+            if command is None:
+                return
+
+            name = command[0].upper()
+            if name == b"AUTH":
+                self.wfile.write(b"+OK\r\n")
+            elif name == b"PUBLISH":
+                self.wfile.write(b":%d\r\n" % self.server.publish(command[1], command[2]))
+            elif name == b"SUBSCRIBE":
+                with self.server.subscribed:
+                    self.server.subscribers.append((command[1], self))
+                    self.server.subscribed.notify_all()
+                self.write_array([b"subscribe", command[1], 1])
+            else:
+                self.wfile.write(b"-ERR unknown command\r\n")
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        arg_count = int(line[1:-2])
+        args = []
+        for _ in range(arg_count):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def write_array(self, items: list):
+        reply = b"*%d\r\n" % len(items)
+        for item in items:
+            if isinstance(item, int):
+                reply += b":%d\r\n" % item
+            else:
+                reply += b"$%d\r\n%s\r\n" % (len(item), item)
+        self.wfile.write(reply)
+
+
+class TestRedisInvalidationBus(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInRedisServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.user = User(full_name="Test Name", email="example@example.com", user_id=1, user_uuid="uuid-1")
+        self.buses = []
+
+    def tearDown(self):
+        for bus in self.buses:
+            bus.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def create_subscribed_bus(self, user_session_cache: UserSessionCache) -> RedisInvalidationBus:
+        bus = RedisInvalidationBus(self.server.url, reconnect_delay_seconds=0.05)
+        subscribe_caches_to_invalidation_bus(bus, user_session_cache=user_session_cache)
+        bus.start()
+        self.assertTrue(bus.subscribed.wait(WAIT_SECONDS))
+        self.buses.append(bus)
+        return bus
+
+    def test_publish_evicts_in_other_processes(self):
+        publishing_cache, receiving_cache = UserSessionCache(), UserSessionCache()
+        publishing_bus = self.create_subscribed_bus(publishing_cache)
+        receiving_evicted = threading.Event()
+        receiving_bus = self.create_subscribed_bus(receiving_cache)
+        receiving_bus.subscribe(USER_TOPIC, lambda user_id: receiving_evicted.set())
+
+        publishing_cache.put(self.user)
+        receiving_cache.put(self.user)
+        publishing_bus.publish(USER_TOPIC, self.user.user_id)
+
+        self.assertIsNone(publishing_cache.get(self.user.user_uuid))
+        self.assertTrue(receiving_evicted.wait(WAIT_SECONDS))
+        self.assertIsNone(receiving_cache.get(self.user.user_uuid))
+
+    def test_reconnect_clears_caches(self):
+        user_session_cache = UserSessionCache()
+        bus = self.create_subscribed_bus(user_session_cache)
+        user_session_cache.put(self.user)
+        cleared = threading.Event()
+        bus.subscribe_to_clear(cleared.set)
+
+        self.server.disconnect_subscribers()
+
+        self.assertTrue(cleared.wait(WAIT_SECONDS))
+        self.assertTrue(self.server.wait_for_subscribers(1))
+        self.assertIsNone(user_session_cache.get(self.user.user_uuid))
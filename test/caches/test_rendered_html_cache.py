@@ -0,0 +1,55 @@
+import unittest
+
+from caches.rendered_html_cache import RenderedHtmlCache
+from models.page import Page, VisibilitySetting
+
+
+class TestRenderedHtmlCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = RenderedHtmlCache()
+        self.page = Page(
+            page_title="Syllabus",
+            page_content="# Syllabus",
+            page_visibility_setting=VisibilitySetting.LISTED,
+            url_path_after_course_path="/syllabus",
+            course_id=1,
+            page_id=1,
+        )
+
+    def test_get_after_put(self):
+        self.cache.put(self.page, "/cpsc-408-f24", "<h1>Syllabus</h1>")
+        self.assertEqual(self.cache.get(self.page, "/cpsc-408-f24"), "<h1>Syllabus</h1>")
+
+    def test_edited_content_misses(self):
+        self.cache.put(self.page, "/cpsc-408-f24", "<h1>Syllabus</h1>")
+        self.page.page_content = "# New Syllabus"
+        self.assertIsNone(self.cache.get(self.page, "/cpsc-408-f24"))
+
+    def test_different_course_path_misses(self):
+        self.cache.put(self.page, "/cpsc-408-f24", "<h1>Syllabus</h1>")
+        self.assertIsNone(self.cache.get(self.page, "/cpsc-408-s25"))
+
+    def test_invalidate_page(self):
+        self.cache.put(self.page, "/cpsc-408-f24", "<h1>Syllabus</h1>")
+        self.cache.put(self.page, "/cpsc-408-s25", "<h1>Syllabus</h1>")
+
+        self.cache.invalidate_page(self.page.page_id)
+
+        self.assertIsNone(self.cache.get(self.page, "/cpsc-408-f24"))
+        self.assertIsNone(self.cache.get(self.page, "/cpsc-408-s25"))
+        self.assertEqual(self.cache.total_bytes, 0)
+
+    def test_get_or_render_caches_rendered_html(self):
+        self.assertEqual(self.cache.get_or_render(self.page, "/cpsc-408-f24", lambda: "<h1>Syllabus</h1>"), "<h1>Syllabus</h1>")
+        self.assertEqual(self.cache.get(self.page, "/cpsc-408-f24"), "<h1>Syllabus</h1>")
+
+    def test_get_or_render_serves_stale_html_while_rendering(self):
+        stale_results = []
+        def render():
+            stale_results.append(self.cache.get_or_render(
+                self.page, "/cpsc-408-f24", lambda: self.fail("Shouldn't render twice"), stale_html="<h1>Old</h1>"
+            ))
+            return "<h1>Syllabus</h1>"
+
+        self.assertEqual(self.cache.get_or_render(self.page, "/cpsc-408-f24", render), "<h1>Syllabus</h1>")
+        self.assertEqual(stale_results, ["<h1>Old</h1>"])
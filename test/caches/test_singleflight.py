@@ -0,0 +1,102 @@
+import threading
+import time
+import unittest
+
+from caches.singleflight import SingleFlight
+
+WAIT_SECONDS = 5
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.singleflight = SingleFlight(timeout_seconds=WAIT_SECONDS)
+        self.leader_started = threading.Event()
+        self.release_leader = threading.Event()
+        self.leader_result = []
+
+    def start_blocked_leader(self, compute_result: str = "fresh", fail: bool = False) -> threading.Thread:
+        def compute():
+            self.leader_started.set()
+            self.release_leader.wait(WAIT_SECONDS)
+            if fail:
+                raise RuntimeError("Leader failed")
+            return compute_result
+
+        def run_leader():
+            try:
+                self.leader_result.append(self.singleflight.do("key", compute))
+            except RuntimeError as e:
+                self.leader_result.append(e)
+
+        leader = threading.Thread(target=run_leader)
+        leader.start()
+        self.assertTrue(self.leader_started.wait(WAIT_SECONDS))
+        return leader
+
+    def run_waiters(self, count: int, compute) -> tuple[list[threading.Thread], list]:
+        results = []
+        waiters = [
+            threading.Thread(target=lambda: results.append(self.singleflight.do("key", compute)))
+            for _ in range(count)
+        ]
+        for waiter in waiters:
+            waiter.start()
+        return waiters, results
+
+    def wait_for_waiters(self, count: int):
+        deadline = time.monotonic() + WAIT_SECONDS
+        while self.singleflight.stats.waited < count and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.assertEqual(self.singleflight.stats.waited, count)
+
+    def test_concurrent_calls_share_one_computation(self):
+        leader = self.start_blocked_leader()
+        waiters, results = self.run_waiters(3, lambda: "computed by waiter")
+        self.wait_for_waiters(3)
+
+        self.release_leader.set()
+        for thread in [leader, *waiters]:
+            thread.join(WAIT_SECONDS)
+
+        self.assertEqual(results, ["fresh"] * 3)
+        self.assertEqual(self.leader_result, ["fresh"])
+        self.assertEqual(self.singleflight.stats.leaders, 1)
+        self.assertEqual(self.singleflight.stats.fallbacks, 0)
+
+    def test_stale_value_served_while_computing(self):
+        leader = self.start_blocked_leader()
+
+        result = self.singleflight.do("key", lambda: self.fail("Shouldn't compute"), stale="stale")
+
+        self.release_leader.set()
+        leader.join(WAIT_SECONDS)
+        self.assertEqual(result, "stale")
+        self.assertEqual(self.singleflight.stats.stale_served, 1)
+
+    def test_waiter_computes_itself_after_timeout(self):
+        self.singleflight.timeout_seconds = 0.01
+        leader = self.start_blocked_leader()
+
+        result = self.singleflight.do("key", lambda: "fallback")
+
+        self.release_leader.set()
+        leader.join(WAIT_SECONDS)
+        self.assertEqual(result, "fallback")
+        self.assertEqual(self.singleflight.stats.fallbacks, 1)
+
+    def test_waiter_computes_itself_if_leader_fails(self):
+        leader = self.start_blocked_leader(fail=True)
+        waiters, results = self.run_waiters(1, lambda: "fallback")
+        self.wait_for_waiters(1)
+
+        self.release_leader.set()
+        for thread in [leader, *waiters]:
+            thread.join(WAIT_SECONDS)
+
+        self.assertIsInstance(self.leader_result[0], RuntimeError)
+        self.assertEqual(results, ["fallback"])
+
+    def test_next_call_after_leader_finishes_computes_again(self):
+        self.assertEqual(self.singleflight.do("key", lambda: 1), 1)
+        self.assertEqual(self.singleflight.do("key", lambda: 2), 2)
+        self.assertEqual(self.singleflight.stats.leaders, 2)
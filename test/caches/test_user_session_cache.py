@@ -0,0 +1,35 @@
+import unittest
+from unittest import mock
+
+from caches.user_session_cache import UserSessionCache
+from models.user import User
+
+
+class TestUserSessionCache(unittest.TestCase):
+    def setUp(self):
+        self.user = User(full_name="Test Name", email="example@example.com", user_id=1, user_uuid="uuid-1")
+
+    def test_get_after_put(self):
+        cache = UserSessionCache()
+        cache.put(self.user)
+        self.assertEqual(cache.get(self.user.user_uuid), self.user)
+
+    def test_entries_expire(self):
+        cache = UserSessionCache(ttl_seconds=30)
+        with mock.patch("caches.lru_cache.time.monotonic", return_value=100):
+            cache.put(self.user)
+        with mock.patch("caches.lru_cache.time.monotonic", return_value=129):
+            self.assertEqual(cache.get(self.user.user_uuid), self.user)
+        with mock.patch("caches.lru_cache.time.monotonic", return_value=130):
+            self.assertIsNone(cache.get(self.user.user_uuid))
+
+    def test_invalidate_user_id(self):
+        cache = UserSessionCache()
+        other_user = User(full_name="Other Name", email="other@example.com", user_id=2, user_uuid="uuid-2")
+        cache.put(self.user)
+        cache.put(other_user)
+
+        cache.invalidate_user_id(self.user.user_id)
+
+        self.assertIsNone(cache.get(self.user.user_uuid))
+        self.assertEqual(cache.get(other_user.user_uuid), other_user)
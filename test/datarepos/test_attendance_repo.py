@@ -86,16 +86,19 @@ class TestAttendanceRepo(TestWithDatabaseContainer):
         self.assertEqual(returned_session.course_id, course.course_id)
         self.assertEqual(returned_session.attendance_session_id, session_id)
 
+        # Records are sparse, so none are stored until statuses are saved
         check_records_query = '''
-        SELECT atr.user_id, atr.attendance_session_id, atr.attendance_status
+        SELECT atr.user_id
         FROM attendance_record atr
         WHERE atr.attendance_session_id = %s
         '''
 
         cursor.execute(check_records_query, params)
-        results = cursor.fetchall()
-        returned_records = [AttendanceRecord(**result) for result in results]
+        self.assertEqual(cursor.fetchall(), [])
+
+        returned_records = self.attendance_repo.get_student_attendance_records_with_names_from_session_id(session_id)
 
+        self.assertEqual(len(returned_records), len(users))
         for record in returned_records:
             matching_user = [user for user in users if user.user_id == record.user_id]
             self.assertEqual(len(matching_user), 1)
@@ -257,6 +260,131 @@ class TestAttendanceRepo(TestWithDatabaseContainer):
 
         self.assertEqual(attendance_status, records[0].attendance_status.value)
 
+    def get_attendance_statuses_by_user_id(self, attendance_session_id: int) -> dict[int, AttendanceRecordStatus]:
+        check_records_query = '''
+        SELECT atr.user_id, atr.attendance_status
+        FROM attendance_record atr
+        WHERE atr.attendance_session_id = %s
+        '''
+        params = (attendance_session_id,)
+
+        cursor = self.connection.cursor()
+        cursor.execute(check_records_query, params)
+        return {user_id: AttendanceRecordStatus(status) for user_id, status in cursor.fetchall()}
+
+    def test_update_changed_statuses_by_attendance_session_id(self):
+        course, users = self.add_course_and_users_for_attendance_test()
+
+        attendance_session = AttendanceSession(
+            course_id=course.course_id,
+            opening_time=datetime.now(),
+            title="Attendance Session",
+        )
+        attendance_session.attendance_session_id = self.add_single_attendance_session_and_get_id(attendance_session)
+        loaded_records = self.attendance_repo.get_student_attendance_records_with_names_from_session_id(
+            attendance_session.attendance_session_id,
+        )
+
+        submitted_statuses = [
+            AttendanceRecordStatus.PRESENT,
+            AttendanceRecordStatus.NONE,
+            AttendanceRecordStatus.LATE,
+            AttendanceRecordStatus.ABSENT,
+            AttendanceRecordStatus.NONE,
+        ]
+        submitted_records = [
+            AttendanceRecord(
+                user_id=user.user_id,
+                attendance_session_id=attendance_session.attendance_session_id,
+                attendance_status=status,
+            )
+            for user, status in zip(users, submitted_statuses)
+        ]
+
+        # Spread the changes over more than one statement
+        self.attendance_repo.BULK_UPDATE_BATCH_SIZE = 2
+        updated_count = self.attendance_repo.update_changed_statuses_by_attendance_session_id(
+            attendance_session.attendance_session_id,
+            submitted_records,
+            loaded_records,
+        )
+
+        self.assertEqual(updated_count, 3)
+        self.assertEqual(
+            self.get_attendance_statuses_by_user_id(attendance_session.attendance_session_id),
+            {
+                user.user_id: status
+                for user, status in zip(users, submitted_statuses)
+                if status != AttendanceRecordStatus.NONE
+            },
+        )
+
+    def test_update_changed_statuses_with_missing_records(self):
+        course, users = self.add_course_and_users_for_attendance_test()
+
+        attendance_session = AttendanceSession(
+            course_id=course.course_id,
+            opening_time=datetime.now(),
+            title="Attendance Session",
+        )
+        attendance_session.attendance_session_id = self.add_single_attendance_session_and_get_id(attendance_session)
+        loaded_records = self.add_student_attendance_records_for_users(attendance_session.attendance_session_id, users[:3])
+
+        submitted_records = [
+            AttendanceRecord(
+                user_id=user.user_id,
+                attendance_session_id=attendance_session.attendance_session_id,
+                attendance_status=AttendanceRecordStatus.PRESENT,
+            )
+            for user in users
+        ]
+
+        with self.assertRaises(NotFoundException) as context:
+            self.attendance_repo.update_changed_statuses_by_attendance_session_id(
+                attendance_session.attendance_session_id,
+                submitted_records,
+                loaded_records,
+            )
+
+        self.assertIn(str([users[3].user_id, users[4].user_id]), str(context.exception))
+        self.assertEqual(
+            set(self.get_attendance_statuses_by_user_id(attendance_session.attendance_session_id).values()),
+            {AttendanceRecordStatus.NONE},
+        )
+
+    def test_update_attendance_record_status_without_record(self):
+        course, users = self.add_course_and_users_for_attendance_test()
+        session_id = self.attendance_repo.start_new_attendance_session_and_get_id(course.course_id)
+
+        self.attendance_repo.update_status_by_attendance_session_and_user_id(AttendanceRecord(
+            user_id=users[0].user_id,
+            attendance_session_id=session_id,
+            attendance_status=AttendanceRecordStatus.PRESENT,
+        ))
+        self.assertEqual(self.get_attendance_statuses_by_user_id(session_id), {users[0].user_id: AttendanceRecordStatus.PRESENT})
+
+        # NONE is stored as no record
+        self.attendance_repo.update_status_by_attendance_session_and_user_id(AttendanceRecord(
+            user_id=users[0].user_id,
+            attendance_session_id=session_id,
+            attendance_status=AttendanceRecordStatus.NONE,
+        ))
+        self.assertEqual(self.get_attendance_statuses_by_user_id(session_id), {})
+        self.assertEqual(
+            self.get_deleted_row_keys('attendance_record'),
+            [{'user_id': users[0].user_id, 'attendance_session_id': session_id}]
+        )
+
+    def test_update_attendance_record_status_of_nonexistent_session(self):
+        course, users = self.add_course_and_users_for_attendance_test()
+
+        with self.assertRaises(NotFoundException):
+            self.attendance_repo.update_status_by_attendance_session_and_user_id(AttendanceRecord(
+                user_id=users[0].user_id,
+                attendance_session_id=12345,
+                attendance_status=AttendanceRecordStatus.PRESENT,
+            ))
+
     def test_get_active_attendance_sessions_from_course_id(self):
         course, users = self.add_course_and_users_for_attendance_test()
 
@@ -310,3 +438,29 @@ class TestAttendanceRepo(TestWithDatabaseContainer):
 
             self.assertEqual(matching_record.attendance_status, returned_record.attendance_status)
 
+    def test_get_student_attendance_records_for_enrollment_changes(self):
+        course, users = self.add_course_and_users_for_attendance_test()
+        session_id = self.attendance_repo.start_new_attendance_session_and_get_id(course.course_id)
+
+        dropped_user = users[0]
+        self.add_single_attendance_record(AttendanceRecord(
+            user_id=dropped_user.user_id,
+            attendance_session_id=session_id,
+            attendance_status=AttendanceRecordStatus.PRESENT,
+        ))
+        delete_enrollment_query = '''
+        DELETE FROM enrollment
+        WHERE enrollment.user_id = %s
+        '''
+        cursor = self.connection.cursor()
+        cursor.execute(delete_enrollment_query, (dropped_user.user_id,))
+        self.connection.commit()
+
+        returned_records = self.attendance_repo.get_student_attendance_records_with_names_from_session_id(session_id)
+        returned_statuses = {record.user_id: record.attendance_status for record in returned_records}
+
+        # Dropped students keep their saved records, and the rest count as NONE
+        self.assertEqual(returned_statuses, {
+            user.user_id: AttendanceRecordStatus.PRESENT if user == dropped_user else AttendanceRecordStatus.NONE
+            for user in users
+        })
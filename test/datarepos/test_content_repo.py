@@ -1,9 +1,13 @@
 from typing import Optional
 
+from caches.invalidation_bus import InvalidationBus, subscribe_caches_to_invalidation_bus
+from caches.nav_tree_cache import NavTreeCache
+from caches.rendered_html_cache import RenderedHtmlCache
 from custom_exceptions import AlreadyExistsException, NotFoundException
 from datarepos.content_repo import ContentRepo
 from models.page import Page, VisibilitySetting
 from models.page_navigation_link import PageNavigationLink
+from page_renderer import RENDERER_VERSION
 from test.test_with_database_container import TestWithDatabaseContainer
 
 
@@ -371,3 +375,146 @@ Embark on your journey into the exciting world of game development today!
         links = links[0].nested_links
         self.assertEqual(links[0].url_path_after_course_path, "/nested-parent-page/nested-child-1/nested-child-2")
 
+
+    def test_generate_listed_page_navigation_link_tree_ordering_and_orphans(self):
+        user, _ = self.add_sample_user_to_test_db()
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        course = courses[0]
+
+        pages_to_add = [
+            ("/b-page", "B Page", VisibilitySetting.LISTED),
+            ("/a-page", "A Page", VisibilitySetting.LISTED),
+            ("/a-page/z-child", "Z Child", VisibilitySetting.LISTED),
+            ("/a-page/y-child", "Y Child", VisibilitySetting.LISTED),
+            ("/a-pages/child", "Prefix Collision Child", VisibilitySetting.LISTED),
+            ("/hidden-parent", "Hidden Parent", VisibilitySetting.HIDDEN),
+            ("/hidden-parent/orphan", "Orphan", VisibilitySetting.LISTED),
+        ]
+
+        for url_path, title, visibility_setting in pages_to_add:
+            page = self.return_sample_page(course.course_id, user.user_id)
+            page.url_path_after_course_path = url_path
+            page.page_title = title
+            page.page_visibility_setting = visibility_setting
+            self.add_single_page_and_get_id(page)
+
+        links = self.content_repo.generate_listed_page_navigation_link_tree_for_course_id(
+            course.course_id
+        )
+
+        self.assertEqual([link.url_path_after_course_path for link in links], ["/a-page", "/b-page"])
+        self.assertEqual(
+            [link.url_path_after_course_path for link in links[0].nested_links],
+            ["/a-page/y-child", "/a-page/z-child"],
+        )
+        self.assertEqual(len(links[1].nested_links), 0)
+
+    def test_generate_listed_page_navigation_link_tree_with_cache(self):
+        user, _ = self.add_sample_user_to_test_db()
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        course = courses[0]
+
+        nav_tree_cache = NavTreeCache()
+        invalidation_bus = InvalidationBus()
+        subscribe_caches_to_invalidation_bus(invalidation_bus, nav_tree_cache=nav_tree_cache)
+        content_repo = ContentRepo(self.connection, nav_tree_cache=nav_tree_cache, invalidation_bus=invalidation_bus)
+
+        first_page = self.return_sample_page(course.course_id, user.user_id)
+        first_page.page_id = content_repo.add_new_page_and_get_id(first_page)
+
+        links = content_repo.generate_listed_page_navigation_link_tree_for_course_id(course.course_id)
+        self.assertEqual(len(links), 1)
+
+        content_repo.generate_listed_page_navigation_link_tree_for_course_id(course.course_id)
+        self.assertEqual(nav_tree_cache.stats.hits, 1)
+
+        # Writes through the repo invalidate the cached tree
+        second_page = self.return_sample_page(course.course_id, user.user_id)
+        second_page.url_path_after_course_path = "/page-2"
+        content_repo.add_new_page_and_get_id(second_page)
+
+        links = content_repo.generate_listed_page_navigation_link_tree_for_course_id(course.course_id)
+        self.assertEqual(len(links), 2)
+
+        content_repo.delete_page_by_id(first_page.page_id)
+
+        links = content_repo.generate_listed_page_navigation_link_tree_for_course_id(course.course_id)
+        self.assertEqual(len(links), 1)
+
+    def test_update_page_invalidates_rendered_html(self):
+        user, _ = self.add_sample_user_to_test_db()
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        course = courses[0]
+
+        rendered_html_cache = RenderedHtmlCache()
+        invalidation_bus = InvalidationBus()
+        subscribe_caches_to_invalidation_bus(invalidation_bus, rendered_html_cache=rendered_html_cache)
+        content_repo = ContentRepo(self.connection, invalidation_bus=invalidation_bus)
+
+        page = self.return_sample_page(course.course_id, user.user_id)
+        page.page_id = content_repo.add_new_page_and_get_id(page)
+        rendered_html_cache.put(page, course.starting_url_path, "<p>Old</p>")
+
+        content_repo.update_page_by_id(page)
+
+        self.assertIsNone(rendered_html_cache.get(page, course.starting_url_path))
+
+    def test_add_new_page_stores_rendered_html(self):
+        user, _ = self.add_sample_user_to_test_db()
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        course = courses[0]
+
+        new_page = self.return_sample_page(course.course_id, user.user_id)
+        new_page.page_id = self.content_repo.add_new_page_and_get_id(new_page)
+
+        page_from_repo = self.content_repo.get_page_by_id_if_exists(new_page.page_id)
+        self.assertIn(f'href="{course.starting_url_path}/office-hours"', page_from_repo.page_html)
+        self.assertEqual(page_from_repo.page_html_renderer_version, RENDERER_VERSION)
+        self.assertEqual(page_from_repo.page_html_starting_url_path, course.starting_url_path)
+
+    def test_store_rendered_page_html_skips_changed_content(self):
+        user, _ = self.add_sample_user_to_test_db()
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        course = courses[0]
+
+        page = self.return_sample_page(course.course_id, user.user_id)
+        page.page_id = self.add_single_page_and_get_id(page)
+
+        outdated_page = self.content_repo.get_page_by_id_if_exists(page.page_id)
+        outdated_page.page_content = "Old content"
+        self.content_repo.store_rendered_page_html(outdated_page, course.starting_url_path, "<p>Old content</p>")
+        self.assertIsNone(self.content_repo.get_page_by_id_if_exists(page.page_id).page_html)
+
+        self.content_repo.store_rendered_page_html(page, course.starting_url_path, "<p>Content</p>")
+        self.assertEqual(self.content_repo.get_page_by_id_if_exists(page.page_id).page_html, "<p>Content</p>")
+
+    def test_store_rendered_page_html_skips_content_changed_only_in_case_and_accents(self):
+        user, _ = self.add_sample_user_to_test_db()
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        course = courses[0]
+
+        page = self.return_sample_page(course.course_id, user.user_id)
+        page.page_content = "resume"
+        page.page_id = self.add_single_page_and_get_id(page)
+
+        outdated_page = self.content_repo.get_page_by_id_if_exists(page.page_id)
+        outdated_page.page_content = "Résumé"
+        self.content_repo.store_rendered_page_html(outdated_page, course.starting_url_path, "<p>Résumé</p>")
+
+        self.assertIsNone(self.content_repo.get_page_by_id_if_exists(page.page_id).page_html)
+
+    def test_rerender_stale_pages(self):
+        user, _ = self.add_sample_user_to_test_db()
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+
+        # Inserted directly, so neither page has stored HTML
+        for course in courses:
+            self.add_single_page_and_get_id(self.return_sample_page(course.course_id, user.user_id))
+
+        self.assertEqual(self.content_repo.rerender_stale_pages(batch_size=1), 2)
+        self.assertEqual(self.content_repo.rerender_stale_pages(), 0)
+        self.assertEqual(self.content_repo.rerender_stale_pages(rerender_all=True), 2)
+
+        for course in courses:
+            page = self.content_repo.get_page_by_url_and_course_id_if_exists(course.course_id, "/page-1")
+            self.assertEqual(page.page_html_starting_url_path, course.starting_url_path)
@@ -1,5 +1,7 @@
 import copy
 
+from caches.course_enrollment_cache import CourseEnrollmentCache
+from caches.invalidation_bus import InvalidationBus, subscribe_caches_to_invalidation_bus
 from custom_exceptions import AlreadyExistsException, NotFoundException, DependencyException
 from models.course_enrollment import CourseEnrollment, Role
 from datarepos.course_repo import CourseRepo
@@ -354,6 +356,13 @@ class TestCourseRepo(TestWithDatabaseContainer):
         result = cursor.fetchone()
         self.assertEqual(result, None)
 
+    def test_delete_course_by_id_leaves_tombstone(self):
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+
+        self.course_repo.delete_course_by_id(courses[0].course_id)
+
+        self.assertEqual(self.get_deleted_row_keys('course'), [{'course_id': courses[0].course_id}])
+
     def test_delete_course_by_id_if_not_exists(self):
         nonexistent_course_id = 1
 
@@ -388,6 +397,7 @@ class TestCourseRepo(TestWithDatabaseContainer):
         '''
         params = (course_to_delete.course_id,)
         self.assert_single_course_against_database_query(course_select_query, course_to_delete, params)
+        self.assertEqual(self.get_deleted_row_keys('course'), [])
 
     def test_get_user_role_in_class_if_different_roles_exist(self):
         roles = list(Role)
@@ -519,3 +529,39 @@ class TestCourseRepo(TestWithDatabaseContainer):
 
         with self.assertRaises(NotFoundException):
             self.course_repo.delete_course_enrollment_by_id(nonexistent_course_id, nonexistent_user_id)
+
+    def test_cached_role_and_course_are_invalidated_by_writes(self):
+        user, _ = self.add_sample_user_to_test_db()
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        course = courses[0]
+
+        course_enrollment_cache = CourseEnrollmentCache()
+        invalidation_bus = InvalidationBus()
+        subscribe_caches_to_invalidation_bus(invalidation_bus, course_enrollment_cache=course_enrollment_cache)
+        course_repo = CourseRepo(
+            self.connection,
+            course_enrollment_cache=course_enrollment_cache,
+            invalidation_bus=invalidation_bus,
+        )
+
+        enrollment = CourseEnrollment(course_id=course.course_id, user_id=user.user_id, role=Role.STUDENT)
+        course_repo.add_course_enrollment(enrollment)
+
+        self.assertEqual(course_repo.get_user_role_in_class_if_exists(user.user_id, course.course_id), Role.STUDENT)
+        self.assertEqual(course_repo.get_user_role_in_class_if_exists(user.user_id, course.course_id), Role.STUDENT)
+        self.assertEqual(course_enrollment_cache.role_stats.hits, 1)
+
+        enrollment.role = Role.ASSISTANT
+        course_repo.update_role_by_course_and_user_id(enrollment)
+        self.assertEqual(course_repo.get_user_role_in_class_if_exists(user.user_id, course.course_id), Role.ASSISTANT)
+
+        course_repo.delete_course_enrollment_by_id(course.course_id, user.user_id)
+        self.assertIsNone(course_repo.get_user_role_in_class_if_exists(user.user_id, course.course_id))
+
+        old_starting_url_path = course.starting_url_path
+        self.assertEqual(course_repo.get_course_by_starting_url_if_exists(old_starting_url_path), course)
+
+        course.starting_url_path = "/renamed-course"
+        course_repo.update_course_metadata_by_id(course)
+        self.assertIsNone(course_repo.get_course_by_starting_url_if_exists(old_starting_url_path))
+        self.assertEqual(course_repo.get_course_by_starting_url_if_exists(course.starting_url_path), course)
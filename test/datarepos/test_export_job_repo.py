@@ -0,0 +1,116 @@
+from custom_exceptions import NotFoundException
+from datarepos.export_job_repo import ExportJobRepo
+from models.export_job import ExportJobStatus
+from test.test_with_database_container import TestWithDatabaseContainer
+
+
+class TestExportJobRepo(TestWithDatabaseContainer):
+    def setUp(self):
+        super().setUp()
+        self.export_job_repo = ExportJobRepo(self.connection)
+
+    def test_add_export_job(self):
+        export_job, is_new = self.export_job_repo.add_export_job_or_get_active('tables', stale_after_seconds=600)
+
+        self.assertTrue(is_new)
+        self.assertEqual(export_job.export_type, 'tables')
+        self.assertEqual(export_job.status, ExportJobStatus.QUEUED)
+        self.assertEqual(export_job.progress, {})
+        self.assertEqual(self.export_job_repo.get_export_job_by_id(export_job.export_job_id), export_job)
+
+    def test_add_export_job_returns_active_job_of_same_type(self):
+        first_job, _ = self.export_job_repo.add_export_job_or_get_active('tables', stale_after_seconds=600)
+        self.export_job_repo.mark_export_job_running(first_job.export_job_id)
+
+        second_job, is_new = self.export_job_repo.add_export_job_or_get_active('tables', stale_after_seconds=600)
+        other_type_job, other_type_is_new = self.export_job_repo.add_export_job_or_get_active(
+            'student_count_per_class', stale_after_seconds=600
+        )
+
+        self.assertFalse(is_new)
+        self.assertEqual(second_job.export_job_id, first_job.export_job_id)
+        self.assertEqual(second_job.status, ExportJobStatus.RUNNING)
+        self.assertTrue(other_type_is_new)
+        self.assertNotEqual(other_type_job.export_job_id, first_job.export_job_id)
+
+    def test_add_export_job_in_another_format_while_one_is_active(self):
+        csv_job, _ = self.export_job_repo.add_export_job_or_get_active('tables', stale_after_seconds=600)
+
+        columnar_job, is_new = self.export_job_repo.add_export_job_or_get_active(
+            'tables', stale_after_seconds=600, export_format='columnar'
+        )
+
+        self.assertTrue(is_new)
+        self.assertNotEqual(columnar_job.export_job_id, csv_job.export_job_id)
+        self.assertEqual(columnar_job.export_format, 'columnar')
+        self.assertEqual(self.export_job_repo.get_active_export_job('tables', 'columnar'), columnar_job)
+        self.assertEqual(self.export_job_repo.get_active_export_job('tables'), csv_job)
+
+    def test_add_export_job_after_previous_finished(self):
+        first_job, _ = self.export_job_repo.add_export_job_or_get_active('tables', stale_after_seconds=600)
+        self.export_job_repo.mark_export_job_running(first_job.export_job_id)
+        self.export_job_repo.finish_export_job(first_job.export_job_id, ExportJobStatus.SUCCEEDED, {'courses.csv': 3})
+
+        second_job, is_new = self.export_job_repo.add_export_job_or_get_active('tables', stale_after_seconds=600)
+
+        self.assertTrue(is_new)
+        self.assertNotEqual(second_job.export_job_id, first_job.export_job_id)
+        finished_job = self.export_job_repo.get_export_job_by_id(first_job.export_job_id)
+        self.assertEqual(finished_job.progress, {'courses.csv': 3})
+        self.assertIsNotNone(finished_job.finished_at)
+
+    def test_add_export_job_fails_stale_active_job(self):
+        stale_job, _ = self.export_job_repo.add_export_job_or_get_active('tables', stale_after_seconds=600)
+        self.export_job_repo.mark_export_job_running(stale_job.export_job_id)
+
+        new_job, is_new = self.export_job_repo.add_export_job_or_get_active('tables', stale_after_seconds=0)
+
+        self.assertTrue(is_new)
+        self.assertNotEqual(new_job.export_job_id, stale_job.export_job_id)
+        self.assertEqual(
+            self.export_job_repo.get_export_job_by_id(stale_job.export_job_id).status,
+            ExportJobStatus.FAILED
+        )
+
+    def test_get_nonexistent_export_job(self):
+        with self.assertRaises(NotFoundException):
+            self.export_job_repo.get_export_job_by_id(1)
+
+    def test_cancel_queued_export_job(self):
+        export_job, _ = self.export_job_repo.add_export_job_or_get_active('tables', stale_after_seconds=600)
+
+        self.export_job_repo.request_export_job_cancel(export_job.export_job_id)
+
+        cancelled_job = self.export_job_repo.get_export_job_by_id(export_job.export_job_id)
+        self.assertEqual(cancelled_job.status, ExportJobStatus.CANCELLED)
+        self.assertIsNotNone(cancelled_job.finished_at)
+        with self.assertRaises(NotFoundException):
+            self.export_job_repo.mark_export_job_running(export_job.export_job_id)
+
+    def test_cancel_running_export_job(self):
+        export_job, _ = self.export_job_repo.add_export_job_or_get_active('tables', stale_after_seconds=600)
+        self.export_job_repo.mark_export_job_running(export_job.export_job_id)
+        self.assertFalse(self.export_job_repo.update_export_job_progress(export_job.export_job_id, {'users.csv': 10}))
+
+        self.export_job_repo.request_export_job_cancel(export_job.export_job_id)
+
+        running_job = self.export_job_repo.get_export_job_by_id(export_job.export_job_id)
+        self.assertEqual(running_job.status, ExportJobStatus.RUNNING)
+        self.assertTrue(running_job.cancel_requested)
+        self.assertTrue(self.export_job_repo.update_export_job_progress(export_job.export_job_id, {'users.csv': 20}))
+
+    def test_cancel_finished_export_job(self):
+        export_job, _ = self.export_job_repo.add_export_job_or_get_active('tables', stale_after_seconds=600)
+        self.export_job_repo.mark_export_job_running(export_job.export_job_id)
+        self.export_job_repo.finish_export_job(export_job.export_job_id, ExportJobStatus.FAILED, {}, 'Error')
+
+        with self.assertRaises(NotFoundException):
+            self.export_job_repo.request_export_job_cancel(export_job.export_job_id)
+
+    def test_get_recent_export_jobs(self):
+        first_job, _ = self.export_job_repo.add_export_job_or_get_active('tables', stale_after_seconds=600)
+        second_job, _ = self.export_job_repo.add_export_job_or_get_active('student_count_per_class', stale_after_seconds=600)
+
+        recent_jobs = self.export_job_repo.get_recent_export_jobs(limit=1)
+
+        self.assertEqual([job.export_job_id for job in recent_jobs], [second_job.export_job_id])
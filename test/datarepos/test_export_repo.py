@@ -0,0 +1,140 @@
+import json
+from datetime import datetime
+from unittest import mock
+
+from datarepos.course_repo import CourseRepo
+from datarepos.export_repo import ExportRepo
+from models.course_enrollment import CourseEnrollment, Role
+from models.export_column import ExportColumn, ExportColumnType
+from test.test_with_database_container import TestWithDatabaseContainer
+
+
+class TestExportRepo(TestWithDatabaseContainer):
+    def setUp(self):
+        super().setUp()
+        self.export_repo = ExportRepo(self.connection)
+
+    def test_stream_table_rows_in_batches(self):
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+
+        with mock.patch('datarepos.export_repo.EXPORT_FETCH_BATCH_SIZE', 2):
+            rows = list(self.export_repo.stream_table_rows('course'))
+
+        self.assertEqual(sorted(row[0] for row in rows), sorted(course.course_id for course in courses))
+
+    def test_stream_table_rows_rejects_other_tables(self):
+        with self.assertRaises(ValueError):
+            self.export_repo.stream_table_rows('cache_version; DROP TABLE user')
+
+    def test_get_table_columns(self):
+        columns = self.export_repo.get_table_columns('attendance_record')
+
+        self.assertEqual(columns, [
+            ExportColumn('user_id', ExportColumnType.INT),
+            ExportColumn('attendance_session_id', ExportColumnType.INT),
+            ExportColumn('attendance_status', ExportColumnType.SMALL_INT),
+            ExportColumn('updated_at', ExportColumnType.DATETIME),
+        ])
+
+    def test_get_attendance_records_and_students_columns(self):
+        columns = self.export_repo.get_attendance_records_and_students_columns()
+
+        self.assertEqual([column.name for column in columns], [
+            'full_name', 'email', 'user_id', 'attendance_session_id', 'attendance_status', 'title',
+            'user_friendly_class_code',
+        ])
+        self.assertEqual(columns[4].column_type, ExportColumnType.SMALL_INT)
+        self.assertEqual(columns[0].column_type, ExportColumnType.TEXT)
+
+    def test_stream_student_count_per_class_rows(self):
+        self.add_many_sample_users_to_test_db()
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        self.add_single_enrollment(CourseEnrollment(course_id=courses[0].course_id, user_id=1, role=Role.STUDENT))
+        self.add_single_enrollment(CourseEnrollment(course_id=courses[0].course_id, user_id=2, role=Role.STUDENT))
+        self.add_single_enrollment(CourseEnrollment(course_id=courses[1].course_id, user_id=3, role=Role.STUDENT))
+
+        rows = list(self.export_repo.stream_student_count_per_class_rows())
+
+        self.assertEqual(
+            sorted((row[0], row[3]) for row in rows),
+            sorted([(courses[0].course_id, 2), (courses[1].course_id, 1)])
+        )
+
+    def test_connection_is_usable_after_stream_is_abandoned(self):
+        self.add_sample_course_term_and_course_cluster()
+
+        with mock.patch('datarepos.export_repo.EXPORT_FETCH_BATCH_SIZE', 1):
+            rows = self.export_repo.stream_table_rows('course')
+            next(rows)
+            rows.close()
+
+        self.assertEqual(len(list(self.export_repo.stream_table_rows('course'))), 3)
+
+    def test_abandoned_stream_shuts_down_its_own_connection(self):
+        self.add_sample_course_term_and_course_cluster()
+        download_repo = ExportRepo(self.database_config.connect(), abandon_unread_rows=True)
+
+        with mock.patch('datarepos.export_repo.EXPORT_FETCH_BATCH_SIZE', 1):
+            rows = download_repo.stream_table_rows('course')
+            next(rows)
+            rows.close()
+
+        self.assertFalse(download_repo.connection_is_open)
+        download_repo.close_connection()
+
+    def test_snapshot_does_not_see_later_writes(self):
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        snapshot_repo = ExportRepo(self.database_config.connect())
+        snapshot_repo.start_snapshot()
+
+        cursor = self.connection.cursor()
+        cursor.execute(
+            "INSERT INTO course(title, user_friendly_class_code, starting_url_path, course_term_id) VALUES (%s, %s, %s, %s)",
+            ("Compilers", "CPSC 402", "/cpsc-402-f24", courses[0].course_term_id)
+        )
+        self.connection.commit()
+
+        self.assertEqual(len(list(snapshot_repo.stream_table_rows('course'))), 3)
+        self.assertEqual(len(list(self.export_repo.stream_table_rows('course'))), 4)
+        snapshot_repo.close_connection()
+
+    def test_lock_tables_rejects_other_tables(self):
+        with self.assertRaises(ValueError):
+            self.export_repo.lock_tables_for_reading(['course', 'enrollment'])
+
+    def test_stream_changed_table_rows(self):
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        changed_after = self.export_repo.lock_tables_for_reading(['course'])
+        self.export_repo.unlock_tables()
+
+        cursor = self.connection.cursor()
+        cursor.execute("UPDATE course SET title = %s WHERE course_id = %s", ("Renamed", courses[2].course_id))
+        self.connection.commit()
+
+        rows = list(self.export_repo.stream_changed_table_rows('course', changed_after))
+        self.assertEqual([row[0] for row in rows], [courses[2].course_id])
+
+    def test_save_high_water_marks_never_moves_back(self):
+        self.assertEqual(self.export_repo.get_high_water_marks(), {})
+        earlier = datetime(2025, 1, 1, 12, 0, 0)
+        later = datetime(2025, 1, 2, 12, 0, 0)
+
+        self.export_repo.save_high_water_marks(['course', 'user'], later)
+        self.export_repo.save_high_water_marks(['course'], earlier)
+
+        self.assertEqual(self.export_repo.get_high_water_marks(), {'course': later, 'user': later})
+
+    def test_save_high_water_marks_drops_exported_tombstones(self):
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        CourseRepo(self.connection).delete_course_by_id(courses[0].course_id)
+        exported_through = self.export_repo.lock_tables_for_reading(['course'])
+        self.export_repo.unlock_tables()
+        CourseRepo(self.connection).delete_course_by_id(courses[1].course_id)
+
+        self.export_repo.save_high_water_marks(['course'], exported_through)
+
+        self.assertEqual(self.get_deleted_row_keys('course'), [{'course_id': courses[1].course_id}])
+        self.assertEqual(
+            [json.loads(row_key) for row_key, _ in self.export_repo.stream_deleted_row_keys('course', exported_through)],
+            [{'course_id': courses[1].course_id}]
+        )
@@ -0,0 +1,133 @@
+from os import system
+from pathlib import Path
+
+from caches.nav_tree_cache import NavTreeCache
+from datarepos.content_repo import ContentRepo
+from datarepos.unit_of_work import UnitOfWork
+from db_connection_details import DBConnectionDetails
+from models.page import Page, VisibilitySetting
+from test.test_with_database_container import TestWithDatabaseContainer, TEST_ROOT_PASSWORD
+
+REPLICA_SCHEMA_NAME = "test_replica"
+
+
+class TestReplicaRouting(TestWithDatabaseContainer):
+    """
+    Stands in for a replica with a second schema on the same server, so
+    tests can tell which connection a query went to by which data it sees.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.replica_config = DBConnectionDetails(
+            host=self.database_config.host,
+            port=self.database_config.port,
+            user="root",
+            password=TEST_ROOT_PASSWORD,
+            database=REPLICA_SCHEMA_NAME,
+        )
+        self.run_sql_file_as_root("setup_schema.sql")
+
+        self.primary_connection = self.database_config.connect()
+        self.replica_connection = self.replica_config.connect()
+
+        self.unit_of_work = UnitOfWork(
+            connection=self.primary_connection,
+            replica_connection_provider=lambda: self.replica_connection,
+        )
+        self.content_repo = ContentRepo(unit_of_work=self.unit_of_work)
+
+    def tearDown(self):
+        self.primary_connection.close()
+        self.replica_connection.close()
+        self.run_sql_file_as_root("teardown_schema.sql")
+        super().tearDown()
+
+    def run_sql_file_as_root(self, file_name: str):
+        host = '127.0.0.1' if self.database_config.host == 'localhost' else self.database_config.host
+        sql_file_path = Path(__file__).resolve().parent.parent.parent / 'sql' / file_name
+
+        system(f'mysql -u root -p{TEST_ROOT_PASSWORD} --host={host} --port={self.database_config.port} '
+               f'-e "CREATE SCHEMA IF NOT EXISTS {REPLICA_SCHEMA_NAME};"')
+        system(f'mysql -u root -p{TEST_ROOT_PASSWORD} --host={host} --port={self.database_config.port} '
+               f'{REPLICA_SCHEMA_NAME} < "{sql_file_path}"')
+
+    def add_replica_only_page(self, course_id: int):
+        cursor = self.replica_connection.cursor()
+        cursor.execute('''
+        INSERT INTO course_term (course_term_id, title, position_from_top)
+        VALUES (1, 'Fall 2024', 1);
+        ''')
+        cursor.execute('''
+        INSERT INTO course (course_id, title, user_friendly_class_code, starting_url_path, course_term_id)
+        VALUES (%s, 'Visual Programming', 'CPSC 236', '/cpsc-236-f24', 1);
+        ''', (course_id,))
+        self.replica_connection.commit()
+
+        page = Page(
+            page_title="Replica Page",
+            page_content="# Replica",
+            page_visibility_setting=VisibilitySetting.LISTED,
+            url_path_after_course_path="/replica-page",
+            course_id=course_id,
+        )
+        cursor.execute('''
+        INSERT INTO page (page_visibility_setting, page_content, page_title, url_path_after_course_path, course_id)
+        VALUES (%s, %s, %s, %s, %s);
+        ''', (page.page_visibility_setting.value, page.page_content, page.page_title,
+              page.url_path_after_course_path, page.course_id))
+        self.replica_connection.commit()
+        return page
+
+    def test_reads_go_to_replica(self):
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        page = self.add_replica_only_page(courses[0].course_id)
+
+        page_from_repo = self.content_repo.get_page_by_url_and_course_id_if_exists(
+            page.course_id, page.url_path_after_course_path
+        )
+        self.assertIsNotNone(page_from_repo)
+        self.assertEqual(page_from_repo.page_title, page.page_title)
+
+    def test_reads_go_to_primary_after_write(self):
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        page = self.add_replica_only_page(courses[0].course_id)
+
+        written_page = Page(
+            page_title="Primary Page",
+            page_content="# Primary",
+            page_visibility_setting=VisibilitySetting.LISTED,
+            url_path_after_course_path="/primary-page",
+            course_id=courses[0].course_id,
+        )
+        self.content_repo.add_new_page_and_get_id(written_page)
+
+        self.assertIsNotNone(self.content_repo.get_page_by_url_and_course_id_if_exists(
+            written_page.course_id, written_page.url_path_after_course_path
+        ))
+        self.assertIsNone(self.content_repo.get_page_by_url_and_course_id_if_exists(
+            page.course_id, page.url_path_after_course_path
+        ))
+
+    def test_pinned_reads_go_to_primary(self):
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        page = self.add_replica_only_page(courses[0].course_id)
+
+        self.unit_of_work.pin_reads_to_primary = True
+
+        self.assertIsNone(self.content_repo.get_page_by_url_and_course_id_if_exists(
+            page.course_id, page.url_path_after_course_path
+        ))
+
+    def test_nav_tree_cache_fills_read_from_primary(self):
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        page = self.add_replica_only_page(courses[0].course_id)
+        content_repo = ContentRepo(unit_of_work=self.unit_of_work, nav_tree_cache=NavTreeCache())
+
+        nav_links = content_repo.generate_listed_page_navigation_link_tree_for_course_id(page.course_id)
+
+        self.assertNotIn(page.url_path_after_course_path, [link.url_path_after_course_path for link in nav_links])
+        # Only the fill is pinned, other reads still go to the replica
+        self.assertIsNotNone(content_repo.get_page_by_url_and_course_id_if_exists(
+            page.course_id, page.url_path_after_course_path
+        ))
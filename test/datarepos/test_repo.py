@@ -1,4 +1,5 @@
 from custom_exceptions import NotFoundException
+from datarepos.prepared_statement_cache import PreparedStatementCache
 from datarepos.repo import Repo
 from test.test_with_database_container import TestWithDatabaseContainer
 
@@ -29,15 +30,9 @@ class TestRepo(TestWithDatabaseContainer):
         '''
         params = (row_id,)
 
-        self.repo.execute_dml_query(test_update_query, params)
-
-    def test_execute_dml_query_with_not_found_precheck(self):
-        precheck_query = '''
-        SELECT COUNT(*)
-        FROM course_term
-        WHERE course_term_id = 1
-        '''
+        self.repo.execute_dml_query(test_update_query, params, raise_if_not_found=True)
 
+    def test_execute_dml_query_raises_if_not_found(self):
         test_update_query = '''
         UPDATE course_term
         SET title = 'Fall 2024', position_from_top = 1
@@ -45,4 +40,35 @@ class TestRepo(TestWithDatabaseContainer):
         '''
 
         with self.assertRaises(NotFoundException):
-            self.repo.execute_dml_query(test_update_query, (), precheck_query)
+            self.repo.execute_dml_query(test_update_query, (), raise_if_not_found=True)
+
+    def test_execute_cached_query_reuses_prepared_statement(self):
+        statement_cache = PreparedStatementCache.attach(self.connection)
+
+        insertion_query = '''
+        INSERT INTO course_term (title, position_from_top)
+        VALUES ('Fall 2024', 1);
+        '''
+        cursor = self.connection.cursor()
+        cursor.execute(insertion_query)
+        self.connection.commit()
+        row_id = cursor.lastrowid
+
+        select_query = '''
+        SELECT course_term.title
+        FROM course_term
+        WHERE course_term.course_term_id = %s
+        '''
+
+        for _ in range(2):
+            cursor = self.repo.execute_cached_query(select_query, (row_id,), dictionary=True)
+            result = cursor.fetchone()
+            self.assertEqual(result["title"], "Fall 2024")
+
+        self.assertEqual(statement_cache.misses, 1)
+        self.assertEqual(statement_cache.hits, 1)
+
+    def test_execute_cached_query_without_cache(self):
+        cursor = self.repo.execute_cached_query("SELECT %s;", (1,))
+        result, = cursor.fetchone()
+        self.assertEqual(result, 1)
@@ -0,0 +1,76 @@
+import uuid
+
+from datarepos.request_context_repo import RequestContextRepo
+from models.course_enrollment import CourseEnrollment, Role
+from models.page import Page, VisibilitySetting
+from models.request_context import RequestContext
+from test.test_with_database_container import TestWithDatabaseContainer
+
+
+class TestRequestContextRepo(TestWithDatabaseContainer):
+    def setUp(self):
+        super().setUp()
+        self.request_context_repo = RequestContextRepo(self.connection)
+
+    def add_sample_page(self, course_id: int) -> Page:
+        page = Page(
+            page_title="Syllabus",
+            page_content="# Syllabus",
+            page_visibility_setting=VisibilitySetting.LISTED,
+            url_path_after_course_path="/syllabus",
+            course_id=course_id,
+        )
+        page.page_id = self.add_single_page_and_get_id(page)
+        return page
+
+    def test_get_request_context(self):
+        user, _ = self.add_sample_user_to_test_db()
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        course = courses[0]
+        self.add_single_enrollment(CourseEnrollment(course_id=course.course_id, user_id=user.user_id, role=Role.ASSISTANT))
+        page = self.add_sample_page(course.course_id)
+
+        request_context = self.request_context_repo.get_request_context(
+            user.user_uuid, course.starting_url_path, page.url_path_after_course_path
+        )
+
+        self.assertEqual(request_context.user, user)
+        self.assertEqual(request_context.course, course)
+        self.assertEqual(request_context.role, Role.ASSISTANT)
+        self.assertEqual(request_context.page, page)
+
+    def test_get_request_context_without_page(self):
+        user, _ = self.add_sample_user_to_test_db()
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        course = courses[0]
+        self.add_single_enrollment(CourseEnrollment(course_id=course.course_id, user_id=user.user_id, role=Role.STUDENT))
+        self.add_sample_page(course.course_id)
+
+        request_context = self.request_context_repo.get_request_context(user.user_uuid, course.starting_url_path)
+
+        self.assertEqual(request_context.role, Role.STUDENT)
+        self.assertIsNone(request_context.page)
+
+    def test_get_request_context_if_not_enrolled(self):
+        user, _ = self.add_sample_user_to_test_db()
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        course = courses[0]
+
+        request_context = self.request_context_repo.get_request_context(user.user_uuid, course.starting_url_path, "/")
+
+        self.assertEqual(request_context.user, user)
+        self.assertEqual(request_context.course, course)
+        self.assertIsNone(request_context.role)
+
+    def test_get_request_context_for_nonexistent_course(self):
+        user, _ = self.add_sample_user_to_test_db()
+
+        request_context = self.request_context_repo.get_request_context(user.user_uuid, "/nonexistent-course", "/")
+
+        self.assertEqual(request_context.user, user)
+        self.assertIsNone(request_context.course)
+        self.assertIsNone(request_context.page)
+
+    def test_get_request_context_for_nonexistent_user(self):
+        request_context = self.request_context_repo.get_request_context(str(uuid.uuid4()), "/cpsc-408-f24", "/")
+        self.assertEqual(request_context, RequestContext())
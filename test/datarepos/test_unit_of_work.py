@@ -0,0 +1,116 @@
+from caches.course_enrollment_cache import CourseEnrollmentCache
+from custom_exceptions import NotFoundException
+from datarepos.course_repo import CourseRepo
+from datarepos.unit_of_work import UnitOfWork
+from datarepos.user_repo import UserRepo
+from models.course import Course
+from models.user import User
+from test.test_with_database_container import TestWithDatabaseContainer
+
+
+class TestUnitOfWork(TestWithDatabaseContainer):
+    def setUp(self):
+        super().setUp()
+        # Separate connection, so uncommitted writes aren't visible to self.connection
+        self.unit_of_work_connection = self.database_config.connect()
+        self.unit_of_work = UnitOfWork(self.unit_of_work_connection)
+
+        self.user_repo = UserRepo(unit_of_work=self.unit_of_work)
+        self.course_repo = CourseRepo(unit_of_work=self.unit_of_work)
+
+    def tearDown(self):
+        self.unit_of_work_connection.close()
+        super().tearDown()
+
+    def count_rows(self, table_name: str) -> int:
+        # End any snapshot left over from earlier reads
+        self.connection.commit()
+
+        cursor = self.connection.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
+        count, = cursor.fetchone()
+        return count
+
+    def add_sample_course(self) -> Course:
+        course = Course(
+            title="Database Management",
+            user_friendly_class_code="CPSC 408",
+            starting_url_path="/cpsc-408-f24",
+        )
+        course.course_id = self.course_repo.add_new_course_and_get_id(course)
+        return course
+
+    def test_repos_share_connection(self):
+        self.assertIs(self.user_repo.connection, self.course_repo.connection)
+
+    def test_writes_commit_once_at_end_of_transaction(self):
+        with self.unit_of_work.transaction():
+            self.user_repo.add_new_user_and_get_id(
+                User(full_name="Test Name", email="example@example.com"),
+                "password",
+            )
+            self.add_sample_course()
+
+            self.assertEqual(self.count_rows("user"), 0)
+            self.assertEqual(self.count_rows("course"), 0)
+
+        self.assertEqual(self.count_rows("user"), 1)
+        self.assertEqual(self.count_rows("course"), 1)
+
+    def test_exception_rolls_back_all_writes(self):
+        with self.assertRaises(RuntimeError):
+            with self.unit_of_work.transaction():
+                self.user_repo.add_new_user_and_get_id(
+                    User(full_name="Test Name", email="example@example.com"),
+                    "password",
+                )
+                self.add_sample_course()
+                raise RuntimeError
+
+        self.assertEqual(self.count_rows("user"), 0)
+        self.assertEqual(self.count_rows("course"), 0)
+
+    def test_failed_write_only_rolls_back_itself(self):
+        with self.unit_of_work.transaction():
+            course = self.add_sample_course()
+
+            with self.assertRaises(NotFoundException):
+                self.course_repo.delete_course_enrollment_by_id(course.course_id, 1)
+
+        self.assertEqual(self.count_rows("course"), 1)
+
+    def test_repo_without_unit_of_work_commits_each_write(self):
+        course_repo = CourseRepo(self.unit_of_work_connection)
+        course_repo.add_new_course_and_get_id(Course(
+            title="Database Management",
+            user_friendly_class_code="CPSC 408",
+            starting_url_path="/cpsc-408-f24",
+        ))
+
+        self.assertEqual(self.count_rows("course"), 1)
+
+    def test_cache_fill_reads_writes_committed_after_the_request_started(self):
+        course = self.add_sample_course()
+        cache_fill_connection = self.database_config.connect()
+        course_enrollment_cache = CourseEnrollmentCache()
+        unit_of_work = UnitOfWork(
+            self.unit_of_work_connection,
+            cache_fill_connection_provider=lambda: cache_fill_connection,
+        )
+        course_repo = CourseRepo(unit_of_work=unit_of_work, course_enrollment_cache=course_enrollment_cache)
+
+        # Like a request, whose first read opens its snapshot
+        unit_of_work.begin()
+        course_repo.get_course_by_id_if_exists(course.course_id)
+
+        cursor = self.connection.cursor()
+        cursor.execute("UPDATE course SET title = %s WHERE course_id = %s", ("Renamed", course.course_id))
+        self.connection.commit()
+        course_enrollment_cache.invalidate_course(course.course_id)
+
+        filled_course = course_repo.get_course_by_starting_url_if_exists(course.starting_url_path)
+        unit_of_work.end()
+        cache_fill_connection.close()
+
+        self.assertEqual(filled_course.title, "Renamed")
+        self.assertEqual(course_enrollment_cache.get_course(course.starting_url_path).title, "Renamed")
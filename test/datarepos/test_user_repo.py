@@ -1,5 +1,7 @@
 import uuid
 
+from caches.invalidation_bus import InvalidationBus, subscribe_caches_to_invalidation_bus
+from caches.user_session_cache import UserSessionCache
 from datarepos.user_repo import UserRepo
 from custom_exceptions import AlreadyExistsException, NotFoundException, DependencyException
 from models.course_enrollment import CourseEnrollment, Role
@@ -235,6 +237,34 @@ class TestUserRepo(TestWithDatabaseContainer):
         self.assertEqual(email, new_user.email)
         self.assertTrue(check_password_hash(hashed_password, sample_password))
 
+    def test_bump_session_version_by_id(self):
+        new_user, _ = self.add_sample_user_to_test_db()
+
+        user_session_cache = UserSessionCache()
+        invalidation_bus = InvalidationBus()
+        subscribe_caches_to_invalidation_bus(invalidation_bus, user_session_cache=user_session_cache)
+        user_repo = UserRepo(self.connection, invalidation_bus=invalidation_bus)
+        user_session_cache.put(new_user)
+
+        user_repo.bump_session_version_by_id(new_user.user_id)
+
+        self.assertEqual(user_repo.get_user_from_id_if_exists(new_user.user_id).session_version, 1)
+        self.assertIsNone(user_session_cache.get(new_user.user_uuid))
+
+    def test_bump_session_version_of_nonexistent_user(self):
+        with self.assertRaises(NotFoundException):
+            self.user_repo.bump_session_version_by_id(1)
+
+    def test_update_password_by_id(self):
+        new_user, sample_password = self.add_sample_user_to_test_db()
+        new_password = "new-password"
+
+        self.user_repo.update_password_by_id(new_user.user_id, new_password)
+
+        self.assertIsNone(self.user_repo.get_user_id_if_credentials_match(new_user.email, sample_password))
+        self.assertEqual(self.user_repo.get_user_id_if_credentials_match(new_user.email, new_password), new_user.user_id)
+        self.assertEqual(self.user_repo.get_user_from_id_if_exists(new_user.user_id).session_version, 1)
+
     def test_delete_user_with_file_creation_dependencies(self):
         # TODO implement with file attachments feature
         pass
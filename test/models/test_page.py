@@ -50,3 +50,22 @@ class TestPage(unittest.TestCase):
                         course_id=1
                     )
 
+
+    def test_depth_and_parent_path(self):
+        cases = [
+            ("/", 1, None),
+            ("/syllabus", 1, None),
+            ("/modules/week-1", 2, "/modules"),
+            ("/modules/week-1/notes", 3, "/modules/week-1"),
+        ]
+        for url_path, depth, parent_path in cases:
+            with self.subTest(url_path=url_path):
+                page = Page(
+                    page_title="Test Title",
+                    page_content="Test Content",
+                    page_visibility_setting=VisibilitySetting.LISTED,
+                    url_path_after_course_path=url_path,
+                    course_id=1
+                )
+                self.assertEqual(page.depth, depth)
+                self.assertEqual(page.parent_path, parent_path)
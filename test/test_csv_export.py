@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+from csv_export import generate_csv_chunks
+from export_formats import CSV, write_export_file
+from models.export_column import ExportColumn
+
+
+class TestCsvExport(unittest.TestCase):
+    def setUp(self):
+        self.rows = [(row_number, f"Namé {row_number}", "comma, quote\"") for row_number in range(25)]
+
+    def test_chunks_join_to_the_same_csv_as_the_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.csv')
+            write_export_file(path, self.rows, [ExportColumn(name) for name in ['id', 'name', 'note']], CSV)
+            with open(path, newline='') as csv_file:
+                file_contents = csv_file.read()
+
+        chunks = list(generate_csv_chunks(iter(self.rows), ['id', 'name', 'note'], rows_per_chunk=10))
+
+        # 25 rows at 10 per chunk, with the header in the first chunk
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(''.join(chunks), file_contents)
+
+    def test_chunks_are_generated_lazily(self):
+        rows_read = []
+
+        def rows():
+            for row in self.rows:
+                rows_read.append(row)
+                yield row
+
+        chunks = generate_csv_chunks(rows(), rows_per_chunk=5)
+        next(chunks)
+
+        self.assertEqual(len(rows_read), 5)
+
+    def test_no_chunks_without_header_or_rows(self):
+        self.assertEqual(list(generate_csv_chunks(iter([]))), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
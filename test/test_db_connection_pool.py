@@ -0,0 +1,70 @@
+from db_connection_pool import DBConnectionPool, PoolTimeoutException
+from test.test_with_database_container import TestWithDatabaseContainer
+
+
+class TestDBConnectionPool(TestWithDatabaseContainer):
+    def setUp(self):
+        super().setUp()
+        self.pool = DBConnectionPool(
+            self.database_config,
+            pool_size=2,
+            max_overflow=1,
+            checkout_timeout=0.5,
+        )
+
+    def tearDown(self):
+        self.pool.close_all()
+        super().tearDown()
+
+    def test_checkout_reuses_returned_connection(self):
+        connection = self.pool.checkout()
+        self.pool.checkin(connection)
+
+        self.assertIs(self.pool.checkout(), connection)
+        self.assertEqual(self.pool.total_connection_count, 1)
+
+    def test_checkout_opens_overflow_connection(self):
+        connections = [self.pool.checkout() for _ in range(3)]
+        self.assertEqual(self.pool.checked_out_connection_count, 3)
+
+        for connection in connections:
+            self.pool.checkin(connection)
+
+        # Overflow connection is closed instead of kept idle
+        self.assertEqual(self.pool.idle_connection_count, 2)
+        self.assertEqual(self.pool.total_connection_count, 2)
+
+    def test_checkout_times_out_when_exhausted(self):
+        for _ in range(3):
+            self.pool.checkout()
+
+        with self.assertRaises(PoolTimeoutException):
+            self.pool.checkout()
+
+    def test_checkin_rolls_back_open_transaction(self):
+        connection = self.pool.checkout()
+        cursor = connection.cursor()
+        cursor.execute("INSERT INTO course_term (title, position_from_top) VALUES ('Fall 2024', 1);")
+        self.pool.checkin(connection)
+
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM course_term;")
+        count, = cursor.fetchone()
+        self.assertEqual(count, 0)
+
+    def test_checkout_replaces_dropped_connection(self):
+        connection = self.pool.checkout()
+        self.pool.checkin(connection)
+        connection.close()
+
+        new_connection = self.pool.checkout()
+        self.assertIsNot(new_connection, connection)
+        self.assertTrue(new_connection.is_connected())
+
+    def test_checkout_recycles_old_connection(self):
+        self.pool.recycle_seconds = 0
+
+        connection = self.pool.checkout()
+        self.pool.checkin(connection)
+
+        self.assertIsNot(self.pool.checkout(), connection)
@@ -0,0 +1,153 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from export_formats import CSV, GZIP_CSV, ZSTD_CSV, JSON_LINES, COLUMNAR, COLUMNAR_MAGIC, write_export_file, \
+    read_columnar_file, get_export_format
+from models.export_column import ExportColumn, ExportColumnType
+
+
+class TestExportFormats(unittest.TestCase):
+    def setUp(self):
+        self.columns = [
+            ExportColumn('user_id', ExportColumnType.INT),
+            ExportColumn('attendance_status', ExportColumnType.SMALL_INT),
+            ExportColumn('full_name'),
+            ExportColumn('title'),
+            ExportColumn('opening_time', ExportColumnType.DATETIME),
+            ExportColumn('score', ExportColumnType.FLOAT),
+        ]
+        self.rows = [
+            (
+                row_number,
+                row_number % 5,
+                f"Namé {row_number}, \"quoted\"" if row_number % 7 else None,
+                f"Section {row_number % 3}",
+                datetime(2024, 9, 1, 8, 30, 0, row_number) if row_number % 4 else None,
+                row_number / 4,
+            )
+            for row_number in range(100)
+        ]
+
+    def write(self, export_format, rows=None, include_header=True) -> tuple[bytes, object]:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, export_format.file_name('export.csv'))
+            written_file = write_export_file(
+                path, iter(self.rows if rows is None else rows), self.columns, export_format, include_header
+            )
+            with open(path, 'rb') as export_file:
+                contents = export_file.read()
+
+        self.assertEqual(written_file.sha256, hashlib.sha256(contents).hexdigest())
+        return contents, written_file
+
+    def test_csv(self):
+        contents, written_file = self.write(CSV)
+
+        written_rows = list(csv.reader(io.StringIO(contents.decode('utf-8'), newline='')))
+        self.assertEqual(written_file.row_count, len(self.rows))
+        self.assertEqual(written_rows[0], [column.name for column in self.columns])
+        self.assertEqual(written_rows[2][2], 'Namé 1, "quoted"')
+        # NULLs are written as empty values
+        self.assertEqual(written_rows[8][2], '')
+
+    def test_csv_without_header(self):
+        contents, _ = self.write(CSV, include_header=False)
+
+        self.assertEqual(len(contents.decode('utf-8').splitlines()), len(self.rows))
+
+    def test_gzip_csv_holds_the_same_csv(self):
+        csv_contents, _ = self.write(CSV)
+        gzip_contents, written_file = self.write(GZIP_CSV)
+
+        self.assertEqual(gzip.decompress(gzip_contents), csv_contents)
+        self.assertEqual(written_file.row_count, len(self.rows))
+
+    def test_gzip_csv_checksum_is_repeatable(self):
+        _, first_written_file = self.write(GZIP_CSV)
+        _, second_written_file = self.write(GZIP_CSV)
+
+        self.assertEqual(first_written_file.sha256, second_written_file.sha256)
+
+    @unittest.skipUnless(ZSTD_CSV.is_available, "zstandard isn't installed")
+    def test_zstd_csv_holds_the_same_csv(self):
+        import zstandard
+
+        csv_contents, _ = self.write(CSV)
+        zstd_contents, _ = self.write(ZSTD_CSV)
+
+        self.assertEqual(zstandard.ZstdDecompressor().decompressobj().decompress(zstd_contents), csv_contents)
+
+    def test_json_lines(self):
+        contents, written_file = self.write(JSON_LINES)
+
+        written_rows = [json.loads(line) for line in contents.decode('utf-8').splitlines()]
+        self.assertEqual(written_file.row_count, len(self.rows))
+        self.assertEqual(len(written_rows), len(self.rows))
+        self.assertEqual(written_rows[1], {
+            'user_id': 1,
+            'attendance_status': 1,
+            'full_name': 'Namé 1, "quoted"',
+            'title': 'Section 1',
+            'opening_time': '2024-09-01T08:30:00.000001',
+            'score': 0.25,
+        })
+        self.assertIsNone(written_rows[0]['full_name'])
+
+    def test_columnar_round_trip(self):
+        contents, written_file = self.write(COLUMNAR)
+
+        columns, rows = read_columnar_file(io.BytesIO(contents))
+        self.assertTrue(contents.startswith(COLUMNAR_MAGIC))
+        self.assertEqual(written_file.row_count, len(self.rows))
+        self.assertEqual(columns, self.columns)
+        self.assertEqual(list(rows), self.rows)
+
+    def test_columnar_round_trip_across_row_groups(self):
+        rows = self.rows * 800
+
+        contents, written_file = self.write(COLUMNAR, rows)
+
+        _, read_rows = read_columnar_file(io.BytesIO(contents))
+        self.assertEqual(written_file.row_count, len(rows))
+        self.assertEqual(list(read_rows), rows)
+
+    def test_columnar_without_rows(self):
+        contents, written_file = self.write(COLUMNAR, [])
+
+        columns, rows = read_columnar_file(io.BytesIO(contents))
+        self.assertEqual(written_file.row_count, 0)
+        self.assertEqual(columns, self.columns)
+        self.assertEqual(list(rows), [])
+
+    def test_columnar_is_smaller_than_csv(self):
+        rows = self.rows * 100
+
+        csv_contents, _ = self.write(CSV, rows)
+        columnar_contents, _ = self.write(COLUMNAR, rows)
+
+        self.assertLess(len(columnar_contents), len(csv_contents) / 4)
+
+    def test_columnar_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            read_columnar_file(io.BytesIO(b'user_id,full_name\n'))
+
+    def test_file_names(self):
+        self.assertEqual(CSV.file_name('courses.csv'), 'courses.csv')
+        self.assertEqual(GZIP_CSV.file_name('courses.csv'), 'courses.csv.gz')
+        self.assertEqual(JSON_LINES.file_name('courses_deleted.csv'), 'courses_deleted.jsonl')
+
+    def test_get_export_format(self):
+        self.assertEqual(get_export_format('columnar'), COLUMNAR)
+        with self.assertRaises(ValueError):
+            get_export_format('xlsx')
+
+
+if __name__ == '__main__':
+    unittest.main()
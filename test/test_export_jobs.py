@@ -0,0 +1,52 @@
+import unittest
+
+from custom_exceptions import CancelledException
+from export_jobs import ExportJobProgress
+
+
+class StandInExportJobRepo:
+    def __init__(self):
+        self.saved_progress = []
+        self.cancel_requested = False
+
+    def update_export_job_progress(self, export_job_id: int, progress: dict[str, int]) -> bool:
+        self.saved_progress.append(progress)
+        return self.cancel_requested
+
+
+class TestExportJobProgress(unittest.TestCase):
+    def setUp(self):
+        self.export_job_repo = StandInExportJobRepo()
+
+    def test_counts_rows_per_file(self):
+        progress = ExportJobProgress(self.export_job_repo, export_job_id=1, interval_seconds=60)
+
+        self.assertEqual(list(progress.track('a.csv', iter([(1,), (2,)]))), [(1,), (2,)])
+        list(progress.track('b.csv', iter([(3,)])))
+        list(progress.track('c.csv', iter([])))
+
+        self.assertEqual(progress.rows_written, {'a.csv': 2, 'b.csv': 1, 'c.csv': 0})
+        self.assertEqual(self.export_job_repo.saved_progress, [])
+
+    def test_saves_progress_after_interval(self):
+        progress = ExportJobProgress(self.export_job_repo, export_job_id=1, interval_seconds=0)
+
+        list(progress.track('a.csv', iter([(1,), (2,)])))
+
+        self.assertEqual(self.export_job_repo.saved_progress, [{'a.csv': 1}, {'a.csv': 2}])
+
+    def test_stops_once_cancel_is_requested(self):
+        progress = ExportJobProgress(self.export_job_repo, export_job_id=1, interval_seconds=0)
+        rows = progress.track('a.csv', iter([(1,), (2,), (3,)]))
+
+        next(rows)
+        self.export_job_repo.cancel_requested = True
+
+        with self.assertRaises(CancelledException):
+            next(rows)
+        self.assertTrue(progress.cancelled)
+        self.assertEqual(progress.rows_written, {'a.csv': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
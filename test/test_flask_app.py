@@ -2,6 +2,7 @@ import uuid
 from typing import Optional
 
 from app import create_app
+from flask_repository_getters import get_unit_of_work
 from models.user import User
 from test.test_with_database_container import TestWithDatabaseContainer
 
@@ -9,10 +10,20 @@ from test.test_with_database_container import TestWithDatabaseContainer
 class TestFlaskApp(TestWithDatabaseContainer):
     def setUp(self):
         super().setUp()
-        self.app = create_app(False, self.database_config)
+        # Tests change the database directly between requests,
+        # which in-process caches wouldn't know about
+        self.app = create_app(False, self.database_config, enable_caching=False)
         self.test_client = self.app.test_client()
         self.test_client.testing = True
 
+    def tearDown(self):
+        # Release pooled connections so they don't hold locks
+        # on tables that are about to be dropped
+        self.app.config["DB_CONNECTION_POOL"].close_all()
+        for replica_pool in self.app.config["DB_REPLICA_CONNECTION_POOLS"]:
+            replica_pool.close_all()
+        super().tearDown()
+
     def sign_user_into_session(self, user: Optional[User] = None):
         if not user:
             uuid_to_set = str(uuid.uuid4())
@@ -21,3 +32,19 @@ class TestFlaskApp(TestWithDatabaseContainer):
 
         with self.test_client.session_transaction() as session:
             session["user_uuid"] = uuid_to_set
+
+    def test_writes_of_a_view_that_raises_are_rolled_back(self):
+        @self.app.route("/write-then-raise")
+        def write_then_raise():
+            unit_of_work = get_unit_of_work()
+            with unit_of_work.transaction():
+                cursor = unit_of_work.connection.cursor()
+                cursor.execute("INSERT INTO course_term (title, position_from_top) VALUES ('Fall 2024', 1)")
+            raise RuntimeError("View failed after writing")
+
+        response = self.test_client.get("/write-then-raise")
+
+        self.assertEqual(response.status_code, 500)
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM course_term")
+        self.assertEqual(cursor.fetchone()[0], 0)
@@ -0,0 +1,68 @@
+import unittest
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from models.page import Page, VisibilitySetting
+from page_renderer import RENDERER_VERSION, render_page_html, get_stored_page_html_if_current
+
+# Markdown pages, each next to the HTML the BeautifulSoup-based renderer gave for them
+GOLDEN_CORPUS_PATH = Path(__file__).resolve().parent / "page_renderer_corpus"
+GOLDEN_CORPUS_STARTING_URL_PATH = "/cpsc-408-f24"
+
+
+class TestPageRenderer(unittest.TestCase):
+    def return_sample_page(self):
+        return Page(
+            page_title="Syllabus",
+            page_content="# Syllabus",
+            page_visibility_setting=VisibilitySetting.LISTED,
+            url_path_after_course_path="/syllabus",
+            course_id=1,
+            page_id=1,
+            page_html="<h1>Syllabus</h1>",
+            page_html_renderer_version=RENDERER_VERSION,
+            page_html_starting_url_path="/cpsc-408-f24",
+        )
+
+    def test_relative_links_point_at_course(self):
+        page_html = render_page_html("[Notes](/lecture-notes) [Docs](https://example.com/docs)", "/cpsc-408-f24")
+        self.assertIn('href="/cpsc-408-f24/lecture-notes"', page_html)
+        self.assertIn('href="https://example.com/docs"', page_html)
+
+    def test_matches_golden_corpus(self):
+        markdown_paths = sorted(GOLDEN_CORPUS_PATH.glob("*.md"))
+        self.assertTrue(markdown_paths)
+
+        for markdown_path in markdown_paths:
+            with self.subTest(page=markdown_path.name):
+                page_html = render_page_html(markdown_path.read_text(), GOLDEN_CORPUS_STARTING_URL_PATH)
+
+                # The old renderer prettified its output, so compare
+                # documents rather than whitespace
+                self.assertEqual(
+                    BeautifulSoup(page_html, "html.parser").prettify(),
+                    markdown_path.with_suffix(".html").read_text(),
+                )
+
+    def test_link_text_markup_is_kept(self):
+        page_html = render_page_html("[**Week 1** notes](/notes/week-1)", "/cpsc-408-f24")
+        self.assertIn('<a href="/cpsc-408-f24/notes/week-1"><strong>Week 1</strong> notes</a>', page_html)
+
+    def test_current_stored_html(self):
+        page = self.return_sample_page()
+        self.assertEqual(get_stored_page_html_if_current(page, "/cpsc-408-f24"), page.page_html)
+
+    def test_stored_html_from_older_renderer(self):
+        page = self.return_sample_page()
+        page.page_html_renderer_version = RENDERER_VERSION - 1
+        self.assertIsNone(get_stored_page_html_if_current(page, "/cpsc-408-f24"))
+
+    def test_stored_html_for_other_course_path(self):
+        page = self.return_sample_page()
+        self.assertIsNone(get_stored_page_html_if_current(page, "/cpsc-408-s25"))
+
+    def test_no_stored_html(self):
+        page = self.return_sample_page()
+        page.page_html = None
+        self.assertIsNone(get_stored_page_html_if_current(page, "/cpsc-408-f24"))
@@ -0,0 +1,109 @@
+import csv
+import hashlib
+import json
+import os
+import tempfile
+
+from datarepos.course_repo import CourseRepo
+from export_formats import COLUMNAR, read_columnar_file
+from snapshot_export import export_tables_from_snapshot, MANIFEST_FILE_NAME
+from test.test_with_database_container import TestWithDatabaseContainer
+
+
+class TestSnapshotExport(TestWithDatabaseContainer):
+    def test_export_tables_writes_files_and_manifest(self):
+        self.add_many_sample_users_to_test_db()
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        table_file_names = {
+            'course': 'courses.csv',
+            'user': 'users.csv',
+            'attendance_session': 'attendance_sessions.csv',
+        }
+
+        with tempfile.TemporaryDirectory() as directory:
+            exported_tables = export_tables_from_snapshot(
+                self.database_config, table_file_names, directory, worker_count=2
+            ).tables
+
+            self.assertEqual([exported_table.table_name for exported_table in exported_tables], list(table_file_names))
+            self.assertEqual(exported_tables[0].row_count, len(courses))
+            self.assertEqual(exported_tables[2].row_count, 0)
+
+            with open(os.path.join(directory, MANIFEST_FILE_NAME)) as manifest_file:
+                manifest = json.load(manifest_file)
+            self.assertIn('snapshot_taken_at', manifest)
+            self.assertTrue(all(manifest_entry['changed_after'] is None for manifest_entry in manifest['tables']))
+            for exported_table, manifest_entry in zip(exported_tables, manifest['tables']):
+                self.assertEqual(manifest_entry['file_name'], table_file_names[exported_table.table_name])
+                self.assertEqual(manifest_entry['row_count'], exported_table.row_count)
+                with open(os.path.join(directory, manifest_entry['file_name']), 'rb') as csv_file:
+                    self.assertEqual(manifest_entry['sha256'], hashlib.sha256(csv_file.read()).hexdigest())
+
+    def test_export_tables_in_columnar_format(self):
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot_export = export_tables_from_snapshot(
+                self.database_config, {'course': 'courses.csv'}, directory, export_format=COLUMNAR
+            )
+
+            with open(os.path.join(directory, 'courses.cols'), 'rb') as columnar_file:
+                columns, rows = read_columnar_file(columnar_file)
+                rows = list(rows)
+            with open(os.path.join(directory, MANIFEST_FILE_NAME)) as manifest_file:
+                manifest = json.load(manifest_file)
+
+        self.assertEqual(snapshot_export.tables[0].file_name, 'courses.cols')
+        self.assertEqual(manifest['export_format'], 'columnar')
+        self.assertEqual(columns[0].name, 'course_id')
+        self.assertEqual(sorted(row[0] for row in rows), sorted(course.course_id for course in courses))
+
+    def test_tables_are_unlocked_after_export(self):
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+
+        with tempfile.TemporaryDirectory() as directory:
+            export_tables_from_snapshot(self.database_config, {'course': 'courses.csv'}, directory)
+
+        cursor = self.connection.cursor()
+        cursor.execute("UPDATE course SET title = %s WHERE course_id = %s", ("Renamed", courses[0].course_id))
+        self.connection.commit()
+        self.assertEqual(cursor.rowcount, 1)
+
+    def test_export_only_changes_since_high_water_mark(self):
+        courses, _ = self.add_sample_course_term_and_course_cluster()
+        table_file_names = {'course': 'courses.csv', 'user': 'users.csv'}
+        with tempfile.TemporaryDirectory() as directory:
+            first_export = export_tables_from_snapshot(self.database_config, table_file_names, directory)
+
+        course_repo = CourseRepo(self.connection)
+        updated_course = courses[1]
+        updated_course.title = "Renamed"
+        course_repo.update_course_metadata_by_id(updated_course)
+        course_repo.delete_course_by_id(courses[0].course_id)
+
+        with tempfile.TemporaryDirectory() as directory:
+            second_export = export_tables_from_snapshot(
+                self.database_config,
+                table_file_names,
+                directory,
+                changed_after={'course': first_export.snapshot_taken_at},
+            )
+
+            with open(os.path.join(directory, 'courses.csv'), newline='') as csv_file:
+                changed_rows = list(csv.reader(csv_file))
+            with open(os.path.join(directory, 'courses_deleted.csv'), newline='') as csv_file:
+                deleted_rows = list(csv.reader(csv_file))
+            with open(os.path.join(directory, MANIFEST_FILE_NAME)) as manifest_file:
+                manifest = json.load(manifest_file)
+
+        self.assertGreater(second_export.snapshot_taken_at, first_export.snapshot_taken_at)
+        self.assertEqual([int(row[0]) for row in changed_rows], [updated_course.course_id])
+        self.assertEqual(deleted_rows[0], ['row_key', 'deleted_at'])
+        self.assertEqual([json.loads(row[0]) for row in deleted_rows[1:]], [{'course_id': courses[0].course_id}])
+
+        course_entry, user_entry = manifest['tables']
+        self.assertEqual(course_entry['changed_after'], first_export.snapshot_taken_at.isoformat())
+        self.assertEqual(course_entry['deleted_row_count'], 1)
+        # Tables without a high-water mark are exported whole
+        self.assertIsNone(user_entry['changed_after'])
+        self.assertIsNone(user_entry['deleted_rows_file_name'])
@@ -1,8 +1,8 @@
+import json
 import unittest
 from pathlib import Path
 from os import system
 
-import mysql.connector
 from testcontainers.mysql import MySqlContainer
 from werkzeug.security import generate_password_hash
 
@@ -37,9 +37,7 @@ class TestWithDatabaseContainer(unittest.TestCase):
             password=self.mysql_container.password,
             database=self.mysql_container.dbname
         )
-        config_vars = vars(self.database_config)
-
-        self.connection = mysql.connector.connect(**config_vars)
+        self.connection = self.database_config.connect()
 
         cursor = self.connection.cursor()
         cursor.execute("USE test;")
@@ -258,9 +256,11 @@ class TestWithDatabaseContainer(unittest.TestCase):
             page_title,
             url_path_after_course_path,
             course_id,
-            created_by_user_id
+            created_by_user_id,
+            depth,
+            parent_path
         ) 
-        VALUES (%s, %s, %s, %s, %s, %s);
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
         '''
         params = (
             page.page_visibility_setting.value,
@@ -268,7 +268,9 @@ class TestWithDatabaseContainer(unittest.TestCase):
             page.page_title,
             page.url_path_after_course_path,
             page.course_id,
-            page.created_by_user_id
+            page.created_by_user_id,
+            page.depth,
+            page.parent_path
         )
 
         cursor = self.connection.cursor(dictionary=True)
@@ -373,3 +375,15 @@ class TestWithDatabaseContainer(unittest.TestCase):
         result = cursor.fetchone()
         self.assertIsNone(result)
 
+
+    def get_deleted_row_keys(self, table_name: str) -> list[dict]:
+        get_deleted_row_keys_query = '''
+        SELECT deleted_row.row_key
+        FROM deleted_row
+        WHERE deleted_row.table_name = %s
+        ORDER BY deleted_row.deleted_row_id
+        '''
+        cursor = self.connection.cursor()
+        cursor.execute(get_deleted_row_keys_query, (table_name,))
+        self.connection.commit()
+        return [json.loads(row_key) for row_key, in cursor.fetchall()]